@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 # Import your models, CRUD functions, and security dependencies
 from backend.db import db_models, crud
 from backend.core import auth_utils
 from backend.db.database import get_db
+from backend.crud import project_crud, job_crud, usage_crud
 from backend import schemas as pydantic_models
 
 router = APIRouter(
@@ -35,10 +37,80 @@ def delete_user_by_admin(user_id: int, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     crud.delete_user(db, user_id=user_id)
+    # Outstanding tokens of the user must stop working right away.
+    auth_utils.invalidate_user_principals(user_id)
+    project_crud.invalidate_project_cache(user_id=user_id)
     return {"message": "User deleted successfully"}
 
+@router.patch("/users/{user_id}/role", response_model=pydantic_models.User)
+def update_user_role_by_admin(
+    user_id: int,
+    role_update: pydantic_models.UserRoleUpdate,
+    db: Session = Depends(get_db)
+):
+    """Admin endpoint to change a user's role ('admin' or 'user')."""
+    valid_roles = [role.value for role in db_models.UserRole]
+    if role_update.role not in valid_roles:
+        raise HTTPException(status_code=400, detail=f"Role must be one of {valid_roles}.")
+    user = crud.update_user_role(db, user_id=user_id, role=role_update.role)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    auth_utils.invalidate_user_principals(user_id)
+    return user
+
 @router.get("/users", response_model=List[pydantic_models.User])
 def list_users_by_admin(db: Session = Depends(get_db)):
     """Admin endpoint to list all users."""
     # (Requires crud.get_users function)
-    return crud.get_users(db)
\ No newline at end of file
+    return crud.get_users(db)
+
+# --- LLM Usage Reports ---
+# Token counts come from the model's usage metadata; costs are estimates
+# from the per-model prices in backend.core.llm_usage.
+
+@router.get("/usage/projects", response_model=List[pydantic_models.ProjectUsage])
+def list_project_usage_by_admin(
+    since: Optional[datetime] = Query(None, description="Only calls made at or after this time (UTC)."),
+    until: Optional[datetime] = Query(None, description="Only calls made before this time (UTC)."),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """Admin endpoint to list LLM usage per project, most expensive first."""
+    return usage_crud.get_usage_by_project(db, since=since, until=until, limit=limit)
+
+@router.get("/usage/projects/{project_id}", response_model=pydantic_models.ProjectUsageReport)
+def get_project_usage_by_admin(
+    project_id: int,
+    since: Optional[datetime] = Query(None, description="Only calls made at or after this time (UTC)."),
+    until: Optional[datetime] = Query(None, description="Only calls made before this time (UTC)."),
+    runs: int = Query(20, ge=1, le=200, description="How many of the latest runs to list."),
+    db: Session = Depends(get_db)
+):
+    """
+    Admin endpoint to report a project's LLM usage: totals, and a breakdown
+    by purpose and model, by user and by ingestion run.
+    """
+    filters = {"project_id": project_id, "since": since, "until": until}
+    return {
+        "project_id": project_id,
+        "totals": usage_crud.get_usage_totals(db, **filters),
+        "by_purpose": usage_crud.get_usage_by_purpose(db, **filters),
+        "by_user": usage_crud.get_usage_by_user(db, **filters),
+        "by_run": usage_crud.get_usage_by_run(db, limit=runs, **filters),
+    }
+
+@router.get("/usage/runs/{job_id}", response_model=pydantic_models.RunUsageReport)
+def get_run_usage_by_admin(job_id: str, db: Session = Depends(get_db)):
+    """Admin endpoint to report what one ingestion run spent on the LLM."""
+    job = job_crud.get_ingestion_job(db, job_id)
+    attribution = usage_crud.get_run_attribution(db, job_id)
+    if job is None and attribution is None:
+        raise HTTPException(status_code=404, detail="Ingestion run not found")
+    return {
+        "job_id": job_id,
+        "project_id": job.project_id if job else attribution["project_id"],
+        "user_id": job.user_id if job else attribution["user_id"],
+        "status": job.status if job else None,
+        "totals": usage_crud.get_usage_totals(db, job_id=job_id),
+        "by_purpose": usage_crud.get_usage_by_purpose(db, job_id=job_id),
+    }
@@ -0,0 +1,93 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from backend.core import auth_utils
+from backend.db import crud
+from backend.db.database import get_db
+from backend.crud import project_crud
+from backend import schemas as pydantic_models
+
+# Largest page a client may ask for
+HISTORY_MAX_PAGE_SIZE = 200
+# Most results a history search returns
+HISTORY_MAX_SEARCH_RESULTS = 100
+
+router = APIRouter(
+    prefix="/api",
+    tags=["History"],
+    dependencies=[Depends(auth_utils.get_current_user)]
+)
+
+def _get_history_page(db: Session, user_id: int, project_id: Optional[int], limit: int, cursor: Optional[str]):
+    try:
+        items, next_cursor = crud.get_history_page(db, user_id=user_id, project_id=project_id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # The response model converts the ORM rows
+    return {"items": items, "next_cursor": next_cursor}
+
+def _search_history(db: Session, user_id: int, project_id: Optional[int], q: str, limit: int):
+    results = crud.search_history(db, user_id=user_id, search=q, project_id=project_id, limit=limit)
+    return [
+        pydantic_models.HistorySearchResult(
+            **pydantic_models.QueryHistory.model_validate(entry, from_attributes=True).model_dump(),
+            score=score,
+            snippet=snippet,
+        )
+        for entry, score, snippet in results
+    ]
+
+@router.get("/history", response_model=pydantic_models.HistoryPage)
+def list_user_history(
+    limit: int = Query(50, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: auth_utils.Principal = Depends(auth_utils.get_current_user)
+):
+    """
+    Lists the current user's questions and answers across all projects, newest
+    first. Pass the returned `next_cursor` as `cursor` to get the next page.
+    """
+    return _get_history_page(db, current_user.id, None, limit, cursor)
+
+@router.get("/projects/{project_id}/history", response_model=pydantic_models.HistoryPage)
+def list_project_history(
+    project_id: int,
+    limit: int = Query(50, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: auth_utils.Principal = Depends(auth_utils.get_current_user)
+):
+    """Lists the current user's history for one project, newest first."""
+    if not project_crud.get_owned_project(db, project_id=project_id, user_id=current_user.id):
+        raise HTTPException(status_code=404, detail="Project not found or you do not have access.")
+    return _get_history_page(db, current_user.id, project_id, limit, cursor)
+
+@router.get("/history/search", response_model=List[pydantic_models.HistorySearchResult])
+def search_user_history(
+    q: str = Query(..., min_length=1),
+    project_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=HISTORY_MAX_SEARCH_RESULTS),
+    db: Session = Depends(get_db),
+    current_user: auth_utils.Principal = Depends(auth_utils.get_current_user)
+):
+    """
+    Finds the current user's past questions and answers containing every word
+    of `q`, best match first. Optionally limited to one project.
+    """
+    return _search_history(db, current_user.id, project_id, q, limit)
+
+@router.get("/projects/{project_id}/history/search", response_model=List[pydantic_models.HistorySearchResult])
+def search_project_history(
+    project_id: int,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=HISTORY_MAX_SEARCH_RESULTS),
+    db: Session = Depends(get_db),
+    current_user: auth_utils.Principal = Depends(auth_utils.get_current_user)
+):
+    """Finds the current user's history for one project containing every word of `q`."""
+    if not project_crud.get_owned_project(db, project_id=project_id, user_id=current_user.id):
+        raise HTTPException(status_code=404, detail="Project not found or you do not have access.")
+    return _search_history(db, current_user.id, project_id, q, limit)
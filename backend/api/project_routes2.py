@@ -1,15 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import os
+import uuid
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 # --- Project-specific Imports ---
-from backend.db.database import get_db
-from backend.crud import project_crud
+from backend.db.database import get_db, SessionLocal
+from backend.crud import project_crud, job_crud
 from backend.core import auth_utils
-from backend.db import db_models
+from backend import schemas as pydantic_models
+
+# Background runner for the incremental ingestion graph and its live progress
+from backend.jobs.manager import job_manager
+from backend.jobs.progress import progress_bus
+from backend.jobs.watcher import watch_manager
+from backend.api.sse import sse_event, SSE_HEADERS
 
-# Import the compiled LangGraph application
-from backend.graph_incremental2 import incremental_ingestion_app
+# How often a progress stream re-reads the job record while no live events arrive
+JOB_EVENTS_POLL_SECONDS = 1.0
+
+# Uploaded archives are written to disk as they arrive, never held in memory
+ARCHIVE_MAX_BYTES = int(os.getenv("ARCHIVE_MAX_BYTES", str(4 * 1024 ** 3)))
 
 # --- Pydantic Models for API Request ---
 
@@ -18,6 +33,10 @@ class IngestRequest(BaseModel):
     project_name: str
     directory: str
 
+class WatchRequest(BaseModel):
+    """Request body for starting watch mode on a project."""
+    directory: str
+
 # --- API Router Initialization ---
 
 router = APIRouter(
@@ -28,15 +47,25 @@ router = APIRouter(
 
 # --- API Endpoint ---
 
+def _get_owned_project(db: Session, project_id: int, user_id: int):
+    project = project_crud.get_owned_project(db, project_id=project_id, user_id=user_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found or you do not have access.")
+    return project
+
 @router.post("/ingest", status_code=status.HTTP_202_ACCEPTED)
 async def run_ingestion_for_project(
     request: IngestRequest,
     db: Session = Depends(get_db),
-    current_user: db_models.User = Depends(auth_utils.get_current_user)
+    current_user: auth_utils.Principal = Depends(auth_utils.get_current_user)
 ):
     """
-    Triggers the incremental ingestion pipeline for a project.
-    If a project with the given name doesn't exist, it will be created.
+    Triggers the incremental ingestion pipeline for a project as a background
+    job and returns its `job_id` right away. Poll `/api/ingest/jobs/{job_id}`
+    for progress. Only one run per project executes at a time; while another
+    run is active, the request queues a single follow-up run, or attaches to
+    the one already queued (`coalesced: true`). If a project with the given
+    name doesn't exist, it will be created.
     """
     # 1. Find the project by name for the current user.
     # Note: This assumes a `get_project_by_name` function exists in your CRUD file.
@@ -53,21 +82,226 @@ async def run_ingestion_for_project(
                 detail="Failed to create a new project."
             )
 
-    # 3. Define the initial state to start the graph
-    initial_state = {
-        "project_id": project.id,
-        "directory": request.directory
+    # 3. Submit a background job; the graph runs after the response is sent
+    try:
+        job, created = job_manager.submit(project_id=project.id, user_id=current_user.id, directory=request.directory)
+    except Exception as e:
+        print(f"Error submitting ingestion job for project {project.id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to start ingestion process: {e}"
+        )
+
+    if not created:
+        message = f"An ingestion run is already queued for project '{project.name}' (ID: {project.id}); attached to it."
+    else:
+        message = f"Ingestion process started for project '{project.name}' (ID: {project.id})."
+    return {
+        "message": message,
+        "job_id": job.id,
+        "status": job.status,
+        "coalesced": not created
     }
 
-    # 4. Asynchronously invoke the LangGraph application
+@router.post("/projects/{project_id}/ingest/archive", status_code=status.HTTP_202_ACCEPTED)
+async def ingest_project_archive(
+    project_id: int,
+    http_request: Request,
+    filename: str = Query("upload", max_length=255),
+    db: Session = Depends(get_db),
+    current_user: auth_utils.Principal = Depends(auth_utils.get_current_user)
+):
+    """
+    Ingests a zip or tar (optionally gzip/bz2/xz compressed) archive sent as
+    the raw request body, e.g. `curl --data-binary @code.zip`. The upload is
+    streamed to disk in chunks, then its `.py` members are scanned, hashed
+    and parsed straight from the archive without extracting it, keyed by
+    their archive-relative paths. Returns the background job like `/ingest`.
+    """
+    project = _get_owned_project(db, project_id, current_user.id)
+
+    upload_dir = os.path.join(f"project_data/{project.id}", "uploads")
+    os.makedirs(upload_dir, exist_ok=True)
+    archive_path = os.path.join(upload_dir, uuid.uuid4().hex)
+    partial_path = archive_path + ".part"
+
+    size = 0
+    try:
+        with open(partial_path, "wb") as f:
+            async for chunk in http_request.stream():
+                size += len(chunk)
+                if size > ARCHIVE_MAX_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Archive exceeds the {ARCHIVE_MAX_BYTES} byte limit."
+                    )
+                f.write(chunk)
+        # Imported here: the archive reader pulls in the parser, unused at startup.
+        from backend.parser.archive import detect_archive_format
+        if detect_archive_format(partial_path) is None:
+            raise HTTPException(status_code=400, detail="The request body is not a zip or tar archive.")
+        os.replace(partial_path, archive_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
     try:
-        await incremental_ingestion_app.ainvoke(initial_state)
+        job, created = job_manager.submit(
+            project_id=project.id, user_id=current_user.id,
+            directory=os.path.basename(filename), archive_path=archive_path
+        )
     except Exception as e:
-        print(f"Error invoking ingestion graph for project {project.id}: {e}")
+        os.remove(archive_path)
+        print(f"Error submitting archive ingestion job for project {project.id}: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to start ingestion process: {e}"
         )
 
-    return {"message": f"Ingestion process started for project '{project.name}' (ID: {project.id})."}
+    print(f"Received {size} byte archive '{filename}' for project {project.id}.")
+    return {
+        "message": f"Archive ingestion started for project '{project.name}' (ID: {project.id}).",
+        "job_id": job.id,
+        "status": job.status,
+        "coalesced": not created
+    }
+
+# --- Job Status Endpoints ---
+
+@router.get("/ingest/jobs", response_model=List[pydantic_models.IngestionJob])
+def list_ingestion_jobs(
+    project_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: auth_utils.Principal = Depends(auth_utils.get_current_user)
+):
+    """Lists the current user's most recent ingestion jobs."""
+    return job_crud.get_ingestion_jobs(db, user_id=current_user.id, project_id=project_id, limit=limit)
+
+@router.get("/ingest/jobs/{job_id}", response_model=pydantic_models.IngestionJob)
+def get_ingestion_job_status(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: auth_utils.Principal = Depends(auth_utils.get_current_user)
+):
+    """Returns the status and per-node progress of an ingestion job."""
+    job = job_crud.get_ingestion_job(db, job_id, user_id=current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found or you do not have access.")
+    return job
+
+@router.get("/ingest/jobs/{job_id}/events")
+async def stream_ingestion_job_events(
+    job_id: str,
+    http_request: Request,
+    db: Session = Depends(get_db),
+    current_user: auth_utils.Principal = Depends(auth_utils.get_current_user)
+):
+    """
+    Streams an ingestion job's live progress as Server-Sent Events.
+
+    Starts with a `job` event holding the stored job record. While the job
+    runs, each node emits `node_started`, throttled `progress` (done/total,
+    rate, ETA and current file) and `node_completed` events. The stream ends
+    with an `end` event carrying the final status. Jobs running in another
+    worker are followed through the snapshot that worker stores about once a
+    second.
+    """
+    job = job_crud.get_ingestion_job(db, job_id, user_id=current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found or you do not have access.")
+    snapshot = pydantic_models.IngestionJob.model_validate(job, from_attributes=True).model_dump()
 
+    def read_job():
+        # The request-scoped session is closed once streaming starts.
+        with SessionLocal() as stream_db:
+            return job_crud.get_ingestion_job(stream_db, job_id)
+
+    async def event_stream():
+        yield sse_event("job", snapshot)
+        if snapshot["status"] not in job_crud.ACTIVE_STATUSES:
+            yield sse_event("end", {"status": snapshot["status"], "error": snapshot["error"]})
+            return
+
+        last_remote = None
+        with progress_bus.subscribe(job_id) as events:
+            while True:
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=JOB_EVENTS_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    if await http_request.is_disconnected():
+                        return
+                    current = read_job()
+                    if current is None or current.status not in job_crud.ACTIVE_STATUSES:
+                        yield sse_event("end", {"status": current.status if current else "unknown",
+                                                "error": current.error if current else None})
+                        return
+                    remote = (current.progress or {}).get("current")
+                    if not job_manager.is_local(job_id) and remote and remote != last_remote:
+                        last_remote = remote
+                        yield sse_event(remote["event"], remote)
+                    continue
+
+                if event["event"] == "job_finished":
+                    yield sse_event("end", {"status": event["status"], "error": event["error"]})
+                    return
+                yield sse_event(event["event"], event)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.post("/ingest/jobs/{job_id}/cancel", response_model=pydantic_models.IngestionJob)
+def cancel_ingestion_job(
+    job_id: str,
+    current_user: auth_utils.Principal = Depends(auth_utils.get_current_user)
+):
+    """
+    Requests cancellation of a queued or running ingestion job. The returned
+    job has `cancel_requested` set; poll it until its status is `cancelled`.
+    """
+    job = job_manager.cancel(job_id, user_id=current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found or you do not have access.")
+    return job
+
+# --- Watch Mode Endpoints ---
+
+@router.post("/projects/{project_id}/watch")
+async def start_watching_project(
+    project_id: int,
+    request: WatchRequest,
+    db: Session = Depends(get_db),
+    current_user: auth_utils.Principal = Depends(auth_utils.get_current_user)
+):
+    """
+    Watches the project directory and ingests changed files incrementally,
+    a debounced batch at a time, without rescanning the whole tree. A project
+    that was never ingested gets one full ingestion first. Watchers run in
+    the worker that received this request and stop when it shuts down.
+    """
+    _get_owned_project(db, project_id, current_user.id)
+    try:
+        watcher = await watch_manager.start(project_id, current_user.id, request.directory)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return watcher.describe()
+
+@router.delete("/projects/{project_id}/watch")
+async def stop_watching_project(
+    project_id: int,
+    db: Session = Depends(get_db),
+    current_user: auth_utils.Principal = Depends(auth_utils.get_current_user)
+):
+    """Stops watch mode for the project."""
+    _get_owned_project(db, project_id, current_user.id)
+    if not await watch_manager.stop(project_id):
+        raise HTTPException(status_code=404, detail="Project is not being watched.")
+    return {"message": f"Stopped watching project {project_id}."}
+
+@router.get("/watches")
+def list_watched_projects(
+    db: Session = Depends(get_db),
+    current_user: auth_utils.Principal = Depends(auth_utils.get_current_user)
+):
+    """Lists the current user's watched projects in this worker."""
+    project_ids = [project.id for project in project_crud.get_projects_by_user(db, user_id=current_user.id)]
+    return watch_manager.list(project_ids)
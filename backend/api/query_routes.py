@@ -1,19 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+import asyncio
+from contextlib import aclosing
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-# Import the LangGraph applications
-from backend import graph_incremental2 as incremental_app
-from backend.graph_query import query_app
+# Import the LangGraph application and the ingestion job runner
+from backend.jobs.manager import job_manager
+from backend.jobs.batch_writer import history_writer
+from backend.graph_query import get_query_app, retrieve_node, generate_node, stream_answer
 
 # Import auth, DB, and CRUD functions
-from backend.core.auth_utils import get_current_user
-from backend.db.database import get_db
+from backend.core.auth_utils import Principal, get_current_user
+from backend.core.llm_usage import llm_usage_scope
+from backend.db.database import get_db, get_async_db
 from backend.crud import project_crud
-from backend.db import crud as history_crud
-from backend.db import db_models
 from backend import schemas as pydantic_models
-from backend.vectorstore.ingest import ingest_summaries_to_vector_store
+from backend.query.symbol_index import load_symbol_index
+from backend.api.sse import sse_event, SSE_HEADERS
+from backend.query.query_engine import search_relevant_summaries_batch, build_context, CONTEXT_CANDIDATES
 
 # --- Pydantic Models for Request Bodies ---
 
@@ -22,6 +30,12 @@ class IngestRequest(BaseModel):
 
 class AskRequest(BaseModel):
     question: str
+    filters: Optional[pydantic_models.SearchFilters] = None
+
+class BatchAskRequest(BaseModel):
+    questions: List[str] = Field(..., min_length=1, max_length=100)
+    filters: Optional[pydantic_models.SearchFilters] = None
+    max_concurrency: int = Field(4, ge=1, le=16)
 
 class UploadResponse(BaseModel):
     message: str
@@ -39,28 +53,30 @@ async def run_project_ingestion(
     project_id: int,
     request: IngestRequest,
     db: Session = Depends(get_db),
-    current_user: db_models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Triggers the full, end-to-end incremental ingestion pipeline for a project.
     This includes code diffing, summarization, and vector store updates.
+    The request waits for the run; if one is already queued for the project,
+    it waits for that run instead of starting another.
     """
     # 1. Verify the project exists and the user has access
-    project = project_crud.get_project(db, project_id=project_id, user_id=current_user.id)
+    project = project_crud.get_owned_project(db, project_id=project_id, user_id=current_user.id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found or you do not have access.")
 
     try:
-        # 2. Invoke the incremental ingestion graph
-        inputs = {"project_id": project_id, "directory": request.directory}
-        final_state = await incremental_app.ainvoke(inputs)
-        
-        # Extract the final status from the graph's output
-        ingestion_status = final_state.get("vector_ingestion_status", "unknown")
-        
+        # 2. Run the incremental ingestion graph as a job under the project
+        #    lock, so it never overlaps another run, and wait for it to finish
+        job, _ = job_manager.submit(project_id=project_id, user_id=current_user.id, directory=request.directory)
+        job = await job_manager.wait(job.id)
+
         return {
             "message": f"Ingestion pipeline completed for project '{project.name}'.",
-            "status": ingestion_status
+            "status": job.status,
+            "job_id": job.id,
+            "progress": job.progress
         }
 
     except Exception as e:
@@ -74,38 +90,43 @@ async def run_project_ingestion(
 async def ask_question(
     project_id: int,
     request: AskRequest,
-    db: Session = Depends(get_db),
-    current_user: db_models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Receives a question for a specific project, runs it through the RAG pipeline,
     and logs the interaction to the project's history.
     """
     # 1. Verify the project exists and the user has access
-    project = project_crud.get_project(db, project_id=project_id, user_id=current_user.id)
+    project = await project_crud.get_owned_project_async(db, project_id=project_id, user_id=current_user.id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found or you do not have access.")
 
-    if query_app is None:
+    try:
+        query_app = get_query_app()
+    except Exception as e:
+        print(f"Error building the RAG query graph: {e}")
         raise HTTPException(
             status_code=500,
             detail="RAG query graph is not available. Check server logs."
         )
 
     try:
-        # 2. Invoke the graph with the project_id and question
-        inputs = {"project_id": project_id, "question": request.question}
-        final_state = await query_app.ainvoke(inputs)
+        # 2. Invoke the graph with the project_id, question and optional filters
+        inputs = {"project_id": project_id, "question": request.question, "filters": request.filters}
+        with llm_usage_scope(project_id=project_id, user_id=current_user.id):
+            final_state = await query_app.ainvoke(inputs)
         answer = final_state.get("answer", "Could not generate an answer.")
 
-        # 3. Log the history with the project_id
+        # 3. Log the history with the project_id; it is written in the
+        # background, so the answer does not wait for the commit.
         history_data = pydantic_models.QueryHistoryCreate(
             question=request.question,
             answer=answer,
             user_id=current_user.id,
             project_id=project_id
         )
-        history_crud.create_user_query(db=db, query=history_data)
+        await history_writer.put(history_data)
 
         return {"answer": answer}
 
@@ -115,23 +136,188 @@ async def ask_question(
         raise HTTPException(status_code=500, detail=error_detail)
 
 
+# --- Streaming Query Endpoint ---
+@router.post("/ask/stream")
+async def ask_question_stream(
+    project_id: int,
+    request: AskRequest,
+    http_request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Streaming variant of `/ask` using Server-Sent Events.
+
+    Emits a `retrieval` event with the matched sources as soon as retrieval
+    finishes, then one `token` event per streamed chunk, and finally a `done`
+    event with the full answer once it has been queued for the history.
+    If the client disconnects, generation is cancelled and nothing is logged.
+    """
+    project = await project_crud.get_owned_project_async(db, project_id=project_id, user_id=current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found or you do not have access.")
+
+    user_id = current_user.id
+
+    async def event_stream():
+        try:
+            retrieved = await retrieve_node({
+                "project_id": project_id,
+                "question": request.question,
+                "filters": request.filters
+            })
+            yield sse_event("retrieval", {"sources": retrieved["sources"]})
+
+            answer_parts = []
+            with llm_usage_scope(project_id=project_id, user_id=user_id):
+                async with aclosing(stream_answer(request.question, retrieved["context"])) as tokens:
+                    async for token in tokens:
+                        if await http_request.is_disconnected():
+                            print(f"Client disconnected; cancelled streaming answer for project {project_id}.")
+                            return
+                        answer_parts.append(token)
+                        yield sse_event("token", {"text": token})
+            answer = "".join(answer_parts)
+
+            await history_writer.put(pydantic_models.QueryHistoryCreate(
+                question=request.question,
+                answer=answer,
+                user_id=user_id,
+                project_id=project_id
+            ))
+
+            yield sse_event("done", {"answer": answer})
+
+        except Exception as e:
+            error_detail = f"An error occurred during streaming query execution: {e}"
+            print(error_detail)
+            yield sse_event("error", {"detail": error_detail})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
+# --- Batch Query Endpoint ---
+@router.post("/ask/batch")
+async def ask_questions_batch(
+    project_id: int,
+    request: BatchAskRequest,
+    http_request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Answers many questions about one project in a single request.
+
+    All questions are embedded in one model call and retrieved with one
+    multi-query Chroma lookup. Answers are generated concurrently (at most
+    `max_concurrency` at a time) and streamed back as Server-Sent Events in
+    completion order: one `result` or `error` event per question, each tagged
+    with the question's index, followed by a `done` event. The history for
+    all answered questions is queued at the end and written in batches; if
+    the client disconnects, the answers it was already sent are still logged.
+    """
+    project = await project_crud.get_owned_project_async(db, project_id=project_id, user_id=current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found or you do not have access.")
+
+    user_id = current_user.id
+    questions = request.questions
+
+    async def answer_one(index: int, context: str, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            try:
+                with llm_usage_scope(project_id=project_id, user_id=user_id):
+                    state = await generate_node({"question": questions[index], "context": context})
+                return index, state["answer"], None
+            except Exception as e:
+                return index, None, str(e)
+
+    async def event_stream():
+        try:
+            all_results = await asyncio.to_thread(
+                search_relevant_summaries_batch, project_id, questions,
+                top_k=CONTEXT_CANDIDATES, filters=request.filters, include_embeddings=True
+            )
+            packed = [build_context(results) for results in all_results]
+        except Exception as e:
+            error_detail = f"An error occurred during batch retrieval: {e}"
+            print(error_detail)
+            yield sse_event("error", {"detail": error_detail})
+            return
+
+        semaphore = asyncio.Semaphore(request.max_concurrency)
+        tasks = [
+            asyncio.create_task(answer_one(i, context, semaphore))
+            for i, (context, _) in enumerate(packed)
+        ]
+        history = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, answer, error = await next_done
+                if await http_request.is_disconnected():
+                    print(f"Client disconnected; cancelled batch for project {project_id}.")
+                    return
+                if error is not None:
+                    yield sse_event("error", {"index": index, "question": questions[index], "detail": error})
+                    continue
+
+                history.append(pydantic_models.QueryHistoryCreate(
+                    question=questions[index],
+                    answer=answer,
+                    user_id=user_id,
+                    project_id=project_id
+                ))
+                sources = [{"metadata": r["metadata"], "score": r["score"]} for r in packed[index][1]]
+                yield sse_event("result", {
+                    "index": index,
+                    "question": questions[index],
+                    "answer": answer,
+                    "sources": sources
+                })
+            answered = len(history)
+            while history:
+                await history_writer.put(history[0])
+                history.pop(0)
+        finally:
+            # Stop paying for generations nobody will read.
+            for task in tasks:
+                task.cancel()
+            # Answers already streamed to a client that left are still logged.
+            for history_data in history:
+                history_writer.put_nowait(history_data)
+
+        yield sse_event("done", {"answered": answered, "failed": len(questions) - answered})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
 # --- Upload saved summaries to vector DB ---
 @router.post("/upload-summaries", response_model=UploadResponse)
 async def upload_project_summaries(
     project_id: int,
     db: Session = Depends(get_db),
-    current_user: db_models.User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Reads saved summaries for the project from project_data/<id>/summaries_db.json
     and uploads them into the project's vector database index.
     """
     # Verify access
-    project = project_crud.get_project(db, project_id=project_id, user_id=current_user.id)
+    project = project_crud.get_owned_project(db, project_id=project_id, user_id=current_user.id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found or you do not have access.")
 
     try:
+        # Imported here: it loads LangChain, which the API does not need at startup.
+        from backend.vectorstore.ingest import ingest_summaries_to_vector_store
         ingested = ingest_summaries_to_vector_store(project_id)
         return UploadResponse(message=f"Uploaded summaries to vector DB for project '{project.name}'.", ingested=ingested)
     except Exception as e:
@@ -139,3 +325,26 @@ async def upload_project_summaries(
         print(error_detail)
         raise HTTPException(status_code=500, detail=error_detail)
 
+
+# --- Symbol Autocomplete Endpoint ---
+@router.get("/symbols", response_model=List[pydantic_models.SymbolMatch])
+def search_project_symbols(
+    project_id: int,
+    q: str = Query(..., min_length=1, description="Prefix of a symbol name, `Class::method` or qualified path."),
+    limit: int = Query(20, ge=1, le=200),
+    fuzzy: bool = Query(False, description="Top up prefix matches with in-order character matches."),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Looks up symbols in the project's symbol index by prefix (and optionally
+    fuzzy) match. The index is rebuilt by every ingestion run.
+    """
+    project = project_crud.get_owned_project(db, project_id=project_id, user_id=current_user.id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found or you do not have access.")
+
+    index = load_symbol_index(project_id)
+    if index is None:
+        return []
+    return index.search(q, limit=limit, fuzzy=fuzzy)
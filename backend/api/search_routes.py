@@ -0,0 +1,124 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.auth_utils import Principal, get_current_user
+from backend.core.llm_usage import llm_usage_scope
+from backend.db.database import get_async_db
+from backend.crud import project_crud
+from backend import schemas as pydantic_models
+from backend.graph_query import generate_node
+from backend.query.query_engine import (
+    search_across_projects,
+    build_context,
+    CONTEXT_CANDIDATES,
+    CROSS_PROJECT_MAX_CONCURRENCY,
+)
+
+# --- Pydantic Models for Request Bodies ---
+
+class CrossProjectSearchRequest(BaseModel):
+    question: str
+    # Restrict the search to some of the user's projects; all of them by default.
+    project_ids: Optional[List[int]] = None
+    filters: Optional[pydantic_models.SearchFilters] = None
+    top_k: int = Field(10, ge=1, le=100)
+    max_concurrency: int = Field(CROSS_PROJECT_MAX_CONCURRENCY, ge=1, le=16)
+
+# --- API Router for User-Wide Search ---
+router = APIRouter(
+    prefix="/api",
+    tags=["Search"],
+    dependencies=[Depends(get_current_user)]
+)
+
+async def _resolve_projects(db: AsyncSession, user_id: int, project_ids: Optional[List[int]]):
+    """Returns the user's projects, optionally narrowed to the requested IDs."""
+    projects = await project_crud.get_projects_by_user_async(db, user_id=user_id)
+    if project_ids is not None:
+        requested = set(project_ids)
+        projects = [project for project in projects if project.id in requested]
+        if len(projects) != len(requested):
+            raise HTTPException(status_code=404, detail="Project not found or you do not have access.")
+    return projects
+
+async def _search_user_projects(db: AsyncSession, user_id: int, request: CrossProjectSearchRequest, top_k: int, include_embeddings: bool):
+    projects = await _resolve_projects(db, user_id, request.project_ids)
+    names = {project.id: project.name for project in projects}
+    search = await search_across_projects(
+        list(names), request.question, top_k=top_k, filters=request.filters,
+        include_embeddings=include_embeddings, max_concurrency=request.max_concurrency
+    )
+    for result in search["results"]:
+        result["project_name"] = names[result["project_id"]]
+    return search
+
+def _source(result):
+    return {
+        "project_id": result["project_id"],
+        "project_name": result["project_name"],
+        "metadata": result["metadata"],
+        "score": result["score"],
+    }
+
+# --- Cross-Project Search Endpoint ---
+@router.post("/search")
+async def search_all_projects(
+    request: CrossProjectSearchRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Searches all of the user's projects (or the listed ones) for summaries
+    relevant to the question. Results are merged by distance and tagged with
+    their project. Projects that miss the search deadline are reported in
+    `timed_out` instead of holding up the response.
+    """
+    try:
+        search = await _search_user_projects(db, current_user.id, request, request.top_k, include_embeddings=False)
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_detail = f"An error occurred during cross-project search: {e}"
+        print(error_detail)
+        raise HTTPException(status_code=500, detail=error_detail)
+
+    return {
+        "results": [{**_source(r), "text": r["text"]} for r in search["results"]],
+        "timed_out": search["timed_out"],
+        "failed": search["failed"],
+    }
+
+# --- Cross-Project Query Endpoint ---
+@router.post("/ask")
+async def ask_all_projects(
+    request: CrossProjectSearchRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Answers a question using context retrieved from all of the user's
+    projects (or the listed ones). The answer is not written to the query
+    history, since history entries belong to a single project; its LLM usage
+    is recorded against the user only, for the same reason.
+    """
+    try:
+        search = await _search_user_projects(db, current_user.id, request, CONTEXT_CANDIDATES, include_embeddings=True)
+        context, packed = build_context(search["results"])
+        with llm_usage_scope(user_id=current_user.id):
+            state = await generate_node({"question": request.question, "context": context})
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_detail = f"An error occurred during cross-project query execution: {e}"
+        print(error_detail)
+        raise HTTPException(status_code=500, detail=error_detail)
+
+    return {
+        "answer": state.get("answer", "Could not generate an answer."),
+        "sources": [_source(r) for r in packed],
+        "timed_out": search["timed_out"],
+        "failed": search["failed"],
+    }
@@ -0,0 +1,10 @@
+import json
+from typing import Any
+
+# --- Server-Sent Events Helpers ---
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def sse_event(event: str, data: Any) -> str:
+    """Formats a single Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -1,17 +1,17 @@
 import os
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import NamedTuple, Optional
 
 from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
 from backend.db import db_models
 from backend.db.database import get_db
+from backend.core.cache import TTLLookupCache
 
-from passlib.context import CryptContext
 from backend.db import crud 
 
 load_dotenv()
@@ -26,23 +26,54 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# Resolved tokens are cached so authenticated requests skip the users query.
+# Entries are dropped when an admin deletes a user or changes their role;
+# other workers pick such changes up within the TTL.
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAXSIZE = int(os.getenv("PRINCIPAL_CACHE_MAXSIZE", "10000"))
+
 # --- JWT Token Handling ---
+# python-jose (and the cryptography backend it loads) is imported on first
+# use, so the API starts without it.
+
 def create_access_token(data: dict):
+    from jose import jwt
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str, credentials_exception) -> Optional[str]:
+def _decode_token(token: str, credentials_exception) -> dict:
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        return username
     except JWTError:
         raise credentials_exception
+    if payload.get("sub") is None:
+        raise credentials_exception
+    return payload
+
+def verify_token(token: str, credentials_exception) -> Optional[str]:
+    return _decode_token(token, credentials_exception)["sub"]
+
+# --- Principal Cache ---
+
+class Principal(NamedTuple):
+    """
+    The authenticated user as seen by the routes: enough to authorize a
+    request without holding a database row.
+    """
+    id: int
+    username: str
+    role: str
+
+# token -> (Principal, token expiry as a unix timestamp)
+principal_cache = TTLLookupCache(maxsize=PRINCIPAL_CACHE_MAXSIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS, name="principals")
+
+def invalidate_user_principals(user_id: int) -> int:
+    """Forgets every cached token of a user, e.g. after a delete or role change."""
+    return principal_cache.invalidate(lambda token, entry: entry[0].id == user_id)
 
 # --- FastAPI Dependency ---
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
@@ -51,24 +82,41 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    username = verify_token(token, credentials_exception)
-    user = db.query(db_models.User).filter(db_models.User.username == username).first()
+    cached = principal_cache.get(token)
+    if cached is not None:
+        principal, expires_at = cached
+        # The cache may outlive the token itself.
+        if expires_at is None or expires_at > time.time():
+            return principal
+        raise credentials_exception
+
+    payload = _decode_token(token, credentials_exception)
+    user = db.query(db_models.User).filter(db_models.User.username == payload["sub"]).first()
     if user is None:
         raise credentials_exception
-    return user
+    principal = Principal(id=user.id, username=user.username, role=user.role)
+    principal_cache.set(token, (principal, payload.get("exp")))
+    return principal
 
 
 # --- Password Hashing ---
-# Create a context for hashing passwords
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# The passlib context is created on first use, like the JWT library above.
+_pwd_context = None
+
+def get_pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
 
 def verify_password(plain_password, hashed_password):
     """Verifies a plain password against a hashed one."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     """Hashes a plain password."""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 # --- User Authentication ---
@@ -89,7 +137,7 @@ def authenticate_user(db: Session, username: str, password: str):
         
     return user
 
-def get_current_admin_user(current_user: db_models.User = Depends(get_current_user)):
+def get_current_admin_user(current_user: Principal = Depends(get_current_user)):
     """
     A dependency that checks if the current user is an admin.
     If not, it raises a 403 Forbidden error.
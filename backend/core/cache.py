@@ -0,0 +1,55 @@
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+from cachetools import TTLCache
+
+from backend.core import metrics
+
+_MISSING = object()
+
+
+class TTLLookupCache:
+    """
+    A bounded, thread-safe TTL cache for hot-path lookups (e.g. token to
+    principal). Sync dependencies run in FastAPI's thread pool, so every
+    access is locked. Writes that change a cached fact call `invalidate`
+    with a predicate to drop the affected entries; the TTL bounds how long
+    other workers can serve a stale entry. A `ttl` or `maxsize` of 0
+    disables caching. Hits and misses are counted on /metrics under `name`.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: str = "lookup"):
+        self.name = name
+        self.enabled = maxsize > 0 and ttl > 0
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl) if self.enabled else {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            value = self._cache.get(key, _MISSING)
+        metrics.record_cache_lookup(self.name, value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._cache[key] = value
+
+    def invalidate(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Drops every entry for which `predicate(key, value)` is true."""
+        with self._lock:
+            if self.enabled:
+                self._cache.expire()
+            stale = [key for key, value in list(self._cache.items()) if predicate(key, value)]
+            for key in stale:
+                self._cache.pop(key, None)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._cache)
@@ -0,0 +1,92 @@
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from backend.core import metrics
+from backend.core.llm_usage import current_usage_scope, estimate_cost
+from backend.schemas import LLMUsageCreate
+
+
+def token_usage(response: LLMResult) -> Tuple[int, int]:
+    """Returns the (input, output) tokens reported for an LLM response; 0 when unknown."""
+    input_tokens = output_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            input_tokens += usage.get("input_tokens", 0)
+            output_tokens += usage.get("output_tokens", 0)
+    return input_tokens, output_tokens
+
+
+def _record_usage(record):
+    # Imported here: the writer pulls in the database layer.
+    from backend.jobs.batch_writer import usage_writer
+    usage_writer.put_nowait(record)
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """
+    A LangChain callback handler, attached to an LLM client, that reports
+    the latency, outcome and token usage of every call the client makes,
+    both as metrics and as an `llm_usage` row attributed to the current
+    `llm_usage_scope`. `purpose` (e.g. "answer", "summary") labels both.
+    """
+
+    # Cheap and thread-safe, so LangChain may call it on the event loop.
+    run_inline = True
+
+    def __init__(self, purpose: str, model: str = "unknown"):
+        self.purpose = purpose
+        self.model = model
+        # run_id -> (perf_counter at start, wall-clock start, usage scope)
+        self._started: Dict[UUID, Tuple[float, datetime, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID):
+        with self._lock:
+            self._started[run_id] = (time.perf_counter(), datetime.now(timezone.utc), current_usage_scope())
+        metrics.LLM_CALLS_IN_FLIGHT.labels(self.purpose).inc()
+
+    def _finish(self, run_id: UUID, status: str, input_tokens: int = 0, output_tokens: int = 0):
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        started_perf, started_at, scope = started
+        latency = time.perf_counter() - started_perf
+        metrics.LLM_CALLS_IN_FLIGHT.labels(self.purpose).dec()
+        metrics.LLM_CALL_DURATION.labels(self.purpose, status).observe(latency)
+        if input_tokens:
+            metrics.LLM_TOKENS.labels(self.purpose, "input").inc(input_tokens)
+        if output_tokens:
+            metrics.LLM_TOKENS.labels(self.purpose, "output").inc(output_tokens)
+
+        _record_usage(LLMUsageCreate(
+            timestamp=started_at.replace(tzinfo=None),  # naive UTC, like the database's CURRENT_TIMESTAMP
+            purpose=self.purpose,
+            model=self.model,
+            status=status,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            latency_seconds=latency,
+            cost_usd=estimate_cost(self.model, input_tokens, output_tokens),
+            **scope,
+        ))
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts, *, run_id: UUID, **kwargs: Any):
+        self._start(run_id)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        input_tokens, output_tokens = token_usage(response)
+        self._finish(run_id, "ok", input_tokens, output_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, "error")
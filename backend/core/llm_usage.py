@@ -0,0 +1,42 @@
+import json
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+# --- Configuration ---
+# USD per million (input, output) tokens, used to estimate what each call
+# cost. Override or extend with LLM_PRICES='{"model-name": [input, output]}'.
+DEFAULT_LLM_PRICES = {
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-2.0-flash": (0.10, 0.40),
+}
+LLM_PRICES = {**DEFAULT_LLM_PRICES, **json.loads(os.getenv("LLM_PRICES", "{}"))}
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Estimated USD cost of a call; 0 for models without a price."""
+    input_price, output_price = LLM_PRICES.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+# --- Usage Attribution ---
+# The LLM clients are shared, so the project, user and job a call is made
+# for come from the context of the request or job that makes it. Tasks and
+# threads started inside the scope inherit it.
+
+_usage_scope: ContextVar[Dict[str, Any]] = ContextVar("llm_usage_scope", default={})
+
+
+@contextmanager
+def llm_usage_scope(project_id: Optional[int] = None, user_id: Optional[int] = None, job_id: Optional[str] = None):
+    """Attributes the LLM calls made inside the block to a project, user and (ingestion) job."""
+    token = _usage_scope.set({"project_id": project_id, "user_id": user_id, "job_id": job_id})
+    try:
+        yield
+    finally:
+        _usage_scope.reset(token)
+
+
+def current_usage_scope() -> Dict[str, Any]:
+    """The project_id, user_id and job_id the current LLM calls are attributed to."""
+    return _usage_scope.get()
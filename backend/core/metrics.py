@@ -0,0 +1,162 @@
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+# --- Configuration ---
+# Projects that get their own label value; later ones are reported as "other",
+# so the number of time series stays bounded however many projects exist.
+METRICS_MAX_PROJECTS = int(os.getenv("METRICS_MAX_PROJECTS", "50"))
+# With several worker processes, set this to a shared, empty directory so
+# /metrics reports the totals of all workers (prometheus_client multiprocess mode).
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+OTHER_PROJECTS_LABEL = "other"
+
+# Seconds; from cache hits up to slow LLM calls and full ingestions
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+# --- Metric Definitions ---
+
+NODE_DURATION = Histogram(
+    "codehelp_graph_node_duration_seconds", "Time spent in one LangGraph node run.",
+    ["graph", "node", "project", "status"], buckets=LATENCY_BUCKETS,
+)
+NODES_IN_FLIGHT = Gauge(
+    "codehelp_graph_nodes_in_flight", "LangGraph node runs in progress.",
+    ["graph", "node"], multiprocess_mode="livesum",
+)
+LLM_CALL_DURATION = Histogram(
+    "codehelp_llm_call_duration_seconds", "Latency of LLM calls, from request to last token.",
+    ["purpose", "status"], buckets=LATENCY_BUCKETS,
+)
+LLM_CALLS_IN_FLIGHT = Gauge(
+    "codehelp_llm_calls_in_flight", "LLM calls in progress.",
+    ["purpose"], multiprocess_mode="livesum",
+)
+LLM_TOKENS = Counter(
+    "codehelp_llm_tokens_total", "Tokens sent to (input) and generated by (output) the LLM.",
+    ["purpose", "kind"],
+)
+EMBEDDING_DURATION = Histogram(
+    "codehelp_embedding_duration_seconds", "Latency of one embedding model call.",
+    ["operation"], buckets=LATENCY_BUCKETS,
+)
+EMBEDDED_TEXTS = Counter(
+    "codehelp_embedded_texts_total", "Texts embedded by the embedding model.", ["operation"],
+)
+VECTOR_QUERY_DURATION = Histogram(
+    "codehelp_vector_query_duration_seconds", "Latency of one vector store lookup.",
+    ["backend", "project"], buckets=LATENCY_BUCKETS,
+)
+DB_COMMIT_DURATION = Histogram(
+    "codehelp_db_commit_duration_seconds", "Time from the start of a session commit (including its flush) to its end.",
+    buckets=LATENCY_BUCKETS,
+)
+FILES_PARSED = Counter(
+    "codehelp_files_parsed_total", "Source files parsed and hashed by ingestion.", ["project"],
+)
+CHANGES_DETECTED = Counter(
+    "codehelp_changes_detected_total", "Added, modified and removed items found by ingestion.",
+    ["project", "change_type"],
+)
+CACHE_LOOKUPS = Counter(
+    "codehelp_cache_lookups_total", "In-process cache lookups.", ["cache", "result"],
+)
+
+# --- Bounded Project Labels ---
+
+_project_labels: Dict[Any, str] = {}
+_project_labels_lock = threading.Lock()
+
+def project_label(project_id: Any) -> str:
+    """
+    The label value for a project: its ID for the first METRICS_MAX_PROJECTS
+    projects seen by this process, "other" after that.
+    """
+    if project_id is None:
+        return "none"
+    with _project_labels_lock:
+        label = _project_labels.get(project_id)
+        if label is None:
+            label = str(project_id) if len(_project_labels) < METRICS_MAX_PROJECTS else OTHER_PROJECTS_LABEL
+            if label != OTHER_PROJECTS_LABEL:
+                _project_labels[project_id] = label
+        return label
+
+# --- Instrumentation Helpers ---
+
+def instrument_node(graph: str, node: str) -> Callable:
+    """
+    Decorates an async LangGraph node so each run is timed (labelled with the
+    state's project) and counted as in flight while it runs.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(state, *args, **kwargs):
+            project = project_label(state.get("project_id")) if isinstance(state, dict) else "none"
+            status = "error"
+            started = time.perf_counter()
+            with NODES_IN_FLIGHT.labels(graph, node).track_inprogress():
+                try:
+                    result = await func(state, *args, **kwargs)
+                    status = "ok"
+                    return result
+                finally:
+                    NODE_DURATION.labels(graph, node, project, status).observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+@contextmanager
+def time_embedding(operation: str, text_count: int):
+    """Times one embedding model call over `text_count` texts."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        EMBEDDING_DURATION.labels(operation).observe(time.perf_counter() - started)
+        EMBEDDED_TEXTS.labels(operation).inc(text_count)
+
+@contextmanager
+def time_vector_query(backend: str, project_id: Any):
+    """Times one lookup against a project's vector store."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        VECTOR_QUERY_DURATION.labels(backend, project_label(project_id)).observe(time.perf_counter() - started)
+
+def record_ingestion_changes(project_id: Any, files_parsed: int, changes) -> None:
+    """Counts the files parsed and the changes found by one ingestion step."""
+    project = project_label(project_id)
+    if files_parsed:
+        FILES_PARSED.labels(project).inc(files_parsed)
+    for change in changes:
+        CHANGES_DETECTED.labels(project, change.change_type).inc()
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+# --- Exposition ---
+
+def render_metrics() -> tuple:
+    """Returns (body, content_type) for the /metrics endpoint in Prometheus text format."""
+    registry = REGISTRY
+    if PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
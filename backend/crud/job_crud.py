@@ -0,0 +1,216 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from backend.db import db_models
+from backend.db.db_models import JobStatus
+
+ACTIVE_STATUSES = (JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+
+# --- Ingestion Job CRUD Functions ---
+
+def create_ingestion_job(
+    db: Session,
+    project_id: int,
+    user_id: int,
+    directory: str,
+    changed_paths: Optional[List[str]] = None,
+    archive_path: Optional[str] = None
+):
+    """Create a new queued ingestion job for a project."""
+    db_job = db_models.IngestionJob(
+        id=uuid.uuid4().hex,
+        project_id=project_id,
+        user_id=user_id,
+        directory=directory,
+        changed_paths=changed_paths,
+        archive_path=archive_path,
+        status=JobStatus.QUEUED.value,
+        progress={},
+    )
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+def get_ingestion_job(db: Session, job_id: str, user_id: Optional[int] = None):
+    """Retrieve a job by its ID, optionally ensuring it belongs to the user."""
+    query = db.query(db_models.IngestionJob).filter(db_models.IngestionJob.id == job_id)
+    if user_id is not None:
+        query = query.filter(db_models.IngestionJob.user_id == user_id)
+    return query.first()
+
+def get_ingestion_jobs(db: Session, user_id: int, project_id: Optional[int] = None, limit: int = 20) -> List[db_models.IngestionJob]:
+    """Retrieve a user's most recent jobs, optionally for a single project."""
+    query = db.query(db_models.IngestionJob).filter(db_models.IngestionJob.user_id == user_id)
+    if project_id is not None:
+        query = query.filter(db_models.IngestionJob.project_id == project_id)
+    return query.order_by(db_models.IngestionJob.created_at.desc()).limit(limit).all()
+
+def update_ingestion_job(db: Session, job_id: str, **fields: Any):
+    """
+    Update the given columns of a job. `started_at=True` / `finished_at=True`
+    stamp the current database time.
+    """
+    db_job = get_ingestion_job(db, job_id)
+    if not db_job:
+        return None
+    for key in ("started_at", "finished_at"):
+        if fields.get(key) is True:
+            fields[key] = func.now()
+    for key, value in fields.items():
+        setattr(db_job, key, value)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+def request_job_cancellation(db: Session, job_id: str, user_id: int):
+    """Flag an active job for cancellation. Returns the job, or None if not found."""
+    db_job = get_ingestion_job(db, job_id, user_id=user_id)
+    if db_job and db_job.status in ACTIVE_STATUSES:
+        db_job.cancel_requested = True
+        db.commit()
+        db.refresh(db_job)
+    return db_job
+
+def create_or_attach_ingestion_job(
+    db: Session,
+    project_id: int,
+    user_id: int,
+    directory: str,
+    changed_paths: Optional[List[str]] = None,
+    archive_path: Optional[str] = None
+) -> Tuple[db_models.IngestionJob, bool]:
+    """
+    Queue an ingestion job for a project, or attach to the one already
+    queued (pointing it at the latest directory or archive). Returns
+    (job, created). Changed paths of attached requests are merged; if either
+    side asks for a full scan, or an archive is involved, the queued job
+    does a full scan.
+    """
+    try:
+        job = create_ingestion_job(
+            db, project_id=project_id, user_id=user_id, directory=directory,
+            changed_paths=changed_paths, archive_path=archive_path
+        )
+        return job, True
+    except IntegrityError:
+        db.rollback()
+
+    db_job = get_queued_job(db, project_id)
+    if db_job is None:
+        # The queued job started running in between; queue a new one.
+        return create_or_attach_ingestion_job(db, project_id, user_id, directory, changed_paths, archive_path)
+    if (db_job.directory != directory or db_job.changed_paths is None or changed_paths is None
+            or db_job.archive_path or archive_path):
+        db_job.changed_paths = None
+    else:
+        db_job.changed_paths = sorted(set(db_job.changed_paths) | set(changed_paths))
+    db_job.directory = directory
+    db_job.archive_path = archive_path
+    db.commit()
+    db.refresh(db_job)
+    return db_job, False
+
+def get_queued_job(db: Session, project_id: int) -> Optional[db_models.IngestionJob]:
+    """Retrieve the project's queued job, if any."""
+    return db.query(db_models.IngestionJob).filter(
+        db_models.IngestionJob.project_id == project_id,
+        db_models.IngestionJob.status == JobStatus.QUEUED.value
+    ).first()
+
+def is_archive_in_use(db: Session, archive_path: str) -> bool:
+    """True while a queued or running job still reads the given archive."""
+    return db.query(db_models.IngestionJob).filter(
+        db_models.IngestionJob.archive_path == archive_path,
+        db_models.IngestionJob.status.in_(ACTIVE_STATUSES)
+    ).first() is not None
+
+def claim_queued_job(db: Session, job_id: str) -> bool:
+    """Atomically move a job from queued to running. False if it was not queued."""
+    count = db.query(db_models.IngestionJob)\
+              .filter(db_models.IngestionJob.id == job_id,
+                      db_models.IngestionJob.status == JobStatus.QUEUED.value,
+                      db_models.IngestionJob.cancel_requested.is_(False))\
+              .update({"status": JobStatus.RUNNING.value, "started_at": func.now()},
+                      synchronize_session=False)
+    db.commit()
+    return count == 1
+
+def get_queued_jobs(db: Session) -> List[db_models.IngestionJob]:
+    """Retrieve every queued job, oldest first."""
+    return db.query(db_models.IngestionJob)\
+             .filter(db_models.IngestionJob.status == JobStatus.QUEUED.value)\
+             .order_by(db_models.IngestionJob.created_at)\
+             .all()
+
+def fail_orphaned_jobs(db: Session, lock_ttl_seconds: float, error: str) -> int:
+    """
+    Mark running jobs as failed when no live process holds their project lock
+    (the lock is gone, belongs to another job, or its heartbeat is stale).
+    """
+    stale_before = _utcnow() - timedelta(seconds=lock_ttl_seconds)
+    count = 0
+    running = db.query(db_models.IngestionJob).filter(db_models.IngestionJob.status == JobStatus.RUNNING.value).all()
+    for db_job in running:
+        lock = db.get(db_models.IngestionLock, db_job.project_id)
+        if lock is None or lock.job_id != db_job.id or lock.heartbeat_at < stale_before:
+            db_job.status = JobStatus.FAILED.value
+            db_job.error = error
+            db_job.finished_at = func.now()
+            count += 1
+    db.commit()
+    return count
+
+# --- Project Ingestion Lock Functions ---
+
+def _utcnow() -> datetime:
+    """Naive UTC timestamp, as stored in the ingestion_locks table."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def try_acquire_project_lock(db: Session, project_id: int, job_id: str, owner: str, ttl_seconds: float) -> bool:
+    """
+    Try to take the ingestion lock of a project for a job. Succeeds when the
+    lock is free or its holder stopped heart-beating more than `ttl_seconds` ago.
+    """
+    now = _utcnow()
+    try:
+        db.execute(insert(db_models.IngestionLock).values(
+            project_id=project_id, job_id=job_id, owner=owner, acquired_at=now, heartbeat_at=now
+        ))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+
+    count = db.query(db_models.IngestionLock)\
+              .filter(db_models.IngestionLock.project_id == project_id,
+                      db_models.IngestionLock.heartbeat_at < now - timedelta(seconds=ttl_seconds))\
+              .update({"job_id": job_id, "owner": owner, "acquired_at": now, "heartbeat_at": now},
+                      synchronize_session=False)
+    db.commit()
+    if count:
+        print(f"Took over stale ingestion lock for project {project_id}.")
+    return count == 1
+
+def refresh_project_lock(db: Session, project_id: int, job_id: str) -> bool:
+    """Refresh the heartbeat of a held lock. False if the job no longer holds it."""
+    count = db.query(db_models.IngestionLock)\
+              .filter(db_models.IngestionLock.project_id == project_id,
+                      db_models.IngestionLock.job_id == job_id)\
+              .update({"heartbeat_at": _utcnow()}, synchronize_session=False)
+    db.commit()
+    return count == 1
+
+def release_project_lock(db: Session, project_id: int, job_id: str):
+    """Release a project's ingestion lock if the job still holds it."""
+    db.query(db_models.IngestionLock)\
+      .filter(db_models.IngestionLock.project_id == project_id,
+              db_models.IngestionLock.job_id == job_id)\
+      .delete(synchronize_session=False)
+    db.commit()
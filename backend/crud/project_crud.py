@@ -1,7 +1,18 @@
+import os
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from backend.db import db_models
+from backend.core.cache import TTLLookupCache
 import backend.schemas as pydantic_models
 
+# Ownership checks run on every project-scoped request; positive answers are
+# cached and dropped whenever a project is updated or deleted.
+PROJECT_CACHE_TTL_SECONDS = float(os.getenv("PROJECT_CACHE_TTL_SECONDS", "60"))
+PROJECT_CACHE_MAXSIZE = int(os.getenv("PROJECT_CACHE_MAXSIZE", "10000"))
+
 # --- Project CRUD Functions ---
 
 def get_project_by_name(db: Session, name: str, user_id: int):
@@ -50,6 +61,7 @@ def update_project(db: Session, project_id: int, project_update: pydantic_models
         db_project.description = project_update.description
         db.commit()
         db.refresh(db_project)
+        invalidate_project_cache(project_id=project_id)
     return db_project
 
 def delete_project(db: Session, project_id: int, user_id: int):
@@ -58,6 +70,74 @@ def delete_project(db: Session, project_id: int, user_id: int):
     if db_project:
         db.delete(db_project)
         db.commit()
+        invalidate_project_cache(project_id=project_id)
         return db_project
     return None
 
+# --- Cached Ownership Checks ---
+
+class ProjectRef(NamedTuple):
+    """The columns of a project that routes need once ownership is checked."""
+    id: int
+    name: str
+    description: Optional[str]
+    user_id: int
+
+# (project_id, user_id) -> ProjectRef; misses are not cached, so new projects show up at once
+project_cache = TTLLookupCache(maxsize=PROJECT_CACHE_MAXSIZE, ttl=PROJECT_CACHE_TTL_SECONDS, name="projects")
+
+def _to_ref(db_project) -> Optional[ProjectRef]:
+    if db_project is None:
+        return None
+    ref = ProjectRef(db_project.id, db_project.name, db_project.description, db_project.user_id)
+    project_cache.set((ref.id, ref.user_id), ref)
+    return ref
+
+def get_owned_project(db: Session, project_id: int, user_id: int) -> Optional[ProjectRef]:
+    """Like `get_project`, but served from the cache when possible."""
+    cached = project_cache.get((project_id, user_id))
+    return cached if cached is not None else _to_ref(get_project(db, project_id, user_id))
+
+def invalidate_project_cache(project_id: Optional[int] = None, user_id: Optional[int] = None) -> int:
+    """Drops cached ownership for a project, or for all of a user's projects."""
+    return project_cache.invalidate(lambda key, ref: ref.id == project_id or ref.user_id == user_id)
+
+# --- Async Variants ---
+
+async def get_project_async(db: AsyncSession, project_id: int, user_id: int):
+    """Retrieve a single project by its ID, ensuring it belongs to the user."""
+    result = await db.execute(select(db_models.Project).filter(
+        db_models.Project.id == project_id,
+        db_models.Project.user_id == user_id
+    ))
+    return result.scalars().first()
+
+async def get_project_by_name_async(db: AsyncSession, name: str, user_id: int):
+    """Retrieve a single project by its name for a specific user."""
+    result = await db.execute(select(db_models.Project).filter(
+        db_models.Project.name == name,
+        db_models.Project.user_id == user_id
+    ))
+    return result.scalars().first()
+
+async def get_projects_by_user_async(db: AsyncSession, user_id: int):
+    """Retrieve all projects owned by a specific user."""
+    result = await db.execute(select(db_models.Project).filter(db_models.Project.user_id == user_id))
+    return result.scalars().all()
+
+async def create_user_project_async(db: AsyncSession, project_data: dict, user_id: int):
+    """Create a new project for a user from a dictionary."""
+    db_project = db_models.Project(
+        name=project_data['name'],
+        description=project_data.get('description'),
+        user_id=user_id
+    )
+    db.add(db_project)
+    await db.commit()
+    await db.refresh(db_project)
+    return db_project
+
+async def get_owned_project_async(db: AsyncSession, project_id: int, user_id: int) -> Optional[ProjectRef]:
+    """Like `get_project_async`, but served from the cache when possible."""
+    cached = project_cache.get((project_id, user_id))
+    return cached if cached is not None else _to_ref(await get_project_async(db, project_id, user_id))
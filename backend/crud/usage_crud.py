@@ -0,0 +1,91 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from backend.db import db_models
+import backend.schemas as pydantic_models
+
+# --- LLM Usage CRUD Functions ---
+
+def create_llm_usage(db: Session, records: List[pydantic_models.LLMUsageCreate]):
+    """Store several LLM usage records in a single transaction."""
+    db_records = [db_models.LLMUsage(**record.model_dump()) for record in records]
+    db.add_all(db_records)
+    db.commit()
+    return db_records
+
+# --- Usage Reports ---
+# Every report is one GROUP BY over llm_usage, so the totals are computed
+# by the database rather than by loading the calls.
+
+def _totals_columns():
+    usage = db_models.LLMUsage
+    return (
+        func.count(usage.id).label("calls"),
+        func.coalesce(func.sum(case((usage.status != "ok", 1), else_=0)), 0).label("failed_calls"),
+        func.coalesce(func.sum(usage.input_tokens), 0).label("input_tokens"),
+        func.coalesce(func.sum(usage.output_tokens), 0).label("output_tokens"),
+        func.coalesce(func.sum(usage.cost_usd), 0.0).label("cost_usd"),
+        func.coalesce(func.avg(usage.latency_seconds), 0.0).label("avg_latency_seconds"),
+        func.min(usage.timestamp).label("first_call_at"),
+        func.max(usage.timestamp).label("last_call_at"),
+    )
+
+def _filtered(query, project_id: Optional[int] = None, job_id: Optional[str] = None,
+              since: Optional[datetime] = None, until: Optional[datetime] = None):
+    usage = db_models.LLMUsage
+    if project_id is not None:
+        query = query.filter(usage.project_id == project_id)
+    if job_id is not None:
+        query = query.filter(usage.job_id == job_id)
+    if since is not None:
+        query = query.filter(usage.timestamp >= since)
+    if until is not None:
+        query = query.filter(usage.timestamp < until)
+    return query
+
+def get_usage_totals(db: Session, **filters: Any) -> Dict[str, Any]:
+    """Totals over the calls matching `filters` (project_id, job_id, since, until)."""
+    return _filtered(db.query(*_totals_columns()), **filters).one()._asdict()
+
+def get_usage_by_project(db: Session, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                         limit: int = 100) -> List[Dict[str, Any]]:
+    """Per-project totals, most expensive first."""
+    usage = db_models.LLMUsage
+    query = (
+        db.query(usage.project_id, db_models.Project.name.label("project_name"), *_totals_columns())
+        .outerjoin(db_models.Project, db_models.Project.id == usage.project_id)
+    )
+    query = _filtered(query, since=since, until=until).group_by(usage.project_id, db_models.Project.name)
+    order = (func.sum(usage.cost_usd).desc(), func.sum(usage.input_tokens + usage.output_tokens).desc())
+    rows = query.order_by(*order).limit(limit).all()
+    return [row._asdict() for row in rows]
+
+def get_usage_by_purpose(db: Session, **filters: Any) -> List[Dict[str, Any]]:
+    """Totals per purpose and model for the calls matching `filters`."""
+    usage = db_models.LLMUsage
+    query = _filtered(db.query(usage.purpose, usage.model, *_totals_columns()), **filters)
+    rows = query.group_by(usage.purpose, usage.model).order_by(usage.purpose, usage.model).all()
+    return [row._asdict() for row in rows]
+
+def get_usage_by_user(db: Session, **filters: Any) -> List[Dict[str, Any]]:
+    """Totals per user for the calls matching `filters`."""
+    usage = db_models.LLMUsage
+    query = _filtered(db.query(usage.user_id, *_totals_columns()), **filters)
+    rows = query.group_by(usage.user_id).order_by(usage.user_id).all()
+    return [row._asdict() for row in rows]
+
+def get_usage_by_run(db: Session, limit: int = 20, **filters: Any) -> List[Dict[str, Any]]:
+    """Totals per ingestion run (job_id None groups the interactive queries), latest first."""
+    usage = db_models.LLMUsage
+    query = _filtered(db.query(usage.job_id, *_totals_columns()), **filters)
+    rows = query.group_by(usage.job_id).order_by(func.max(usage.timestamp).desc()).limit(limit).all()
+    return [row._asdict() for row in rows]
+
+def get_run_attribution(db: Session, job_id: str) -> Optional[Dict[str, Any]]:
+    """The project and user a run's calls were recorded against, or None without calls."""
+    usage = db_models.LLMUsage
+    row = db.query(usage.project_id, usage.user_id).filter(usage.job_id == job_id).first()
+    return row._asdict() if row else None
@@ -1,3 +1,9 @@
+import base64
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import String, cast, func, or_, select, text, tuple_, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 # Import your SQLAlchemy models (the file you wrote)
 from backend.db import db_models 
@@ -38,6 +44,15 @@ def delete_user(db: Session, user_id: int):
         db.commit()
     return db_user
 
+def update_user_role(db: Session, user_id: int, role: str):
+    """Change a user's role. Returns the user, or None if not found."""
+    db_user = db.query(db_models.User).filter(db_models.User.id == user_id).first()
+    if db_user:
+        db_user.role = role
+        db.commit()
+        db.refresh(db_user)
+    return db_user
+
 # --- QueryHistory CRUD Functions ---
 
 def get_user_queries(db: Session, user_id: int, skip: int = 0, limit: int = 100):
@@ -66,4 +81,172 @@ def create_user_query(db: Session, query: pydantic_models.QueryHistoryCreate):
     db.add(db_query)
     db.commit()
     db.refresh(db_query)
-    return db_query
\ No newline at end of file
+    return db_query
+
+def create_user_queries(db: Session, queries: List[pydantic_models.QueryHistoryCreate]):
+    """
+    Create and store several QueryHistory records in a single transaction.
+    """
+    db_queries = [
+        db_models.QueryHistory(
+            question=query.question,
+            answer=query.answer,
+            user_id=query.user_id,
+            project_id=query.project_id
+        )
+        for query in queries
+    ]
+    db.add_all(db_queries)
+    db.commit()
+    return db_queries
+
+def get_recently_queried_project_ids(db: Session, limit: int = 5) -> List[int]:
+    """Returns the IDs of the projects queried most recently, by any user."""
+    last_queried = func.max(db_models.QueryHistory.timestamp)
+    rows = db.query(db_models.QueryHistory.project_id, last_queried)\
+             .group_by(db_models.QueryHistory.project_id)\
+             .order_by(last_queried.desc())\
+             .limit(limit)\
+             .all()
+    return [project_id for project_id, _ in rows]
+
+# --- Keyset Pagination for QueryHistory ---
+# A page starts right after the last row of the previous one, so the database
+# seeks straight to it through the (owner, timestamp, id) indexes instead of
+# counting past `offset` rows; every page costs the same however deep it is.
+
+def encode_history_cursor(raw_timestamp: str, entry_id: int) -> str:
+    """Encodes the position of a history row as an opaque cursor."""
+    return base64.urlsafe_b64encode(f"{raw_timestamp}|{entry_id}".encode("utf-8")).decode("ascii")
+
+def decode_history_cursor(cursor: str) -> Tuple[str, int]:
+    """Returns (raw_timestamp, id) for a cursor; raises ValueError if it is malformed."""
+    try:
+        raw_timestamp, _, entry_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").rpartition("|")
+        return raw_timestamp, int(entry_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def get_history_page(db: Session, user_id: int, project_id: Optional[int] = None, limit: int = 50, cursor: Optional[str] = None):
+    """
+    Retrieve one page of a user's query history, newest first, optionally for
+    a single project. Returns (entries, next_cursor); next_cursor is None on
+    the last page.
+    """
+    history = db_models.QueryHistory
+    # The cursor keeps the timestamp exactly as stored, so comparing it
+    # does not depend on how the driver would format a datetime.
+    raw_timestamp = cast(history.timestamp, String)
+    query = db.query(history, raw_timestamp).filter(history.user_id == user_id)
+    if project_id is not None:
+        query = query.filter(history.project_id == project_id)
+    if cursor:
+        after_timestamp, after_id = decode_history_cursor(cursor)
+        query = query.filter(tuple_(type_coerce(history.timestamp, String), history.id) < (after_timestamp, after_id))
+    rows = query.order_by(history.timestamp.desc(), history.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_entry, last_timestamp = rows[-1]
+        next_cursor = encode_history_cursor(last_timestamp, last_entry.id)
+    return [entry for entry, _ in rows], next_cursor
+
+# --- Full-Text Search over QueryHistory ---
+
+def _to_match_query(search: str) -> str:
+    """
+    Turns free text into an FTS5 query that matches rows containing every
+    word. Words are quoted, so FTS5 operators in user input are taken literally.
+    """
+    return " ".join('"' + word.replace('"', '""') + '"' for word in re.findall(r"\w+", search))
+
+def search_history(db: Session, user_id: int, search: str, project_id: Optional[int] = None, limit: int = 20):
+    """
+    Searches the question and answer text of a user's history, optionally for
+    a single project. Returns (entry, score, snippet) tuples, best match first;
+    a higher score is a better match.
+    """
+    match_query = _to_match_query(search)
+    if not match_query:
+        return []
+    if db.get_bind().dialect.name != "sqlite":
+        return _search_history_by_scan(db, user_id, search, project_id, limit)
+
+    project_filter = "AND h.project_id = :project_id" if project_id is not None else ""
+    ranked = db.execute(text(f"""
+        SELECT h.id, -bm25({db_models.HISTORY_FTS_TABLE}) AS score,
+               snippet({db_models.HISTORY_FTS_TABLE}, -1, '[', ']', '...', 16) AS snippet
+        FROM {db_models.HISTORY_FTS_TABLE}
+        JOIN query_history AS h ON h.id = {db_models.HISTORY_FTS_TABLE}.rowid
+        WHERE {db_models.HISTORY_FTS_TABLE} MATCH :match_query AND h.user_id = :user_id {project_filter}
+        ORDER BY bm25({db_models.HISTORY_FTS_TABLE})
+        LIMIT :limit
+    """), {"match_query": match_query, "user_id": user_id, "project_id": project_id, "limit": limit}).all()
+
+    entries = db.query(db_models.QueryHistory).filter(db_models.QueryHistory.id.in_([row.id for row in ranked])).all()
+    by_id = {entry.id: entry for entry in entries}
+    return [(by_id[row.id], row.score, row.snippet) for row in ranked if row.id in by_id]
+
+def _search_history_by_scan(db: Session, user_id: int, search: str, project_id: Optional[int], limit: int):
+    """Unranked substring search for databases without FTS5; newest first."""
+    history = db_models.QueryHistory
+    query = db.query(history).filter(history.user_id == user_id)
+    if project_id is not None:
+        query = query.filter(history.project_id == project_id)
+    for word in re.findall(r"\w+", search):
+        query = query.filter(or_(history.question.ilike(f"%{word}%"), history.answer.ilike(f"%{word}%")))
+    entries = query.order_by(history.timestamp.desc(), history.id.desc()).limit(limit).all()
+    return [(entry, 0.0, entry.answer[:200]) for entry in entries]
+
+# --- Async Variants ---
+# Used by `async def` routes with an `AsyncSession`, so the event loop keeps
+# serving other requests while the database works.
+
+async def get_user_by_username_async(db: AsyncSession, username: str):
+    """Retrieve a single user by their username."""
+    result = await db.execute(select(db_models.User).filter(db_models.User.username == username))
+    return result.scalars().first()
+
+async def get_user_by_id_async(db: AsyncSession, user_id: int):
+    """Retrieve a single user by their ID."""
+    return await db.get(db_models.User, user_id)
+
+async def get_user_queries_async(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100):
+    """Retrieve a user's query history, most recent first."""
+    result = await db.execute(
+        select(db_models.QueryHistory)
+        .filter(db_models.QueryHistory.user_id == user_id)
+        .order_by(db_models.QueryHistory.timestamp.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+async def create_user_query_async(db: AsyncSession, query: pydantic_models.QueryHistoryCreate):
+    """Create and store a new QueryHistory record."""
+    db_query = db_models.QueryHistory(
+        question=query.question,
+        answer=query.answer,
+        user_id=query.user_id,
+        project_id=query.project_id
+    )
+    db.add(db_query)
+    await db.commit()
+    await db.refresh(db_query)
+    return db_query
+
+async def create_user_queries_async(db: AsyncSession, queries: List[pydantic_models.QueryHistoryCreate]):
+    """Create and store several QueryHistory records in a single transaction."""
+    db_queries = [
+        db_models.QueryHistory(
+            question=query.question,
+            answer=query.answer,
+            user_id=query.user_id,
+            project_id=query.project_id
+        )
+        for query in queries
+    ]
+    db.add_all(db_queries)
+    await db.commit()
+    return db_queries
@@ -1,21 +1,172 @@
+import os
+import time
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
-DATABASE_URL = "sqlite:///./code_intel.db"
+from backend.core import metrics
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# --- Database Configuration ---
+# Any SQLAlchemy URL; a server database (e.g. postgresql://...) lets several
+# workers write at the same time.
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./code_intel.db")
+
+# Connection pool sizing (ignored for in-memory SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# How long a SQLite connection waits for another writer before failing with
+# "database is locked".
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Async drivers used when ASYNC_DATABASE_URL is not given explicitly, by
+# dialect; an explicit sync driver (postgresql+psycopg2://...) is replaced too.
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+    "postgres": "asyncpg",
+    "mysql": "aiomysql",
+}
+# Drivers that already support asyncio are kept as given.
+ASYNC_CAPABLE_DRIVERS = {"aiosqlite", "asyncpg", "psycopg", "aiomysql", "asyncmy"}
+
+
+def to_async_url(url: str) -> str:
+    """Maps a sync database URL to the same database with an async driver."""
+    scheme, sep, rest = url.partition("://")
+    dialect, _, driver = scheme.partition("+")
+    if driver in ASYNC_CAPABLE_DRIVERS or dialect not in ASYNC_DRIVERS:
+        return url
+    if dialect == "postgres":
+        dialect = "postgresql"
+    return f"{dialect}+{ASYNC_DRIVERS[dialect]}{sep}{rest}"
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return _is_sqlite(url) and (":memory:" in url or url.partition("://")[2] in ("", "/"))
+
+
+def _engine_options(url: str) -> dict:
+    """Connection arguments and pool settings shared by the sync and async engines."""
+    options = {}
+    if _is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        # Server connections can be dropped while idle in the pool.
+        options["pool_pre_ping"] = True
+    if not _is_memory_sqlite(url):
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    return options
+
+
+def _enable_sqlite_pragmas(engine, url: str):
+    """
+    Puts every new SQLite connection in WAL mode, so readers never block on a
+    writer, and makes writers wait for the lock instead of failing.
+    """
+    if not _is_sqlite(url):
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not _is_memory_sqlite(url):
+            cursor.execute("PRAGMA journal_mode=WAL")
+            # Durable at checkpoints; the recommended pairing with WAL.
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.close()
+
+
+def create_db_engine(url: str = DATABASE_URL):
+    """Creates a sync engine with the configured pool and SQLite pragmas."""
+    engine = create_engine(url, **_engine_options(url))
+    _enable_sqlite_pragmas(engine, url)
+    return engine
+
+
+def create_async_db_engine(url: str = ASYNC_DATABASE_URL):
+    """Creates an async engine (aiosqlite, asyncpg, ...) with the same settings."""
+    engine = create_async_engine(url, **_engine_options(url))
+    _enable_sqlite_pragmas(engine.sync_engine, url)
+    return engine
+
+
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Used by `async def` routes so database I/O never blocks the event loop.
+# Created on first use: a missing async driver or a bad ASYNC_DATABASE_URL
+# then fails the requests that need it, not `import backend.main`.
+_async_engine = None
+_async_session_factory = None
+
+
+def get_async_engine():
+    """Returns the shared async engine, creating it on first use."""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_db_engine(ASYNC_DATABASE_URL)
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    """Opens a session on the shared async engine."""
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(get_async_engine(), class_=AsyncSession,
+                                                    autoflush=False, expire_on_commit=False)
+    return _async_session_factory()
+
+
+async def dispose_async_engine():
+    """Closes the async engine's connections, if it was ever created."""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine, _async_session_factory = None, None
+
 Base = declarative_base()
 
+# --- Commit Timing ---
+# Every session commit (sync, or async through its sync session), flush
+# included, is reported on /metrics.
+
+@event.listens_for(Session, "before_commit")
+def _start_commit_timer(session):
+    session.info["commit_started"] = time.perf_counter()
+
+@event.listens_for(Session, "after_commit")
+def _observe_commit(session):
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        metrics.DB_COMMIT_DURATION.observe(time.perf_counter() - started)
+
 def get_db():
     """Dependency to get a DB session for each request."""
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """Dependency to get an async DB session for each request."""
+    async with AsyncSessionLocal() as db:
+        yield db
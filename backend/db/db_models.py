@@ -1,8 +1,9 @@
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Float, JSON, Index, DDL, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from .database import Base
+from sqlalchemy.engine import make_url
+from .database import Base, DATABASE_URL
 
 import enum
 
@@ -37,6 +38,38 @@ class QueryHistory(Base):
     # Relationship to User
     owner = relationship("User", back_populates="history")
 
+    __table_args__ = (
+        # Keyset pagination walks these newest-first, per user and per project,
+        # with `id` breaking ties between rows of the same timestamp.
+        Index("ix_query_history_user_timestamp", "user_id", "timestamp", "id"),
+        Index("ix_query_history_project_timestamp", "project_id", "timestamp", "id"),
+    )
+
+# --- Full-Text Search over QueryHistory (SQLite FTS5) ---
+# An external-content index: it stores only the tokens and reads the text
+# back from query_history, which the triggers below keep it in sync with.
+# The porter tokenizer lets "withdraw" also find "withdrawal".
+HISTORY_FTS_TABLE = "query_history_fts"
+
+HISTORY_FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {HISTORY_FTS_TABLE} USING fts5(
+        question, answer, content='query_history', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS query_history_fts_insert AFTER INSERT ON query_history BEGIN
+        INSERT INTO {HISTORY_FTS_TABLE}(rowid, question, answer) VALUES (new.id, new.question, new.answer);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS query_history_fts_delete AFTER DELETE ON query_history BEGIN
+        INSERT INTO {HISTORY_FTS_TABLE}({HISTORY_FTS_TABLE}, rowid, question, answer) VALUES ('delete', old.id, old.question, old.answer);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS query_history_fts_update AFTER UPDATE OF question, answer ON query_history BEGIN
+        INSERT INTO {HISTORY_FTS_TABLE}({HISTORY_FTS_TABLE}, rowid, question, answer) VALUES ('delete', old.id, old.question, old.answer);
+        INSERT INTO {HISTORY_FTS_TABLE}(rowid, question, answer) VALUES (new.id, new.question, new.answer);
+    END""",
+]
+
+for _statement in HISTORY_FTS_DDL:
+    event.listen(QueryHistory.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
 class Project(Base):
     __tablename__ = "projects"
 
@@ -48,3 +81,91 @@ class Project(Base):
 
     # Relationship back to the User
     owner = relationship("User", back_populates="projects")
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(String, primary_key=True, index=True)  # uuid4 hex
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    directory = Column(Text, nullable=False)
+    # Paths to re-hash instead of a full scan (watch mode); None means full scan
+    changed_paths = Column(JSON, nullable=True)
+    # Uploaded zip/tar archive to ingest instead of `directory`, which then
+    # only holds the uploaded file's name
+    archive_path = Column(Text, nullable=True)
+    status = Column(String, default=JobStatus.QUEUED, nullable=False, index=True)
+    # Name of the graph node currently running (or last completed)
+    current_node = Column(String, nullable=True)
+    # Counters such as files_scanned, changes, summaries_done, vectors_written
+    progress = Column(JSON, nullable=False, default=dict)
+    # Set by a cancel request; checked by whichever worker runs the job
+    cancel_requested = Column(Boolean, default=False, nullable=False)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # At most one queued job per project: later requests attach to it.
+        # The PostgreSQL condition is only given when that is the configured
+        # database, since naming it imports the whole dialect at startup.
+        Index(
+            "uq_ingestion_jobs_one_queued_per_project", "project_id", unique=True,
+            sqlite_where=(status == JobStatus.QUEUED.value),
+            **({"postgresql_where": status == JobStatus.QUEUED.value}
+               if make_url(DATABASE_URL).get_backend_name() == "postgresql" else {}),
+        ),
+    )
+
+
+class IngestionLock(Base):
+    """
+    One row per project with an ingestion run in progress. The primary key
+    makes acquiring the lock an atomic insert, so it holds across worker
+    processes that share the database. Holders refresh `heartbeat_at`; a lock
+    whose heartbeat is older than the TTL may be taken over.
+    """
+    __tablename__ = "ingestion_locks"
+
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    job_id = Column(String, nullable=False)
+    owner = Column(String, nullable=False)  # "<hostname>:<pid>"
+    acquired_at = Column(DateTime, nullable=False)   # naive UTC
+    heartbeat_at = Column(DateTime, nullable=False)  # naive UTC
+
+
+class LLMUsage(Base):
+    """
+    One LLM call: its tokens, latency and estimated cost, attributed to the
+    project, user and ingestion job it ran for. There are no foreign keys,
+    so usage stays on record after those are deleted.
+    """
+    __tablename__ = "llm_usage"
+
+    id = Column(Integer, primary_key=True, index=True)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())  # when the call started
+    project_id = Column(Integer, nullable=True)
+    user_id = Column(Integer, nullable=True)
+    job_id = Column(String, nullable=True)  # None for interactive queries
+    purpose = Column(String, nullable=False)  # e.g. "answer", "summary"
+    model = Column(String, nullable=False)
+    status = Column(String, nullable=False)  # "ok" or "error"
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    latency_seconds = Column(Float, nullable=False, default=0.0)
+    cost_usd = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        Index("ix_llm_usage_project_timestamp", "project_id", "timestamp"),
+        Index("ix_llm_usage_job", "job_id"),
+    )
@@ -0,0 +1,75 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from .database import Base
+from .db_models import HISTORY_FTS_TABLE, HISTORY_FTS_DDL
+
+# --- Lightweight Schema Migrations ---
+# `Base.metadata.create_all` creates missing tables but never alters existing
+# ones. These helpers bring databases created by older versions up to date.
+
+def add_missing_columns(engine: Engine) -> int:
+    """
+    Adds nullable columns that exist on the models but not yet in the
+    database. Returns how many columns were added.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added = 0
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+                print(f"Migrated table '{table.name}': added column '{column.name}'.")
+                added += 1
+    return added
+
+def create_missing_indexes(engine: Engine) -> int:
+    """
+    Creates indexes that exist on the models but not yet in the database.
+    Returns how many indexes were created.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    created = 0
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing_indexes:
+                    continue
+                index.create(bind=connection)
+                print(f"Migrated table '{table.name}': created index '{index.name}'.")
+                created += 1
+    return created
+
+def create_history_search_index(engine: Engine) -> bool:
+    """
+    Creates the FTS5 history search index on SQLite databases that predate it
+    and fills it from the existing rows. Returns whether it was created.
+    """
+    if engine.dialect.name != "sqlite":
+        return False
+    table_names = set(inspect(engine).get_table_names())
+    if "query_history" not in table_names or HISTORY_FTS_TABLE in table_names:
+        return False
+    with engine.begin() as connection:
+        for statement in HISTORY_FTS_DDL:
+            connection.execute(text(statement))
+        connection.execute(text(f"INSERT INTO {HISTORY_FTS_TABLE}({HISTORY_FTS_TABLE}) VALUES ('rebuild')"))
+    print(f"Migrated table 'query_history': created search index '{HISTORY_FTS_TABLE}'.")
+    return True
+
+def run_migrations(engine: Engine):
+    """Applies every migration step; each one is safe to run repeatedly."""
+    add_missing_columns(engine)
+    create_missing_indexes(engine)
+    create_history_search_index(engine)
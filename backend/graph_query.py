@@ -1,14 +1,11 @@
-from typing import TypedDict, List, Dict, Any
-
-from langgraph.graph import StateGraph, END
-
-# --- LLM and LangChain Imports ---
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
+import asyncio
+from functools import lru_cache
+from typing import TypedDict, List, Dict, Any, Optional, AsyncIterator
 
 # --- Import our custom query engine components ---
-from .query.query_engine import search_relevant_summaries, format_context_for_llm
+from .query.query_engine import search_relevant_summaries, build_context, CONTEXT_CANDIDATES
+from .schemas import SearchFilters
+from .core.metrics import instrument_node
 
 # --- LangGraph State Definition ---
 class RAGGraphState(TypedDict):
@@ -16,29 +13,45 @@ class RAGGraphState(TypedDict):
     Represents the state of our RAG graph.
     - project_id: The ID of the project being queried.
     - question: The user's input question.
+    - filters: Optional metadata filters applied during retrieval.
     - context: The relevant summaries retrieved from the vector store.
+    - sources: Metadata and distance of each retrieved summary.
     - answer: The final, LLM-generated answer.
     """
     project_id: int
     question: str
+    filters: Optional[SearchFilters]
     context: str
+    sources: List[Dict[str, Any]]
     answer: str
 
 # --- LLM Chain for Answer Generation ---
-# 1. Initialize the LLM
-llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.3)
-
-# 2. Define the prompt for the final answer generation
-rag_prompt = ChatPromptTemplate.from_messages([
-    ("system", "You are an expert code assistant. Use the following context from the codebase summaries to answer the user's question. If the context doesn't contain the answer, state that you couldn't find the information in the provided summaries."),
-    ("human", "Context:\n\n{context}\n\nQuestion: {question}"),
-])
-
-# 3. Create the chain
-rag_chain = rag_prompt | llm | StrOutputParser()
+# LangChain, LangGraph and the Gemini client are slow to import, and the
+# client needs credentials, so the chain and the graph are built on first use.
+
+@lru_cache(maxsize=None)
+def get_llm():
+    """Returns the shared answer-generation LLM, creating it on first use."""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from .core.llm_metrics import LLMMetricsCallback
+    model = "gemini-1.5-flash"
+    return ChatGoogleGenerativeAI(model=model, temperature=0.3, callbacks=[LLMMetricsCallback("answer", model=model)])
+
+@lru_cache(maxsize=None)
+def get_rag_chain():
+    """Returns the prompt | LLM | parser chain that writes the final answer."""
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+
+    rag_prompt = ChatPromptTemplate.from_messages([
+        ("system", "You are an expert code assistant. Use the following context from the codebase summaries to answer the user's question. If the context doesn't contain the answer, state that you couldn't find the information in the provided summaries."),
+        ("human", "Context:\n\n{context}\n\nQuestion: {question}"),
+    ])
+    return rag_prompt | get_llm() | StrOutputParser()
 
 # --- LangGraph Nodes (Now Asynchronous) ---
 
+@instrument_node("query", "retriever")
 async def retrieve_node(state: RAGGraphState) -> RAGGraphState:
     """
     Retrieves relevant context from the vector store based on the question.
@@ -47,14 +60,20 @@ async def retrieve_node(state: RAGGraphState) -> RAGGraphState:
     project_id = state['project_id']
     question = state['question']
     
-    # Search for relevant summaries in the project-specific vector store
-    search_results = search_relevant_summaries(project_id, question, top_k=5)
+    # Search for a pool of candidate summaries in the project-specific vector store.
+    # The embedding and Chroma query are blocking, so keep them off the event loop.
+    search_results = await asyncio.to_thread(
+        search_relevant_summaries, project_id, question,
+        top_k=CONTEXT_CANDIDATES, filters=state.get('filters'), include_embeddings=True
+    )
     
-    # Format the results into a single context string
-    context = format_context_for_llm(search_results)
+    # Pack the most relevant, non-redundant candidates into the context budget
+    context, packed_results = build_context(search_results)
+    sources = [{"metadata": r["metadata"], "score": r["score"]} for r in packed_results]
     
-    return {**state, "context": context}
+    return {**state, "context": context, "sources": sources}
 
+@instrument_node("query", "generator")
 async def generate_node(state: RAGGraphState) -> RAGGraphState:
     """
     Generates an answer using the LLM based on the retrieved context.
@@ -64,16 +83,28 @@ async def generate_node(state: RAGGraphState) -> RAGGraphState:
     context = state['context']
     
     # Asynchronously generate the answer using the RAG chain
-    answer = await rag_chain.ainvoke({"question": question, "context": context})
+    answer = await get_rag_chain().ainvoke({"question": question, "context": context})
     
     return {**state, "answer": answer}
 
+async def stream_answer(question: str, context: str) -> AsyncIterator[str]:
+    """
+    Streams the answer token by token from the RAG chain. Used by the SSE
+    endpoint in place of `generate_node`; closing the iterator cancels the
+    underlying LLM request.
+    """
+    async for chunk in get_rag_chain().astream({"question": question, "context": context}):
+        if chunk:
+            yield chunk
+
 # --- Graph Definition ---
 
 def create_query_graph():
     """
     Builds and compiles the LangGraph for the RAG query pipeline.
     """
+    from langgraph.graph import StateGraph, END
+
     workflow = StateGraph(RAGGraphState)
 
     # Add the nodes to the graph
@@ -90,5 +121,15 @@ def create_query_graph():
     print("Async RAG Query Graph compiled successfully.")
     return app
 
-# Create a single, compiled instance of the graph to be used by the API
-query_app = create_query_graph()
\ No newline at end of file
+@lru_cache(maxsize=None)
+def get_query_app():
+    """Returns the single compiled query graph used by the API, building it on first use."""
+    return create_query_graph()
+
+# Names that used to be built at import time
+_LAZY_ATTRIBUTES = {"llm": get_llm, "rag_chain": get_rag_chain, "query_app": get_query_app}
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,150 @@
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, List, Optional
+
+from backend.db import crud
+from backend.crud import usage_crud
+from backend.db.database import SessionLocal
+
+# --- Configuration ---
+# Records waiting to be written; when the queue is full, producers wait, so
+# a slow database slows requests down instead of growing memory.
+HISTORY_WRITER_QUEUE_SIZE = int(os.getenv("HISTORY_WRITER_QUEUE_SIZE", "1000"))
+# Most records inserted in one transaction.
+HISTORY_WRITER_BATCH_SIZE = int(os.getenv("HISTORY_WRITER_BATCH_SIZE", "100"))
+
+# Marks the end of the queue
+_STOP = object()
+
+
+class BatchWriter:
+    """
+    Writes records in the background: producers `put` them on a bounded queue
+    and one worker task hands whatever has accumulated to `write_batch` in a
+    single call. Batches are never held back waiting for more records; they
+    grow on their own while the previous write is in progress.
+
+    A failed batch is logged and dropped, and the writer keeps going. The
+    worker starts on the first `put` and is bound to that event loop.
+    """
+
+    def __init__(self, name: str, write_batch: Callable[[List[Any]], Awaitable[None]],
+                 max_queue_size: int = HISTORY_WRITER_QUEUE_SIZE,
+                 batch_size: int = HISTORY_WRITER_BATCH_SIZE):
+        self.name = name
+        self.write_batch = write_batch
+        self.max_queue_size = max_queue_size
+        self.batch_size = max(1, batch_size)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.written = 0
+        self.dropped = 0
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = loop.create_task(self._run())
+
+    async def put(self, record: Any):
+        """Queues a record, waiting for room if the queue is full."""
+        self._ensure_started()
+        await self._queue.put(record)
+
+    def put_nowait(self, record: Any) -> bool:
+        """
+        Queues a record without waiting, for producers that cannot await
+        (such as LLM callbacks). Works on the writer's event loop and from
+        other threads while that loop runs. Returns False, counting the record
+        as dropped, when the queue is full or there is no loop to write from.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            loop = self._loop
+            if loop is None or loop.is_closed() or not loop.is_running():
+                self.dropped += 1
+                return False
+            loop.call_soon_threadsafe(self._offer, record)
+            return True
+        self._ensure_started()
+        return self._offer(record)
+
+    def _offer(self, record: Any) -> bool:
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            print(f"Warning: {self.name} queue is full; dropped a record.")
+            return False
+
+    async def flush(self):
+        """Waits until every record queued so far has been written (or dropped)."""
+        if self._task is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+
+    async def shutdown(self):
+        """Writes out everything still queued, then stops the worker."""
+        if self._task is None or self._task.done() or self._loop is not asyncio.get_running_loop():
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            count = len(batch)
+            if _STOP in batch:
+                batch.remove(_STOP)
+                stopping = True
+            try:
+                if batch:
+                    await self.write_batch(batch)
+                    self.written += len(batch)
+            except Exception as e:
+                self.dropped += len(batch)
+                print(f"Error: could not write {len(batch)} {self.name} records: {e}")
+            finally:
+                for _ in range(count):
+                    self._queue.task_done()
+
+
+# --- Writers ---
+# Batches are inserted with a sync session in a worker thread. An async
+# session leaves its transaction open across the await before COMMIT; a
+# synchronous write made on the event loop in the meantime (the job manager
+# updates jobs that way) then blocks the loop the commit is waiting for, and
+# both wait until SQLite's busy timeout fails one of them.
+
+def _insert_query_history(records: List[Any]):
+    with SessionLocal() as db:
+        crud.create_user_queries(db=db, queries=records)
+
+
+async def _write_query_history(records: List[Any]):
+    await asyncio.to_thread(_insert_query_history, records)
+
+
+def _insert_llm_usage(records: List[Any]):
+    with SessionLocal() as db:
+        usage_crud.create_llm_usage(db=db, records=records)
+
+
+async def _write_llm_usage(records: List[Any]):
+    await asyncio.to_thread(_insert_llm_usage, records)
+
+
+# --- Shared Instances ---
+# Answers are returned without waiting for their history row; it usually
+# lands a few milliseconds later.
+history_writer = BatchWriter("query history", _write_query_history)
+# One row per LLM call, queued by the usage callback in backend.core.llm_metrics.
+usage_writer = BatchWriter("LLM usage", _write_llm_usage)
@@ -0,0 +1,336 @@
+import asyncio
+import os
+import socket
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.db.database import SessionLocal
+from backend.db.db_models import JobStatus
+from backend.crud import job_crud
+from backend.core.llm_usage import llm_usage_scope
+from backend.jobs.progress import progress_bus
+
+# --- Locking Configuration ---
+# A project lock whose holder has not heart-beaten for this long is considered
+# abandoned (e.g. the worker crashed) and may be taken over.
+INGESTION_LOCK_TTL_SECONDS = float(os.getenv("INGESTION_LOCK_TTL_SECONDS", "120"))
+# How often a queued job checks whether the project lock is free.
+INGESTION_LOCK_POLL_SECONDS = float(os.getenv("INGESTION_LOCK_POLL_SECONDS", "1.0"))
+# How often the latest live progress event is copied into the job record, so
+# workers other than the one running the job can report it.
+LIVE_PROGRESS_PERSIST_SECONDS = float(os.getenv("LIVE_PROGRESS_PERSIST_SECONDS", "1.0"))
+
+# --- Progress Bookkeeping ---
+# How each node's state update is turned into job progress counters.
+
+def _progress_from_update(node: str, update: Dict[str, Any], progress: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns a new progress dict with the counters reported by one node."""
+    progress = {**progress, "nodes_completed": progress.get("nodes_completed", []) + [node]}
+    if node == "detect_changes":
+        progress["files_scanned"] = update.get("files_scanned", 0)
+        progress["changes"] = len(update.get("changes") or [])
+    elif node == "summarize_changes":
+        progress["summaries_done"] = len(update.get("summaries") or [])
+    elif node == "ingest_vector_updates":
+        progress["vectors_written"] = update.get("vectors_written", 0)
+        progress["vectors_deleted"] = update.get("vectors_deleted", 0)
+    elif node == "stream_ingest":
+        progress["files_scanned"] = update.get("files_scanned", 0)
+        progress["changes"] = update.get("changes_detected", 0)
+        progress["summaries_done"] = update.get("summaries_generated", 0)
+        progress["vectors_written"] = update.get("vectors_written", 0)
+        progress["vectors_deleted"] = update.get("vectors_deleted", 0)
+    return progress
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when a cancel request is seen between nodes."""
+
+
+class IngestionJobManager:
+    """
+    Runs ingestion graph invocations as background asyncio tasks.
+
+    Every job is a row in the `ingestion_jobs` table, so its status and
+    per-node progress can be polled from any worker and survive restarts.
+    Cancellation is requested through the database: the worker running the
+    job stops at the next node boundary, or immediately when the job runs in
+    this process.
+
+    Runs are single-flight per project, across processes: a job must hold the
+    project's row in `ingestion_locks` to run, and at most one more job per
+    project can be queued behind it. Requests arriving while one is queued
+    attach to that job instead of creating another.
+
+    Database work done while jobs run (lock polls, heartbeats, progress and
+    status updates) goes through a worker thread, so a write waiting on
+    SQLite's busy timeout never blocks the event loop.
+    """
+
+    def __init__(self, session_factory: Callable = SessionLocal, graph: Optional[Any] = None,
+                 lock_ttl_seconds: float = INGESTION_LOCK_TTL_SECONDS,
+                 lock_poll_seconds: float = INGESTION_LOCK_POLL_SECONDS):
+        self.session_factory = session_factory
+        self._graph = graph
+        self.lock_ttl_seconds = lock_ttl_seconds
+        self.lock_poll_seconds = lock_poll_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._progress: Dict[str, Dict[str, Any]] = {}
+        # Jobs stopped because another worker took over their project lock
+        self._lost_locks: set = set()
+        self._shutting_down = False
+
+    @property
+    def graph(self):
+        # Imported lazily: the ingestion nodes and LangGraph are only loaded once a job runs.
+        if self._graph is None:
+            from backend.graph_incremental2 import get_ingestion_app
+            self._graph = get_ingestion_app()
+        return self._graph
+
+    def submit(
+        self,
+        project_id: int,
+        user_id: int,
+        directory: str,
+        changed_paths: Optional[List[str]] = None,
+        archive_path: Optional[str] = None
+    ) -> Tuple[Any, bool]:
+        """
+        Queues a job for the project and starts it in the background once the
+        project lock is free. Returns (job, created); `created` is False when
+        the request attached to a job that was already queued. With
+        `changed_paths`, only those paths are re-hashed instead of a full scan.
+        With `archive_path`, the uploaded archive is ingested instead of a
+        directory; the job deletes it once finished.
+        """
+        with self.session_factory() as db:
+            queued = job_crud.get_queued_job(db, project_id)
+            replaced_archive = queued.archive_path if queued else None
+            job, created = job_crud.create_or_attach_ingestion_job(
+                db, project_id=project_id, user_id=user_id, directory=directory,
+                changed_paths=changed_paths, archive_path=archive_path
+            )
+        if replaced_archive and replaced_archive != job.archive_path:
+            self._discard_archive(replaced_archive)
+        if created:
+            self._start(job.id, job.project_id)
+            print(f"Submitted ingestion job {job.id} for project {project_id}.")
+        else:
+            print(f"Attached ingestion request for project {project_id} to queued job {job.id}.")
+        return job, created
+
+    def _start(self, job_id: str, project_id: int):
+        if job_id in self._tasks:
+            return
+        task = asyncio.create_task(self._run(job_id, project_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    def _get_job(self, job_id: str):
+        with self.session_factory() as db:
+            return job_crud.get_ingestion_job(db, job_id)
+
+    def _update(self, job_id: str, **fields):
+        with self.session_factory() as db:
+            return job_crud.update_ingestion_job(db, job_id, **fields)
+
+    def _try_acquire_lock(self, job_id: str, project_id: int) -> Optional[bool]:
+        """
+        One attempt at taking the project lock and claiming the job. None if
+        the lock is held by another job and the caller should wait.
+        """
+        with self.session_factory() as db:
+            job = job_crud.get_ingestion_job(db, job_id)
+            if job is None or job.status != JobStatus.QUEUED.value:
+                return False
+            if job.cancel_requested:
+                raise JobCancelled()
+            if job_crud.try_acquire_project_lock(db, project_id, job_id, self.owner, self.lock_ttl_seconds):
+                if job_crud.claim_queued_job(db, job_id):
+                    return True
+                job_crud.release_project_lock(db, project_id, job_id)
+                return False
+        return None
+
+    async def _acquire_lock(self, job_id: str, project_id: int) -> bool:
+        """
+        Waits until this job holds the project lock and has been claimed as
+        running. False if the job was cancelled or started elsewhere first.
+        """
+        while True:
+            acquired = await asyncio.to_thread(self._try_acquire_lock, job_id, project_id)
+            if acquired is not None:
+                return acquired
+            await asyncio.sleep(self.lock_poll_seconds)
+
+    def _refresh_lock(self, project_id: int, job_id: str) -> bool:
+        with self.session_factory() as db:
+            return job_crud.refresh_project_lock(db, project_id, job_id)
+
+    def _release_lock(self, project_id: int, job_id: str):
+        with self.session_factory() as db:
+            job_crud.release_project_lock(db, project_id, job_id)
+
+    async def _heartbeat(self, job_id: str, project_id: int, run_task: asyncio.Task):
+        """
+        Keeps the project lock fresh while the job runs. If the lock was lost
+        (the job went longer than the lock TTL without a heartbeat and another
+        worker took it over), the run is stopped so two workers never ingest
+        the same project at once.
+        """
+        while True:
+            await asyncio.sleep(self.lock_ttl_seconds / 3)
+            if not await asyncio.to_thread(self._refresh_lock, project_id, job_id):
+                print(f"Ingestion job {job_id} lost the lock for project {project_id}; stopping it.")
+                self._lost_locks.add(job_id)
+                run_task.cancel()
+                return
+
+    async def _persist_live_progress(self, job_id: str):
+        """Copies the latest live progress event into the job record."""
+        persisted = None
+        while True:
+            await asyncio.sleep(LIVE_PROGRESS_PERSIST_SECONDS)
+            latest = progress_bus.latest(job_id)
+            if latest is not None and latest is not persisted:
+                await asyncio.to_thread(self._update, job_id, progress={**self._progress.get(job_id, {}), "current": latest})
+                persisted = latest
+
+    def _discard_archive(self, archive_path: str):
+        """Deletes an uploaded archive once no active job reads it any more."""
+        with self.session_factory() as db:
+            if job_crud.is_archive_in_use(db, archive_path):
+                return
+        try:
+            os.remove(archive_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Could not delete uploaded archive {archive_path}: {e}")
+
+    def _record_finish(self, job_id: str, status: str, fields: Dict[str, Any]):
+        job = self._update(job_id, status=status, finished_at=True, **fields)
+        if job is not None and job.archive_path:
+            self._discard_archive(job.archive_path)
+        return job
+
+    async def _finish(self, job_id: str, status: str, **fields):
+        """Records a job's final status and tells live subscribers."""
+        job = await asyncio.to_thread(self._record_finish, job_id, status, fields)
+        progress_bus.publish(job_id, {"event": "job_finished", "job_id": job_id, "status": status, "error": fields.get("error")})
+        progress_bus.forget(job_id)
+        self._progress.pop(job_id, None)
+        return job
+
+    async def _run(self, job_id: str, project_id: int):
+        progress: Dict[str, Any] = {}
+        holds_lock = False
+        background = []
+        try:
+            holds_lock = await self._acquire_lock(job_id, project_id)
+            if not holds_lock:
+                return
+            background.append(asyncio.create_task(self._heartbeat(job_id, project_id, asyncio.current_task())))
+            background.append(asyncio.create_task(self._persist_live_progress(job_id)))
+
+            # Read the inputs after claiming: attached requests may have updated them.
+            job = await asyncio.to_thread(self._get_job, job_id)
+            user_id = job.user_id
+            initial_state = {"project_id": project_id, "directory": job.directory, "job_id": job_id}
+            if job.changed_paths is not None:
+                initial_state["changed_paths"] = job.changed_paths
+            if job.archive_path:
+                initial_state["archive_path"] = job.archive_path
+            # Summaries generated by this run are billed to it.
+            with llm_usage_scope(project_id=project_id, user_id=user_id, job_id=job_id):
+                async for chunk in self.graph.astream(initial_state, stream_mode="updates"):
+                    for node, update in chunk.items():
+                        progress = _progress_from_update(node, update or {}, progress)
+                        self._progress[job_id] = progress
+                        job = await asyncio.to_thread(self._update, job_id, current_node=node, progress=progress)
+                        if update and update.get("ingestion_status") == "error":
+                            raise RuntimeError(update.get("error_message", "Vector store ingestion failed."))
+                        if job is not None and job.cancel_requested:
+                            raise JobCancelled()
+
+        except (asyncio.CancelledError, JobCancelled):
+            if job_id in self._lost_locks:
+                self._lost_locks.discard(job_id)
+                holds_lock = False  # Another worker holds it now
+                await self._finish(job_id, JobStatus.FAILED.value, error="Lost the project lock to another worker.")
+                return
+            if self._shutting_down and not holds_lock:
+                # Leave it queued; the next server start picks it up again.
+                return
+            print(f"Ingestion job {job_id} was cancelled.")
+            await self._finish(job_id, JobStatus.CANCELLED.value)
+            return
+        except Exception as e:
+            print(f"Ingestion job {job_id} failed: {e}")
+            await self._finish(job_id, JobStatus.FAILED.value, error=str(e))
+            return
+        finally:
+            for task in background:
+                task.cancel()
+            if holds_lock:
+                await asyncio.to_thread(self._release_lock, project_id, job_id)
+
+        await self._finish(job_id, JobStatus.SUCCEEDED.value, progress=progress)
+        print(f"Ingestion job {job_id} completed: {progress}")
+
+    def is_local(self, job_id: str) -> bool:
+        """True when the job is queued or running in this process."""
+        return job_id in self._tasks
+
+    async def wait(self, job_id: str):
+        """Waits for a job to finish (in this or any worker) and returns it."""
+        while True:
+            task = self._tasks.get(job_id)
+            if task is not None:
+                await asyncio.shield(task)
+            job = await asyncio.to_thread(self._get_job, job_id)
+            if job is None or job.status not in job_crud.ACTIVE_STATUSES:
+                return job
+            await asyncio.sleep(self.lock_poll_seconds)
+
+    def cancel(self, job_id: str, user_id: int):
+        """
+        Requests cancellation of a job. A job running in this process is
+        cancelled right away; one running elsewhere stops at its next node.
+        """
+        with self.session_factory() as db:
+            job = job_crud.request_job_cancellation(db, job_id, user_id=user_id)
+        if job is not None and job.cancel_requested:
+            task = self._tasks.get(job_id)
+            if task is not None:
+                task.cancel()
+        return job
+
+    def recover_interrupted_jobs(self) -> int:
+        """
+        Fails running jobs whose worker is gone (their project lock is missing
+        or stale) and resumes waiting on every queued job. Safe to call from
+        several workers: a queued job is only ever claimed by one of them.
+        """
+        with self.session_factory() as db:
+            count = job_crud.fail_orphaned_jobs(db, self.lock_ttl_seconds, error="Interrupted by a server restart.")
+            queued = [(job.id, job.project_id) for job in job_crud.get_queued_jobs(db)]
+        if count:
+            print(f"Marked {count} interrupted ingestion jobs as failed.")
+        for job_id, project_id in queued:
+            self._start(job_id, project_id)
+        return count
+
+    async def shutdown(self):
+        """Cancels this process's running jobs and waits for them to record it."""
+        self._shutting_down = True
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# --- Shared Instance ---
+job_manager = IngestionJobManager()
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# --- Configuration ---
+# Minimum time between two progress events of the same node, so per-file
+# updates on large repositories do not flood subscribers.
+PROGRESS_MIN_INTERVAL_SECONDS = 0.2
+# Events buffered per subscriber; a slow client loses the oldest ones.
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class ProgressBus:
+    """
+    In-process publish/subscribe channel for ingestion progress events,
+    keyed by job ID. Publishing never blocks: a subscriber that falls behind
+    drops its oldest events. The latest event of every job is kept so late
+    subscribers (and the job manager) can read a current snapshot.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._latest: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, event: Dict[str, Any]):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    def publish(self, job_id: str, event: Dict[str, Any]):
+        """Sends an event to every subscriber of the job. Safe from any thread."""
+        self._latest[job_id] = event
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        for loop, queue in list(self._subscribers.get(job_id, [])):
+            if loop is running_loop:
+                self._put(queue, event)
+            else:
+                loop.call_soon_threadsafe(self._put, queue, event)
+
+    def latest(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._latest.get(job_id)
+
+    def forget(self, job_id: str):
+        """Drops the stored snapshot of a finished job."""
+        self._latest.pop(job_id, None)
+
+    @contextmanager
+    def subscribe(self, job_id: str) -> Iterator[asyncio.Queue]:
+        """Yields a queue receiving the job's events until the block exits."""
+        entry = (asyncio.get_running_loop(), asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE))
+        self._subscribers.setdefault(job_id, []).append(entry)
+        try:
+            yield entry[1]
+        finally:
+            subscribers = self._subscribers.get(job_id, [])
+            if entry in subscribers:
+                subscribers.remove(entry)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+
+class ProgressReporter:
+    """
+    Tracks one node's progress through a known amount of work and publishes
+    throttled `progress` events with counts, rate, ETA and the current file.
+    A `total` of None means the amount is not known up front (no ETA).
+    Without a job ID (e.g. when the graph is invoked directly) it only counts.
+    """
+
+    def __init__(self, bus: ProgressBus, job_id: Optional[str], node: str, total: Optional[int], unit: str):
+        self.bus = bus
+        self.job_id = job_id
+        self.node = node
+        self.total = total
+        self.unit = unit
+        self.done = 0
+        self.started = time.monotonic()
+        self._last_published = 0.0
+        self._publish("node_started", None)
+
+    def _event(self, event: str, current_file: Optional[str]) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = max(self.total - self.done, 0) if self.total is not None else None
+        return {
+            "event": event,
+            "job_id": self.job_id,
+            "node": self.node,
+            "unit": self.unit,
+            "done": self.done,
+            "total": self.total,
+            "rate_per_second": round(rate, 3),
+            "eta_seconds": round(remaining / rate, 1) if rate > 0 and remaining is not None else None,
+            "elapsed_seconds": round(elapsed, 3),
+            "current_file": current_file,
+        }
+
+    def _publish(self, event: str, current_file: Optional[str]):
+        if self.job_id is None:
+            return
+        self.bus.publish(self.job_id, self._event(event, current_file))
+        self._last_published = time.monotonic()
+
+    def advance(self, count: int = 1, current_file: Optional[str] = None):
+        """Records finished work; publishes at most every PROGRESS_MIN_INTERVAL_SECONDS."""
+        self.done += count
+        finished = self.total is not None and self.done >= self.total
+        if finished or time.monotonic() - self._last_published >= PROGRESS_MIN_INTERVAL_SECONDS:
+            self._publish("progress", current_file)
+
+    def finish(self):
+        """Publishes the node's final counts."""
+        self._publish("node_completed", None)
+
+
+# --- Shared Instance ---
+progress_bus = ProgressBus()
+
+
+def progress_reporter(state: Dict[str, Any], node: str, total: Optional[int], unit: str) -> ProgressReporter:
+    """Creates a reporter for a graph node, tied to the job ID in the state."""
+    return ProgressReporter(progress_bus, state.get("job_id"), node, total, unit)
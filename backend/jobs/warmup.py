@@ -0,0 +1,126 @@
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.db import crud
+from backend.db.database import SessionLocal
+
+# --- Configuration ---
+# Set WARMUP_ENABLED=false to skip warm-up (e.g. for one-off scripts); the
+# server then reports ready at once and loads everything on first use.
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+# How many of the most recently queried projects get their index opened.
+WARMUP_PROJECTS = int(os.getenv("WARMUP_PROJECTS", "5"))
+# Text embedded and searched for during warm-up; the results are discarded.
+WARMUP_QUERY = "warm-up query"
+
+
+class WarmupManager:
+    """
+    Loads what the first queries after a deploy would otherwise wait for:
+    the embedding model (plus one encode, so lazily initialised kernels are
+    ready), the query graph and LLM client, and the vector indexes of the
+    most recently queried projects.
+
+    Warm-up runs as a background task once the server is up, so /health
+    answers straight away; /ready reports when it has finished. A failing
+    step is recorded and skipped, it never keeps the server from being ready.
+    """
+
+    def __init__(self, session_factory: Callable = SessionLocal, enabled: bool = WARMUP_ENABLED,
+                 project_count: int = WARMUP_PROJECTS):
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.project_count = project_count
+        self.status = "pending" if enabled else "disabled"
+        self.steps: List[Dict[str, Any]] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status in ("ready", "disabled")
+
+    def start(self):
+        """Starts warm-up in the background; called from the app's startup hook."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def shutdown(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def report(self) -> Dict[str, Any]:
+        """The readiness report served by /ready."""
+        report = {"status": self.status, "ready": self.ready, "steps": self.steps}
+        if self.started_at is not None:
+            report["seconds"] = round((self.finished_at or time.monotonic()) - self.started_at, 3)
+        return report
+
+    async def run(self):
+        self.status = "warming_up"
+        self.started_at = time.monotonic()
+        print("--- Warm-up started ---")
+        await self._step("embedding_model", self._warm_embedding_model)
+        await self._step("query_graph", self._warm_query_graph)
+        for project_id in await self._step("recent_projects", self._recent_project_ids) or []:
+            await self._step(f"project_{project_id}", self._warm_project, project_id)
+        self.finished_at = time.monotonic()
+        self.status = "ready"
+        print(f"--- Warm-up finished in {self.finished_at - self.started_at:.1f}s ---")
+
+    async def _step(self, name: str, func: Callable, *args):
+        """Runs one blocking warm-up step in a thread and records how it went."""
+        started = time.monotonic()
+        step = {"name": name}
+        try:
+            result = await asyncio.to_thread(func, *args)
+            step["status"] = "ok"
+            return result
+        except Exception as e:
+            print(f"Warm-up step '{name}' failed: {e}")
+            step.update(status="failed", error=str(e))
+            return None
+        finally:
+            step["seconds"] = round(time.monotonic() - started, 3)
+            self.steps.append(step)
+
+    # --- Steps ---
+
+    def _warm_embedding_model(self):
+        from backend.vectorstore.embeddings import get_embedding
+
+        embedding_function = get_embedding()
+        if embedding_function is None:
+            raise RuntimeError("Embedding model is not available.")
+        embedding_function([WARMUP_QUERY])
+
+    def _warm_query_graph(self):
+        from backend.graph_query import get_query_app, get_rag_chain
+
+        get_query_app()
+        get_rag_chain()
+
+    def _recent_project_ids(self) -> List[int]:
+        if self.project_count <= 0:
+            return []
+        db = self.session_factory()
+        try:
+            project_ids = crud.get_recently_queried_project_ids(db, limit=self.project_count)
+        finally:
+            db.close()
+        # Opening the store of a never-ingested project would create an empty one.
+        return [project_id for project_id in project_ids if os.path.isdir(f"project_data/{project_id}")]
+
+    def _warm_project(self, project_id: int):
+        from backend.vectorstore.factory import get_vector_store
+
+        # A search opens the collection and loads its index into memory.
+        get_vector_store(project_id).search(WARMUP_QUERY, top_k=1)
+
+
+# --- Shared Instance ---
+warmup_manager = WarmupManager()
@@ -0,0 +1,188 @@
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from watchfiles import Change, awatch
+
+from backend.parser.scanner import is_scanned_python_file, is_ignored_dir
+from backend.jobs.manager import job_manager
+
+# --- Configuration ---
+# Changes are collected until the tree has been quiet for a moment, for at
+# most this long, and then ingested as one batch.
+WATCH_DEBOUNCE_MS = int(os.getenv("WATCH_DEBOUNCE_MS", "1500"))
+
+
+class SourceChangeFilter:
+    """
+    Keeps events the ingestion cares about: Python files the scanner would
+    pick up, and directories (created, moved in or removed as a whole).
+    """
+
+    def __init__(self, directory: str):
+        self.directory = os.path.abspath(directory)
+
+    def __call__(self, change: Change, path: str) -> bool:
+        if path.endswith(".py"):
+            return is_scanned_python_file(path, self.directory)
+        relative = os.path.relpath(path, self.directory)
+        if relative.startswith(os.pardir) or any(is_ignored_dir(part) for part in relative.split(os.sep)):
+            return False
+        if change == Change.deleted:
+            # The path is gone, so guess: extension-less paths are directories.
+            return not os.path.splitext(path)[1]
+        return os.path.isdir(path)
+
+
+class ProjectWatcher:
+    """
+    Watches one project directory (inotify on Linux, via watchfiles) and
+    submits an incremental ingestion job for each debounced batch of changed
+    paths. Idle, it just waits on the OS notification.
+
+    If the watch itself fails (e.g. the directory is removed or the inotify
+    limit is hit), the error is kept on the watcher and `on_failure` is called.
+    """
+
+    def __init__(self, project_id: int, user_id: int, directory: str, job_manager,
+                 debounce_ms: int = WATCH_DEBOUNCE_MS, on_failure: Optional[Callable[["ProjectWatcher"], None]] = None):
+        self.project_id = project_id
+        self.user_id = user_id
+        self.directory = os.path.abspath(directory)
+        self.job_manager = job_manager
+        self.debounce_ms = debounce_ms
+        self.batches = 0
+        self.last_batch_at: Optional[float] = None
+        self.last_job_id: Optional[str] = None
+        self.error: Optional[str] = None
+        self.on_failure = on_failure
+        self._stop_event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+        self._task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task):
+        if task.cancelled() or task.exception() is None:
+            return
+        error = task.exception()
+        self.error = f"{type(error).__name__}: {error}"
+        print(f"Watcher for project {self.project_id} on '{self.directory}' failed: {self.error}")
+        if self.on_failure is not None:
+            self.on_failure(self)
+
+    @property
+    def status(self) -> str:
+        if self.error is not None:
+            return "failed"
+        if self._task is not None and self._task.done():
+            return "stopped"
+        return "watching"
+
+    async def _run(self):
+        print(f"Watching '{self.directory}' for project {self.project_id}.")
+        async for changes in awatch(
+            self.directory,
+            watch_filter=SourceChangeFilter(self.directory),
+            debounce=self.debounce_ms,
+            stop_event=self._stop_event,
+        ):
+            changed_paths = sorted({path for _, path in changes})
+            try:
+                job, _ = self.job_manager.submit(
+                    project_id=self.project_id, user_id=self.user_id,
+                    directory=self.directory, changed_paths=changed_paths
+                )
+            except Exception as e:
+                print(f"Watcher for project {self.project_id} could not submit {len(changed_paths)} changes: {e}")
+                continue
+            self.batches += 1
+            self.last_batch_at = time.time()
+            self.last_job_id = job.id
+        print(f"Stopped watching '{self.directory}' for project {self.project_id}.")
+
+    async def stop(self):
+        self._stop_event.set()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "project_id": self.project_id,
+            "directory": self.directory,
+            "status": self.status,
+            "error": self.error,
+            "debounce_ms": self.debounce_ms,
+            "batches": self.batches,
+            "last_batch_at": self.last_batch_at,
+            "last_job_id": self.last_job_id,
+        }
+
+
+class WatchManager:
+    """
+    Keeps at most one watcher per project in this process. Watchers are not
+    persisted: they stop with the server and are started again on request.
+
+    A watcher that fails is unregistered but kept in `_failed`, so the listing
+    reports it until the project is watched again or the watch is stopped.
+    """
+
+    def __init__(self, job_manager):
+        self.job_manager = job_manager
+        self._watchers: Dict[int, ProjectWatcher] = {}
+        self._failed: Dict[int, ProjectWatcher] = {}
+
+    async def start(self, project_id: int, user_id: int, directory: str) -> ProjectWatcher:
+        """
+        Starts (or restarts, for a new directory) watching a project. A project
+        that was never ingested gets one full-scan job first.
+        """
+        if not os.path.isdir(directory):
+            raise ValueError(f"Directory '{directory}' does not exist.")
+        current = self._watchers.get(project_id)
+        if current is not None:
+            if current.directory == os.path.abspath(directory):
+                return current
+            await self.stop(project_id)
+
+        if not os.path.exists(f"project_data/{project_id}/code_hashes.json"):
+            self.job_manager.submit(project_id=project_id, user_id=user_id, directory=directory)
+
+        watcher = ProjectWatcher(project_id, user_id, directory, self.job_manager, on_failure=self._unregister_failed)
+        self._failed.pop(project_id, None)
+        self._watchers[project_id] = watcher
+        watcher.start()
+        return watcher
+
+    def _unregister_failed(self, watcher: ProjectWatcher):
+        if self._watchers.get(watcher.project_id) is watcher:
+            del self._watchers[watcher.project_id]
+            self._failed[watcher.project_id] = watcher
+
+    async def stop(self, project_id: int) -> bool:
+        watcher = self._watchers.pop(project_id, None)
+        if watcher is None:
+            return self._failed.pop(project_id, None) is not None
+        await watcher.stop()
+        return True
+
+    def get(self, project_id: int) -> Optional[ProjectWatcher]:
+        return self._watchers.get(project_id)
+
+    def list(self, project_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        watchers = {**self._failed, **self._watchers}
+        return [
+            watcher.describe() for project_id, watcher in sorted(watchers.items())
+            if project_ids is None or project_id in project_ids
+        ]
+
+    async def shutdown(self):
+        for project_id in list(self._watchers):
+            await self.stop(project_id)
+
+
+# --- Shared Instance ---
+watch_manager = WatchManager(job_manager)
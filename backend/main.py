@@ -1,24 +1,54 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 # from backend.api import parse_routes, diff_routes, summary_routes, query_routes, auth_routes, history_routes
-from backend.api import ingestion_routes, auth_routes, query_routes, project_routes2, admin_routes
+from backend.api import auth_routes, query_routes, project_routes2, admin_routes, search_routes, history_routes
 from sqlalchemy.orm import Session
 
 from backend.db import db_models
-from backend.db.database import engine
+from backend.db.database import engine, dispose_async_engine
+from backend.db.migrations import run_migrations
+from backend.jobs.manager import job_manager
+from backend.jobs.watcher import watch_manager
+from backend.jobs.batch_writer import history_writer, usage_writer
+from backend.jobs.warmup import warmup_manager
+from backend.core.metrics import render_metrics
 
 
+def init_database():
+    """Creates missing tables and upgrades ones created by older versions."""
+    db_models.Base.metadata.create_all(bind=engine) # for creating db_models
+    run_migrations(engine) # for upgrading tables created by older versions
 
-db_models.Base.metadata.create_all(bind=engine) # for creating db_models
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup and shutdown hooks for the database and background work."""
+    # Run at startup rather than on import, so importing the app stays cheap.
+    init_database()
+    # Jobs that were running when the server last stopped can never finish.
+    job_manager.recover_interrupted_jobs()
+    # Loads models and hot indexes in the background; see /ready.
+    warmup_manager.start()
+    yield
+    await warmup_manager.shutdown()
+    await watch_manager.shutdown()
+    await job_manager.shutdown()
+    # Answers already returned must not lose their history rows.
+    await history_writer.shutdown()
+    await usage_writer.shutdown()
+    await dispose_async_engine()
 
 # Create a FastAPI app instance
 app = FastAPI(
     title="CodeHelp API",
     description="API for parsing and analyzing codebases.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # --- START: ADD THIS FOR TESTING ---
@@ -54,6 +84,8 @@ app.include_router(admin_routes.router)
 # app.include_router(ingestion_routes.router, prefix='/api', tags=["Summarize & Ingest"])
 # app.include_router(summarize_changes.router, prefic="/api", tags=["summarize_changes"])
 app.include_router(project_routes2.router)
+app.include_router(search_routes.router)
+app.include_router(history_routes.router)
 
 @app.get("/health")
 def read_health():
@@ -63,6 +95,24 @@ def read_health():
     """
     return {"status": "ok"}
 
+@app.get("/ready")
+def read_ready():
+    """
+    Readiness check: 200 once the startup warm-up (embedding model, query
+    graph, recently queried project indexes) has finished, 503 until then.
+    """
+    report = warmup_manager.report()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
+@app.get("/metrics")
+def read_metrics():
+    """
+    Prometheus metrics: per-node and LLM/embedding/vector-store/commit latency
+    histograms, ingestion and cache counters and in-flight gauges.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 # To run this application:
 # 1. Make sure you are in the `backend` directory.
 # 2. Run the command: uvicorn main:app --reload
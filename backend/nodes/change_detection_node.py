@@ -81,16 +81,22 @@
 
 #     # 5. Update the state with the list of changes
 #     return {**state, "changes": changes}
+import asyncio
 import json
 import os
-from typing import List, Dict, Any, TypedDict, Union
+from typing import List, Dict, Any, TypedDict, Union, Optional
 
 # Import the core components using absolute paths from the 'backend' root
-from backend.parser.scanner import scan_python_files
-from backend.parser.parser import parse_file
+from backend.parser.scanner import scan_python_files, is_scanned_python_file
+from backend.parser.parser import parse_file, parse_source
+from backend.parser.archive import iter_python_members, count_python_members
 from backend.parser.hasher import create_hashes_from_parse_result
 from backend.diffing.code_change_detector import detect_changes, ChangedItem
 from backend.summarizer.models import FunctionSummary, ClassSummary, MethodSummary
+from backend.query.symbol_index import build_symbol_entries, save_symbol_index
+from backend.vectorstore.factory import select_backend_for_project
+from backend.jobs.progress import progress_reporter
+from backend.core import metrics
 
 # --- LangGraph State Definition ---
 class GraphState(TypedDict):
@@ -98,13 +104,31 @@ class GraphState(TypedDict):
     Represents the state of our graph.
     - project_id: The ID of the project being processed.
     - directory: The input directory to scan.
+    - archive_path: An uploaded zip/tar archive to read instead of
+      `directory`; its files are keyed by archive-relative paths.
+    - job_id: The ingestion job this run belongs to, for progress events.
+    - changed_paths: Optional paths (files or directories) known to have
+      changed; when set, only these are re-hashed instead of the full scan.
     - changes: The list of detected changes for the next node.
     - summaries: The list of generated summaries.
+    - files_scanned: How many source files change detection parsed.
+    - vectors_written / vectors_deleted: Vector store writes of the last node.
+    - changes_detected / summaries_generated: Totals of the streaming pipeline.
     """
     project_id: int
     directory: str
+    archive_path: Optional[str]
+    job_id: Optional[str]
+    changed_paths: Optional[List[str]]
     changes: List[ChangedItem]
     summaries: List[Union[FunctionSummary, ClassSummary, MethodSummary]]
+    files_scanned: int
+    vectors_written: int
+    vectors_deleted: int
+    changes_detected: int
+    summaries_generated: int
+    ingestion_status: str
+    error_message: str
 
 # --- Helper functions for project-specific state management ---
 def _load_project_hashes(hashes_file_path: str) -> Dict[str, Any]:
@@ -125,6 +149,50 @@ def _save_project_hashes(hashes_file_path: str, hashes: Dict[str, Any]):
     except IOError as e:
         print(f"Error saving hashes to {hashes_file_path}: {e}")
 
+def _hash_files(file_paths: List[str], reporter) -> Dict[str, Any]:
+    """Parses and hashes files, skipping (and logging) those that fail."""
+    hashes = {}
+    for file_path in file_paths:
+        try:
+            parsed_result = parse_file(file_path)
+            hashes[file_path] = create_hashes_from_parse_result(parsed_result)
+        except Exception as e:
+            print(f"Could not parse or hash file {file_path}: {e}")
+            continue
+        finally:
+            reporter.advance(current_file=file_path)
+    return hashes
+
+def _hash_archive(archive_path: str, reporter) -> Dict[str, Any]:
+    """Parses and hashes the Python members of an archive in one streaming pass."""
+    hashes = {}
+    for name, source in iter_python_members(archive_path):
+        try:
+            hashes[name] = create_hashes_from_parse_result(parse_source(source, name))
+        except Exception as e:
+            print(f"Could not parse or hash archive member {name}: {e}")
+        finally:
+            reporter.advance(current_file=name)
+    return hashes
+
+def _resolve_changed_paths(changed_paths: List[str], directory: str, old_hashes: Dict[str, Any]):
+    """
+    Expands changed paths into the files to re-hash and every known file they
+    affect. A changed directory covers everything stored below it, so removed
+    or renamed directories drop their files.
+    """
+    to_hash, affected = set(), set()
+    for path in changed_paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            to_hash.update(scan_python_files(path))
+        elif os.path.isfile(path) and is_scanned_python_file(path, directory):
+            to_hash.add(path)
+        prefix = path.rstrip(os.sep) + os.sep
+        affected.update(known for known in old_hashes if known == path or known.startswith(prefix))
+    to_hash = {p for p in to_hash if is_scanned_python_file(p, directory)}
+    return sorted(to_hash), affected | to_hash
+
 # --- The LangGraph Node ---
 async def change_detection_node(state: GraphState) -> Dict:
     """
@@ -133,12 +201,17 @@ async def change_detection_node(state: GraphState) -> Dict:
     print("--- Change Detection Node Triggered ---")
     project_id = state.get("project_id")
     directory = state.get("directory")
+    archive_path = state.get("archive_path")
 
     if not project_id:
         raise ValueError("Error: project_id not found in graph state.")
-    if not directory or not os.path.isdir(directory):
+    if archive_path:
+        if not os.path.isfile(archive_path):
+            print(f"Error: Archive '{archive_path}' does not exist.")
+            return {"changes": [], "files_scanned": 0}
+    elif not directory or not os.path.isdir(directory):
         print(f"Error: Directory '{directory}' not provided or does not exist.")
-        return {"changes": []}
+        return {"changes": [], "files_scanned": 0}
 
     # Define the project-specific path for storing hashes
     project_data_dir = f"project_data/{project_id}"
@@ -149,26 +222,53 @@ async def change_detection_node(state: GraphState) -> Dict:
     old_hashes = _load_project_hashes(hashes_file_path)
     print(f"Loaded hashes for {len(old_hashes)} files for project {project_id}.")
 
-    # 2. Scan and parse the codebase to generate new hashes
-    python_files = scan_python_files(directory)
-    new_hashes = {}
-    for file_path in python_files:
-        try:
-            parsed_result = parse_file(file_path)
-            file_hash_dict = create_hashes_from_parse_result(parsed_result)
-            new_hashes[file_path] = file_hash_dict
-        except Exception as e:
-            print(f"Could not parse or hash file {file_path}: {e}")
-            continue
-    print(f"Generated new hashes for {len(new_hashes)} files.")
+    # 2. Parse and hash the codebase: everything, or only the changed paths.
+    # Scanning, parsing and hashing are blocking; they run in a worker thread
+    # so the event loop keeps delivering live progress and lock heartbeats.
+    changed_paths = state.get("changed_paths")
+    if archive_path:
+        total = await asyncio.to_thread(count_python_members, archive_path)
+        reporter = progress_reporter(state, "detect_changes", total=total, unit="files")
+        new_hashes = await asyncio.to_thread(_hash_archive, archive_path, reporter)
+        python_files = list(new_hashes)
+        print(f"Generated new hashes for {len(new_hashes)} archive members.")
 
-    # 3. Compare old and new hashes to find what changed
-    changes = detect_changes(old_hashes, new_hashes)
+        # 3. Compare old and new hashes to find what changed
+        changes = detect_changes(old_hashes, new_hashes)
+    elif changed_paths is None:
+        python_files = await asyncio.to_thread(scan_python_files, directory)
+        reporter = progress_reporter(state, "detect_changes", total=len(python_files), unit="files")
+        new_hashes = await asyncio.to_thread(_hash_files, python_files, reporter)
+        print(f"Generated new hashes for {len(new_hashes)} files.")
+
+        # 3. Compare old and new hashes to find what changed
+        changes = detect_changes(old_hashes, new_hashes)
+    else:
+        python_files, affected = await asyncio.to_thread(_resolve_changed_paths, changed_paths, directory, old_hashes)
+        reporter = progress_reporter(state, "detect_changes", total=len(python_files), unit="files")
+        changed_hashes = await asyncio.to_thread(_hash_files, python_files, reporter)
+        print(f"Re-hashed {len(changed_hashes)} of {len(changed_paths)} changed paths.")
+
+        # 3. Compare only the affected files, and carry the rest over unchanged
+        changes = detect_changes({p: old_hashes[p] for p in affected if p in old_hashes}, changed_hashes)
+        new_hashes = {p: h for p, h in old_hashes.items() if p not in affected}
+        new_hashes.update(changed_hashes)
     print(f"Detected {len(changes)} granular changes for project {project_id}.")
 
     # 4. Save the new state for the next run
     _save_project_hashes(hashes_file_path, new_hashes)
     print(f"Saved new hashes for project {project_id} to {hashes_file_path}.")
 
-    # 5. Return the dictionary of changes to update the graph's state
-    return {"changes": changes}
\ No newline at end of file
+    # 5. Rebuild the symbol index used for autocomplete from the same hashes
+    symbol_entries = build_symbol_entries(new_hashes)
+    save_symbol_index(project_id, symbol_entries, root="" if archive_path else os.path.abspath(directory))
+
+    # On a project's first ingestion, pick its vector backend by size
+    if not old_hashes:
+        select_backend_for_project(project_id, len(symbol_entries))
+
+    reporter.finish()
+    metrics.record_ingestion_changes(project_id, len(python_files), changes)
+
+    # 6. Return the dictionary of changes to update the graph's state
+    return {"changes": changes, "files_scanned": len(python_files)}
\ No newline at end of file
@@ -3,6 +3,7 @@ import os
 from typing import Dict, Any
 
 from .change_detection_node import GraphState
+from ..jobs.progress import progress_reporter
 
 # --- Helper functions for project-specific summary management ---
 
@@ -39,6 +40,33 @@ def _get_unique_id(summary_dict: Dict[str, Any]) -> str:
     else:
         return f"{summary_dict['file_path']}::{summary_dict['function_name']}"
 
+def apply_removed_change(summary_db: Dict[str, Any], change) -> None:
+    """Drops the summary of a removed function or class from the database."""
+    if change.change_type != 'removed':
+        return
+    unique_id = f"{change.file_path}::{change.item_name}"
+    if change.item_type == 'method':
+        # Note: This requires a more complex lookup if class name isn't in ChangedItem
+        # For now, we assume simple cases.
+        pass 
+    elif change.item_type == 'class' and unique_id in summary_db['classes']:
+        del summary_db['classes'][unique_id]
+    elif change.item_type == 'function' and unique_id in summary_db['functions']:
+        del summary_db['functions'][unique_id]
+
+def apply_summary(summary_db: Dict[str, Any], summary) -> None:
+    """Adds or replaces one generated summary in the database."""
+    # Convert Pydantic model to dict if it's not already
+    summary_dict = summary if isinstance(summary, dict) else summary.dict()
+    unique_id = _get_unique_id(summary_dict)
+    
+    if 'method_name' in summary_dict:
+        summary_db['methods'][unique_id] = summary_dict
+    elif 'class_name' in summary_dict:
+        summary_db['classes'][unique_id] = summary_dict
+    else:
+        summary_db['functions'][unique_id] = summary_dict
+
 # --- The LangGraph Node ---
 
 async def ingest_updates_node(state: GraphState) -> None:
@@ -53,36 +81,21 @@ async def ingest_updates_node(state: GraphState) -> None:
     if not project_id:
         raise ValueError("Error: project_id not found in graph state.")
 
+    reporter = progress_reporter(state, "ingest_text_updates", total=len(summaries), unit="summaries")
     db_path = _get_summary_db_path(project_id)
     summary_db = _load_project_summaries(db_path)
 
     # Handle removed items
     for change in changes:
-        if change.change_type == 'removed':
-            unique_id = f"{change.file_path}::{change.item_name}"
-            if change.item_type == 'method':
-                # Note: This requires a more complex lookup if class name isn't in ChangedItem
-                # For now, we assume simple cases.
-                pass 
-            elif change.item_type == 'class' and unique_id in summary_db['classes']:
-                del summary_db['classes'][unique_id]
-            elif change.item_type == 'function' and unique_id in summary_db['functions']:
-                del summary_db['functions'][unique_id]
+        apply_removed_change(summary_db, change)
     
     # Handle added/modified items
     for summary in summaries:
-        # Convert Pydantic model to dict if it's not already
-        summary_dict = summary if isinstance(summary, dict) else summary.dict()
-        unique_id = _get_unique_id(summary_dict)
-        
-        if 'method_name' in summary_dict:
-            summary_db['methods'][unique_id] = summary_dict
-        elif 'class_name' in summary_dict:
-            summary_db['classes'][unique_id] = summary_dict
-        else:
-            summary_db['functions'][unique_id] = summary_dict
+        apply_summary(summary_db, summary)
 
     _save_project_summaries(db_path, summary_db)
+    reporter.advance(len(summaries), current_file=db_path)
+    reporter.finish()
     total_items = len(summary_db['functions']) + len(summary_db['classes']) + len(summary_db['methods'])
     print(f"Summaries database for project {project_id} updated. Total items: {total_items}.")
     
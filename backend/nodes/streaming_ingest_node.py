@@ -0,0 +1,272 @@
+# backend/nodes/streaming_ingest_node.py
+
+import asyncio
+import os
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from backend.parser.parser import parse_file, parse_source
+from backend.parser.scanner import scan_python_files
+from backend.parser.archive import iter_python_members, count_python_members
+from backend.parser.hasher import create_hashes_from_parse_result
+from backend.diffing.code_change_detector import detect_changes
+from backend.query.symbol_index import build_symbol_entries, save_symbol_index
+from backend.vectorstore.factory import select_backend_for_project, get_vector_store
+from backend.jobs.progress import progress_reporter
+from backend.core import metrics
+
+from .change_detection_node import GraphState, _load_project_hashes, _save_project_hashes, _resolve_changed_paths
+from .summarize_changes_node import find_items_to_summarize, create_summary_task
+from .ingest_update_node2 import (
+    _get_summary_db_path,
+    _load_project_summaries,
+    _save_project_summaries,
+    apply_removed_change,
+    apply_summary,
+)
+from .vector_ingest_node import summary_to_document, _get_doc_id
+
+# --- Pipeline Configuration ---
+# Items buffered between two stages; a full queue pauses the stage feeding it,
+# so memory stays bounded however large the project is.
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "64"))
+# Concurrent LLM summarization calls.
+STREAM_SUMMARY_WORKERS = int(os.getenv("STREAM_SUMMARY_WORKERS", "8"))
+# Most summaries embedded and written to the vector store in one call.
+STREAM_WRITE_BATCH_SIZE = int(os.getenv("STREAM_WRITE_BATCH_SIZE", "32"))
+# On a first ingestion the vector backend is chosen before any file is
+# parsed, from the file count times this many symbols per file.
+STREAM_SYMBOLS_PER_FILE_ESTIMATE = float(os.getenv("STREAM_SYMBOLS_PER_FILE_ESTIMATE", "10"))
+
+# Marks the end of a queue
+_END = None
+
+# --- Source Enumeration ---
+
+def _parse_and_hash(file_path: str, source: Optional[str] = None):
+    """Parses one file (or in-memory source) and hashes it; None if that fails."""
+    try:
+        parsed = parse_file(file_path) if source is None else parse_source(source, file_path)
+        return parsed, create_hashes_from_parse_result(parsed)
+    except Exception as e:
+        print(f"Could not parse or hash file {file_path}: {e}")
+        return None, None
+
+def _open_sources(state: GraphState, old_hashes: Dict[str, Any]) -> Tuple[Iterator, Optional[int], Set[str]]:
+    """
+    Returns (iterator of (file_path, parsed, hashes), expected file count,
+    known files in scope). Known files in scope that the iterator does not
+    yield were removed.
+    """
+    archive_path = state.get("archive_path")
+    changed_paths = state.get("changed_paths")
+    if archive_path:
+        sources = ((name, *_parse_and_hash(name, source)) for name, source in iter_python_members(archive_path))
+        return sources, count_python_members(archive_path), set(old_hashes)
+    if changed_paths is not None:
+        to_hash, affected = _resolve_changed_paths(changed_paths, state["directory"], old_hashes)
+        return ((path, *_parse_and_hash(path)) for path in to_hash), len(to_hash), affected
+    python_files = scan_python_files(state["directory"])
+    return ((path, *_parse_and_hash(path)) for path in python_files), len(python_files), set(old_hashes)
+
+# --- The Pipeline ---
+
+class _IngestionPipeline:
+    """
+    Change detection, summarization and vector writes as concurrent stages
+    joined by bounded queues:
+
+        detect (parse + diff, in a thread) -> summarize (N LLM workers) -> write (batched)
+
+    Removed items skip the summarizers and go straight to the writer.
+    """
+
+    def __init__(self, state: GraphState, old_hashes: Dict[str, Any]):
+        self.state = state
+        self.project_id = state["project_id"]
+        self.old_hashes = old_hashes
+        self.new_hashes: Dict[str, Any] = {}
+        self.summary_queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self.write_queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self.worker_count = max(1, STREAM_SUMMARY_WORKERS)
+        self._workers_left = self.worker_count
+        self.files_scanned = 0
+        self.changes_detected = 0
+        self.summaries_generated = 0
+        self.vectors_written = 0
+        self.vectors_deleted = 0
+
+    def counters(self) -> Dict[str, int]:
+        return {
+            "files_scanned": self.files_scanned,
+            "changes_detected": self.changes_detected,
+            "summaries_generated": self.summaries_generated,
+            "vectors_written": self.vectors_written,
+            "vectors_deleted": self.vectors_deleted,
+        }
+
+    async def run(self):
+        """Runs all stages; if one fails, the others are cancelled."""
+        tasks = [asyncio.ensure_future(self._detect()), asyncio.ensure_future(self._write())]
+        tasks += [asyncio.ensure_future(self._summarize()) for _ in range(self.worker_count)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _detect(self):
+        sources, total, scope = _open_sources(self.state, self.old_hashes)
+        if not self.old_hashes:
+            # Chosen up front, so vectors are written batch by batch from the start
+            select_backend_for_project(self.project_id, int(total * STREAM_SYMBOLS_PER_FILE_ESTIMATE))
+        reporter = progress_reporter(self.state, "detect_changes", total=total, unit="files")
+        while True:
+            # Parsing is CPU-bound; one file at a time in a thread keeps the loop free for the LLM calls.
+            entry = await asyncio.to_thread(next, sources, _END)
+            if entry is _END:
+                break
+            file_path, parsed, hashes = entry
+            self.files_scanned += 1
+            reporter.advance(current_file=file_path)
+            if hashes is None:
+                continue
+            self.new_hashes[file_path] = hashes
+            old = {file_path: self.old_hashes[file_path]} if file_path in self.old_hashes else {}
+            changes = detect_changes(old, {file_path: hashes})
+            metrics.record_ingestion_changes(self.project_id, 1, changes)
+            await self._dispatch(changes, parsed, file_path)
+
+        removed = {p: self.old_hashes[p] for p in scope if p in self.old_hashes and p not in self.new_hashes}
+        removed_changes = detect_changes(removed, {})
+        metrics.record_ingestion_changes(self.project_id, 0, removed_changes)
+        await self._dispatch(removed_changes, None, None)
+        reporter.finish()
+
+        self.final_hashes = {p: h for p, h in self.old_hashes.items() if p not in scope}
+        self.final_hashes.update(self.new_hashes)
+        for _ in range(self.worker_count):
+            await self.summary_queue.put(_END)
+
+    async def _dispatch(self, changes, parsed, file_path):
+        self.changes_detected += len(changes)
+        for change in changes:
+            if change.change_type == 'removed':
+                await self.write_queue.put(("removed", change))
+        if parsed is not None:
+            for item, item_type, class_name in find_items_to_summarize(parsed, changes):
+                await self.summary_queue.put((item, file_path, item_type, class_name))
+
+    async def _summarize(self):
+        reporter = progress_reporter(self.state, "summarize_changes", total=None, unit="summaries")
+        try:
+            while True:
+                work = await self.summary_queue.get()
+                if work is _END:
+                    break
+                summary = await create_summary_task(*work)
+                self.summaries_generated += 1
+                reporter.advance(current_file=summary.file_path)
+                await self.write_queue.put(("summary", summary))
+        finally:
+            self._workers_left -= 1
+        if self._workers_left == 0:
+            reporter.finish()
+            await self.write_queue.put(_END)
+
+    async def _write(self):
+        db_path = _get_summary_db_path(self.project_id)
+        summary_db = _load_project_summaries(db_path)
+        reporter = progress_reporter(self.state, "ingest_vector_updates", total=None, unit="vectors")
+        vector_store = None
+        ids_to_delete: List[str] = []
+        ids_to_add: List[str] = []
+        docs_to_add: List[Any] = []
+
+        finished = False
+        while not finished:
+            batch = [await self.write_queue.get()]
+            while len(batch) < STREAM_WRITE_BATCH_SIZE and not self.write_queue.empty():
+                batch.append(self.write_queue.get_nowait())
+            if batch[-1] is _END:
+                batch.pop()
+                finished = True
+
+            for kind, payload in batch:
+                if kind == "removed":
+                    apply_removed_change(summary_db, payload)
+                    ids_to_delete.append(_get_doc_id(payload))
+                    continue
+                apply_summary(summary_db, payload)
+                doc_id, document = summary_to_document(payload)
+                if doc_id:
+                    # Delete the old version of modified items before adding the new one
+                    ids_to_delete.append(doc_id)
+                    ids_to_add.append(doc_id)
+                    docs_to_add.append(document)
+
+            if ids_to_delete or docs_to_add:
+                if vector_store is None:
+                    vector_store = get_vector_store(self.project_id)
+                # Embedding is CPU-bound; run it off the event loop.
+                await asyncio.to_thread(_write_vectors, vector_store, list(set(ids_to_delete)), ids_to_add, docs_to_add)
+                self.vectors_deleted += len(set(ids_to_delete))
+                self.vectors_written += len(docs_to_add)
+                reporter.advance(len(docs_to_add))
+                ids_to_delete, ids_to_add, docs_to_add = [], [], []
+
+        _save_project_summaries(db_path, summary_db)
+        reporter.finish()
+
+def _write_vectors(vector_store, ids_to_delete: List[str], ids_to_add: List[str], docs_to_add: List[Any]):
+    if ids_to_delete:
+        vector_store.delete_summaries(ids_to_delete)
+    if docs_to_add:
+        vector_store.add_documents(documents=docs_to_add, ids=ids_to_add)
+
+# --- The LangGraph Node ---
+
+async def streaming_ingestion_node(state: GraphState) -> Dict:
+    """
+    A LangGraph node that runs the whole incremental ingestion as a pipeline:
+    files are parsed, summarized and embedded as they stream through bounded
+    queues, so the parser, the LLM and the embedder work at the same time
+    and wall time approaches that of the slowest stage. Produces the same
+    hashes, summaries database and vectors as the staged graph, but only
+    counters (not the change and summary lists) are kept in the graph state.
+    """
+    print("--- Streaming Ingestion Node Triggered ---")
+    project_id = state.get("project_id")
+    directory = state.get("directory")
+    archive_path = state.get("archive_path")
+
+    if not project_id:
+        raise ValueError("Error: project_id not found in graph state.")
+    if archive_path:
+        if not os.path.isfile(archive_path):
+            print(f"Error: Archive '{archive_path}' does not exist.")
+            return {"files_scanned": 0, "ingestion_status": "skipped"}
+    elif not directory or not os.path.isdir(directory):
+        print(f"Error: Directory '{directory}' not provided or does not exist.")
+        return {"files_scanned": 0, "ingestion_status": "skipped"}
+
+    project_data_dir = f"project_data/{project_id}"
+    os.makedirs(project_data_dir, exist_ok=True)
+    hashes_file_path = os.path.join(project_data_dir, "code_hashes.json")
+    old_hashes = _load_project_hashes(hashes_file_path)
+    print(f"Loaded hashes for {len(old_hashes)} files for project {project_id}.")
+
+    pipeline = _IngestionPipeline(state, old_hashes)
+    try:
+        await pipeline.run()
+    except Exception as e:
+        error_message = f"An error occurred during streaming ingestion: {e}"
+        print(error_message)
+        return {**pipeline.counters(), "ingestion_status": "error", "error_message": str(e)}
+
+    # Hashes are saved last, so a failed run is retried in full next time
+    _save_project_hashes(hashes_file_path, pipeline.final_hashes)
+    root = "" if archive_path else os.path.abspath(directory)
+    save_symbol_index(project_id, build_symbol_entries(pipeline.final_hashes), root=root)
+    print(f"Streamed {pipeline.files_scanned} files, {pipeline.changes_detected} changes and "
+          f"{pipeline.summaries_generated} summaries for project {project_id}.")
+    return {**pipeline.counters(), "ingestion_status": "success"}
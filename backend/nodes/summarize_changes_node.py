@@ -2,16 +2,13 @@
 
 import asyncio
 import time
-from typing import List, Dict, Any, Union
-
-# --- LangChain and LLM Imports ---
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, Union
 
 from .change_detection_node import GraphState, ChangedItem
 from ..summarizer.models import FunctionSummary, ClassSummary, MethodSummary
-from ..parser.parser import parse_file
+from ..parser.archive import iter_parsed_files
+from ..jobs.progress import progress_reporter
 
 # --- Configuration for Rate Limiting ---
 # Delay in seconds between each API call to avoid hitting rate limits.
@@ -19,12 +16,36 @@ from ..parser.parser import parse_file
 API_CALL_DELAY = 1.1
 
 # --- Real LLM Utility ---
-llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.2)
-prompt = ChatPromptTemplate.from_messages([
-    ("system", "You are an expert code assistant. Summarize the following code snippet in 1-2 concise sentences, explaining its primary purpose and functionality."),
-    ("human", "Code snippet:\n\n```python\n{code_snippet}\n```"),
-])
-summarizer_chain = prompt | llm | StrOutputParser()
+# Built on the first summary rather than at import time: LangChain and the
+# Gemini client are slow to import and the client needs credentials.
+
+@lru_cache(maxsize=None)
+def get_llm():
+    """Returns the shared summarization LLM, creating it on first use."""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from ..core.llm_metrics import LLMMetricsCallback
+    model = "gemini-2.0-flash"
+    return ChatGoogleGenerativeAI(model=model, temperature=0.2, callbacks=[LLMMetricsCallback("summary", model=model)])
+
+@lru_cache(maxsize=None)
+def get_summarizer_chain():
+    """Returns the prompt | LLM | parser chain that summarizes one code block."""
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "You are an expert code assistant. Summarize the following code snippet in 1-2 concise sentences, explaining its primary purpose and functionality."),
+        ("human", "Code snippet:\n\n```python\n{code_snippet}\n```"),
+    ])
+    return prompt | get_llm() | StrOutputParser()
+
+# Names that used to be built at import time
+_LAZY_ATTRIBUTES = {"llm": get_llm, "summarizer_chain": get_summarizer_chain}
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 async def summarize_code_with_llm(code: str) -> str:
     """
@@ -32,7 +53,7 @@ async def summarize_code_with_llm(code: str) -> str:
     Includes a delay to manage API rate limits.
     """
     try:
-        summary = await summarizer_chain.ainvoke({"code_snippet": code})
+        summary = await get_summarizer_chain().ainvoke({"code_snippet": code})
         await asyncio.sleep(API_CALL_DELAY)
         return summary
     except Exception as e:
@@ -40,6 +61,31 @@ async def summarize_code_with_llm(code: str) -> str:
         await asyncio.sleep(API_CALL_DELAY)
         return "Error: Could not generate summary."
 
+def find_items_to_summarize(parsed_result: Any, changes: List[ChangedItem]) -> List[Tuple[Any, str, Optional[str]]]:
+    """
+    Looks up the parsed function, class or method behind each added or
+    modified change of one file. Returns (item, item_type, class_name) tuples.
+    """
+    items = []
+    for change in changes:
+        if change.change_type not in ('added', 'modified'):
+            continue
+        if change.item_type == 'function':
+            item = next((f for f in parsed_result.functions if f.name == change.item_name), None)
+            if item: items.append((item, 'function', None))
+
+        elif change.item_type == 'class':
+            item = next((c for c in parsed_result.classes if c.name == change.item_name), None)
+            if item: items.append((item, 'class', None))
+
+        elif change.item_type == 'method':
+            for cls in parsed_result.classes:
+                item = next((m for m in cls.methods if m.name == change.item_name), None)
+                if item:
+                    items.append((item, 'method', cls.name))
+                    break
+    return items
+
 # --- The LangGraph Node (Now fully asynchronous) ---
 async def summarize_changes_node(state: GraphState) -> Dict[str, List]:
     """
@@ -55,35 +101,31 @@ async def summarize_changes_node(state: GraphState) -> Dict[str, List]:
             changes_by_file[change.file_path] = []
         changes_by_file[change.file_path].append(change)
 
-    for file_path, file_changes in changes_by_file.items():
-        items_to_summarize = [c for c in file_changes if c.change_type in ('added', 'modified')]
-        if not items_to_summarize:
-            continue
+    files_to_parse = [
+        file_path for file_path, file_changes in changes_by_file.items()
+        if any(c.change_type in ('added', 'modified') for c in file_changes)
+    ]
 
+    # Files are read from disk, or streamed from the uploaded archive in one pass
+    for file_path, parsed_result in iter_parsed_files(files_to_parse, archive_path=state.get("archive_path")):
         try:
-            parsed_result = parse_file(file_path)
-            for change in items_to_summarize:
-                if change.item_type == 'function':
-                    item = next((f for f in parsed_result.functions if f.name == change.item_name), None)
-                    if item: tasks.append(create_summary_task(item, file_path, 'function'))
-                
-                elif change.item_type == 'class':
-                    item = next((c for c in parsed_result.classes if c.name == change.item_name), None)
-                    if item: tasks.append(create_summary_task(item, file_path, 'class'))
-
-                elif change.item_type == 'method':
-                    for cls in parsed_result.classes:
-                        item = next((m for m in cls.methods if m.name == change.item_name), None)
-                        if item:
-                            tasks.append(create_summary_task(item, file_path, 'method', cls.name))
-                            break
+            for item, item_type, class_name in find_items_to_summarize(parsed_result, changes_by_file[file_path]):
+                tasks.append(create_summary_task(item, file_path, item_type, class_name))
         except Exception as e:
             print(f"Error while preparing summaries for {file_path}: {e}")
 
+    reporter = progress_reporter(state, "summarize_changes", total=len(tasks), unit="summaries")
+
+    async def tracked(task):
+        summary = await task
+        reporter.advance(current_file=summary.file_path)
+        return summary
+
     summaries = []
     if tasks:
         # Run all summarization tasks concurrently
-        summaries = await asyncio.gather(*tasks)
+        summaries = await asyncio.gather(*(tracked(task) for task in tasks))
+    reporter.finish()
     
     print(f"Generated {len(summaries)} new/updated summaries.")
     return {"summaries": summaries}
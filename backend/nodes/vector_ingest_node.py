@@ -78,22 +78,46 @@
 #         print(error_message)
 #         return {**state, "ingestion_status": "error", "error_message": str(e)}
 
-from typing import Dict, List, Any
+import asyncio
+from typing import Dict, List, Any, Optional, Tuple
 
-# Import the VectorStore class (not an instance)
-from backend.vectorstore.store import VectorStore
+from langchain_core.documents import Document
+
+# Import the per-project vector store factory (Chroma or flat index)
+from backend.vectorstore.factory import get_vector_store
 # Import the graph state and data models from our updated change detection node
 from backend.nodes.change_detection_node import GraphState, ChangedItem
 from backend.summarizer.models import FunctionSummary, ClassSummary, MethodSummary
+from backend.jobs.progress import progress_reporter
 
 def _get_doc_id(change: ChangedItem) -> str:
     """Creates a unique, consistent ID for a document based on its metadata."""
     # Use the class_name from the ChangedItem for methods to ensure consistency.
-    if change.item_type == 'method' and change.class_name:
+    if change.item_type == 'method' and getattr(change, 'class_name', None):
         return f"{change.file_path}::{change.class_name}::{change.item_name}"
     # Fallback for functions, classes, or if class_name is somehow missing
     return f"{change.file_path}::{change.item_name}"
 
+def summary_to_document(summary_item: Any) -> Tuple[Optional[str], Optional[Document]]:
+    """Builds the vector store ID and document for one summary."""
+    summary_dict = summary_item.dict() if hasattr(summary_item, 'dict') else summary_item
+    
+    doc_id, metadata = None, {}
+    
+    if 'method_name' in summary_dict:
+        metadata = {"source": summary_dict['file_path'], "type": "method", "class": summary_dict['class_name'], "name": summary_dict['method_name']}
+        doc_id = f"{summary_dict['file_path']}::{summary_dict['class_name']}::{summary_dict['method_name']}"
+    elif 'function_name' in summary_dict:
+        metadata = {"source": summary_dict['file_path'], "type": "function", "name": summary_dict['function_name']}
+        doc_id = f"{summary_dict['file_path']}::{summary_dict['function_name']}"
+    elif 'class_name' in summary_dict:
+        metadata = {"source": summary_dict['file_path'], "type": "class", "name": summary_dict['class_name']}
+        doc_id = f"{summary_dict['file_path']}::{summary_dict['class_name']}"
+
+    if not doc_id:
+        return None, None
+    return doc_id, Document(page_content=summary_dict['summary'], metadata=metadata)
+
 async def vector_ingest_node(state: GraphState) -> Dict:
     """
     An incremental LangGraph node that updates the vector store based on
@@ -108,8 +132,8 @@ async def vector_ingest_node(state: GraphState) -> Dict:
         print("Error: project_id not found in state. Skipping vector store update.")
         return {**state, "ingestion_status": "error", "error_message": "Project ID missing."}
 
-    # Instantiate the VectorStore for the specific project
-    vector_store = VectorStore(project_id=project_id)
+    # Get the vector store (Chroma or flat index) for the specific project
+    vector_store = get_vector_store(project_id)
 
     if not changes and not new_summaries:
         print("No changes or summaries to process. Skipping vector store update.")
@@ -120,23 +144,10 @@ async def vector_ingest_node(state: GraphState) -> Dict:
         docs_to_add = []
         ids_of_modified_items = []
         for summary_item in new_summaries:
-            summary_dict = summary_item.dict() if hasattr(summary_item, 'dict') else summary_item
-            
-            doc_id, metadata = None, {}
-            
-            if 'method_name' in summary_dict:
-                metadata = {"source": summary_dict['file_path'], "type": "method", "class": summary_dict['class_name'], "name": summary_dict['method_name']}
-                doc_id = f"{summary_dict['file_path']}::{summary_dict['class_name']}::{summary_dict['method_name']}"
-            elif 'function_name' in summary_dict:
-                metadata = {"source": summary_dict['file_path'], "type": "function", "name": summary_dict['function_name']}
-                doc_id = f"{summary_dict['file_path']}::{summary_dict['function_name']}"
-            elif 'class_name' in summary_dict:
-                metadata = {"source": summary_dict['file_path'], "type": "class", "name": summary_dict['class_name']}
-                doc_id = f"{summary_dict['file_path']}::{summary_dict['class_name']}"
-
+            doc_id, document = summary_to_document(summary_item)
             if doc_id:
                 ids_of_modified_items.append(doc_id)
-                docs_to_add.append({"text": summary_dict['summary'], "metadata": metadata})
+                docs_to_add.append(document)
 
         # --- Step 2: Prepare list of all documents to be deleted ---
         # This includes items explicitly marked as 'removed' from the change detector...
@@ -145,16 +156,29 @@ async def vector_ingest_node(state: GraphState) -> Dict:
         unique_ids_to_delete = list(set(ids_from_removed + ids_of_modified_items))
         
         # --- Step 3: Execute DB operations ---
+        # Embedding is CPU-bound; run the store calls off the event loop so
+        # progress events and the job's lock heartbeat keep flowing.
+        reporter = progress_reporter(
+            state, "ingest_vector_updates", total=len(unique_ids_to_delete) + len(docs_to_add), unit="vectors"
+        )
         if unique_ids_to_delete:
             print(f"Deleting {len(unique_ids_to_delete)} old/removed summaries from vector store.")
-            vector_store.delete_summaries(unique_ids_to_delete)
+            await asyncio.to_thread(vector_store.delete_summaries, unique_ids_to_delete)
+            reporter.advance(len(unique_ids_to_delete))
         
         if docs_to_add:
             print(f"Adding/updating {len(docs_to_add)} summaries in vector store.")
-            vector_store.add_summaries(docs_to_add)
+            await asyncio.to_thread(vector_store.add_documents, documents=docs_to_add, ids=ids_of_modified_items)
+            reporter.advance(len(docs_to_add))
+        reporter.finish()
         
         print("--- Vector Ingestion Node Completed Successfully ---")
-        return {**state, "ingestion_status": "success"}
+        return {
+            **state,
+            "ingestion_status": "success",
+            "vectors_written": len(docs_to_add),
+            "vectors_deleted": len(unique_ids_to_delete)
+        }
 
     except Exception as e:
         error_message = f"An error occurred during vector store ingestion: {e}"
@@ -0,0 +1,130 @@
+import os
+import posixpath
+import tarfile
+import zipfile
+from typing import Iterable, Iterator, Optional, Set, Tuple
+
+from .models import FileParseResult
+from .parser import parse_file, parse_source
+from .scanner import is_ignored_dir
+
+# --- Configuration ---
+# Members larger than this are skipped rather than read into memory; generated
+# or vendored modules of that size are not worth summarizing anyway.
+ARCHIVE_MAX_MEMBER_BYTES = int(os.getenv("ARCHIVE_MAX_MEMBER_BYTES", str(5 * 1024 * 1024)))
+
+ARCHIVE_FORMATS = ("zip", "tar")
+
+
+def detect_archive_format(archive_path: str) -> Optional[str]:
+    """Returns 'zip' or 'tar' (any compression) by sniffing the file, or None."""
+    if zipfile.is_zipfile(archive_path):
+        return "zip"
+    try:
+        if tarfile.is_tarfile(archive_path):
+            return "tar"
+    except (OSError, tarfile.TarError):
+        pass
+    return None
+
+
+def normalize_member_name(name: str) -> Optional[str]:
+    """
+    Maps an archive member name to the archive-relative path used as its key
+    (e.g. './pkg/mod.py' -> 'pkg/mod.py'). Returns None for members the
+    scanner would skip: non-Python files, ignored directories, and absolute
+    or parent-relative names.
+    """
+    name = name.replace("\\", "/")
+    if name.startswith("/") or not name.endswith(".py"):
+        return None
+    name = posixpath.normpath(name)
+    parts = name.split("/")
+    if parts[0] == os.pardir or any(is_ignored_dir(part) for part in parts[:-1]):
+        return None
+    return name
+
+
+def count_python_members(archive_path: str) -> Optional[int]:
+    """
+    Number of Python members, when it is cheap to know: zip archives list
+    them in their central directory. Tar archives would need a full
+    decompression pass, so they return None.
+    """
+    if detect_archive_format(archive_path) != "zip":
+        return None
+    with zipfile.ZipFile(archive_path) as archive:
+        return sum(1 for info in archive.infolist() if not info.is_dir() and normalize_member_name(info.filename))
+
+
+def iter_python_members(archive_path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yields (archive-relative path, source code) for every Python member in a
+    single sequential pass, holding at most one member in memory. Tar
+    archives are read as a stream, so compressed tarballs are never seeked.
+    Members that are too large or not valid UTF-8 are logged and skipped.
+    """
+    archive_format = detect_archive_format(archive_path)
+    if archive_format == "zip":
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                name = None if info.is_dir() else normalize_member_name(info.filename)
+                if name is None:
+                    continue
+                if info.file_size > ARCHIVE_MAX_MEMBER_BYTES:
+                    print(f"Skipping archive member {name}: {info.file_size} bytes exceeds the limit.")
+                    continue
+                with archive.open(info) as member:
+                    source = _decode_member(name, member.read())
+                if source is not None:
+                    yield name, source
+    elif archive_format == "tar":
+        with tarfile.open(archive_path, mode="r|*") as archive:
+            for info in archive:
+                name = normalize_member_name(info.name) if info.isfile() else None
+                if name is None:
+                    continue
+                if info.size > ARCHIVE_MAX_MEMBER_BYTES:
+                    print(f"Skipping archive member {name}: {info.size} bytes exceeds the limit.")
+                    continue
+                member = archive.extractfile(info)
+                source = _decode_member(name, member.read()) if member else None
+                if source is not None:
+                    yield name, source
+    else:
+        raise ValueError(f"'{archive_path}' is not a zip or tar archive.")
+
+
+def _decode_member(name: str, data: bytes) -> Optional[str]:
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError as e:
+        print(f"Skipping archive member {name}: {e}")
+        return None
+
+
+def iter_parsed_files(file_paths: Iterable[str], archive_path: Optional[str] = None) -> Iterator[Tuple[str, FileParseResult]]:
+    """
+    Parses the given files, from disk or, with `archive_path`, from the
+    archive members of those names (one pass over the archive). Yields
+    (file path, parse result); files that fail to parse are logged and skipped.
+    """
+    if archive_path is None:
+        for file_path in file_paths:
+            try:
+                yield file_path, parse_file(file_path)
+            except Exception as e:
+                print(f"Could not parse file {file_path}: {e}")
+        return
+
+    wanted: Set[str] = set(file_paths)
+    for name, source in iter_python_members(archive_path):
+        if name not in wanted:
+            continue
+        try:
+            yield name, parse_source(source, name)
+        except Exception as e:
+            print(f"Could not parse archive member {name}: {e}")
+        wanted.discard(name)
+        if not wanted:
+            return
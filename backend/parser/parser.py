@@ -1,4 +1,5 @@
 import ast
+import io
 from typing import List
 from .models import ClassInfo, FunctionInfo, FileParseResult
 import ast
@@ -22,10 +23,18 @@ def parse_file(file_path: str) -> FileParseResult:
     including their full source code.
     """
     with open(file_path, "r", encoding="utf-8") as source_file:
-        source_lines = source_file.readlines()
-        # Join lines to pass to ast.parse, which expects a single string
-        source_code = "".join(source_lines)
+        source_code = source_file.read()
 
+    return parse_source(source_code, file_path)
+
+def parse_source(source_code: str, file_path: str) -> FileParseResult:
+    """
+    Parses Python source code that does not live on disk (e.g. an archive
+    member); `file_path` is only used as its label.
+    """
+    # Split like a text-mode file read; str.splitlines would also break on
+    # form feeds and unicode separators and shift ast line numbers.
+    source_lines = io.StringIO(source_code, newline=None).readlines()
     tree = ast.parse(source_code, filename=file_path)
 
     top_level_functions = []
@@ -1,6 +1,25 @@
 import os
 from typing import List
 
+# Common directories to ignore
+IGNORED_DIRS = {'__pycache__', 'venv'}
+
+def is_ignored_dir(dirname: str) -> bool:
+    """True for directory names the scanner never descends into."""
+    return dirname in IGNORED_DIRS or dirname.startswith('.')
+
+def is_scanned_python_file(file_path: str, base_path: str) -> bool:
+    """
+    True if `scan_python_files(base_path)` would return this path: a `.py`
+    file that is not inside an ignored directory below `base_path`.
+    """
+    if not file_path.endswith(".py"):
+        return False
+    relative = os.path.relpath(os.path.abspath(file_path), os.path.abspath(base_path))
+    if relative.startswith(os.pardir):
+        return False
+    return not any(is_ignored_dir(part) for part in relative.split(os.sep)[:-1])
+
 def scan_python_files(base_path: str) -> List[str]:
     """
     Recursively scans a directory for Python (.py) files.
@@ -17,14 +36,11 @@ def scan_python_files(base_path: str) -> List[str]:
     python_files = []
     # Ensure the base_path is absolute to build correct absolute paths for found files
     abs_base_path = os.path.abspath(base_path)
-    
-    # Common directories to ignore
-    ignored_dirs = {'__pycache__', 'venv'}
 
     for root, dirnames, filenames in os.walk(abs_base_path, topdown=True):
         # Exclude specific directories from traversal
         # We modify dirnames in-place to prevent os.walk from visiting them
-        dirnames[:] = [d for d in dirnames if d not in ignored_dirs and not d.startswith('.')]
+        dirnames[:] = [d for d in dirnames if not is_ignored_dir(d)]
 
         for filename in filenames:
             if filename.endswith(".py"):
@@ -0,0 +1,118 @@
+import fnmatch
+import os
+from typing import List, Dict, Any, Optional, Iterable
+
+from backend.schemas import SearchFilters
+from backend.query.symbol_index import load_symbol_index
+
+# Sentinel returned by `build_where_clause` when the filters cannot match any
+# record (e.g. a path prefix that no ingested file starts with). Callers should
+# skip the vector query entirely in that case.
+MATCH_NOTHING: Dict[str, Any] = {"__match_nothing__": True}
+
+
+def _normalize_path(path: str) -> str:
+    """Uses forward slashes so prefixes and globs behave the same on every OS."""
+    return path.replace("\\", "/")
+
+
+def _under_prefix(path: str, prefix: str) -> bool:
+    """True if `path` is `prefix` itself or lies inside it as a directory."""
+    prefix = prefix.rstrip("/")
+    return path == prefix or path.startswith(prefix + "/")
+
+
+def resolve_source_paths(filters: SearchFilters, known_sources: Iterable[str],
+                         root: Optional[str] = None) -> Optional[List[str]]:
+    """
+    Resolves the path prefix and file glob filters against the project's known
+    source files.
+
+    Chroma metadata filters only support equality and set membership, so path
+    based filters are expanded here into the explicit list of matching `source`
+    values. Prefixes and globs are matched against both the absolute path and
+    the path relative to `root`, the directory the project was ingested from
+    ("" when the sources are already relative). Indexes written before the
+    root was recorded fall back to the common directory of all files.
+
+    Returns None if no path based filter was given.
+    """
+    if not filters.path_prefix and not filters.file_globs:
+        return None
+
+    sources = sorted(set(known_sources))
+    if not sources:
+        return []
+
+    if root is None:
+        root = os.path.dirname(os.path.commonprefix(sources)) if len(sources) > 1 else os.path.dirname(sources[0])
+    root = _normalize_path(root).rstrip("/") + "/" if root else ""
+    prefix = _normalize_path(filters.path_prefix) if filters.path_prefix else None
+    globs = [_normalize_path(g) for g in filters.file_globs or []]
+
+    matched = []
+    for source in sources:
+        absolute = _normalize_path(source)
+        relative = absolute[len(root):] if root and absolute.startswith(root) else absolute
+
+        if prefix and not (_under_prefix(absolute, prefix) or _under_prefix(relative, prefix.removeprefix("./"))):
+            continue
+        if globs and not any(fnmatch.fnmatch(relative, g) or fnmatch.fnmatch(absolute, g) for g in globs):
+            continue
+        matched.append(source)
+    return matched
+
+
+def compile_where_clause(filters: Optional[SearchFilters], known_sources: Iterable[str] = (),
+                         root: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Compiles search filters into a Chroma `where` clause.
+
+    Returns None when there is nothing to filter on, and `MATCH_NOTHING` when
+    the path filters rule out every file in the project.
+    """
+    if filters is None:
+        return None
+
+    conditions = []
+
+    if filters.kinds:
+        kinds = sorted(set(filters.kinds))
+        conditions.append({"type": kinds[0]} if len(kinds) == 1 else {"type": {"$in": kinds}})
+
+    if filters.class_name:
+        # Methods carry their owning class in `class`; the class record itself
+        # only has its name, so match both.
+        conditions.append({"$or": [
+            {"class": filters.class_name},
+            {"$and": [{"type": "class"}, {"name": filters.class_name}]},
+        ]})
+
+    sources = resolve_source_paths(filters, known_sources, root)
+    if sources is not None:
+        if not sources:
+            return MATCH_NOTHING
+        conditions.append({"source": sources[0]} if len(sources) == 1 else {"source": {"$in": sources}})
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+def build_where_clause(project_id: int, filters: Optional[SearchFilters]) -> Optional[Dict[str, Any]]:
+    """
+    Compiles filters for a project, resolving path filters against the files
+    and ingestion root recorded in the project's symbol index.
+    """
+    if filters is None:
+        return None
+
+    known_sources: List[str] = []
+    root = None
+    if filters.path_prefix or filters.file_globs:
+        index = load_symbol_index(project_id)
+        if index is not None:
+            known_sources, root = index.file_paths(), index.root
+    return compile_where_clause(filters, known_sources, root)
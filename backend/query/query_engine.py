@@ -1,45 +1,293 @@
-from typing import List, Dict, Any
+import asyncio
+import os
+import time
+from typing import List, Dict, Any, Optional, Tuple
 
-# Import the VectorStore class (not an instance)
-from backend.vectorstore.store import VectorStore
+# Import the per-project vector store factory (Chroma or flat index)
+from backend.vectorstore.factory import get_vector_store
+from backend.query.filters import build_where_clause, MATCH_NOTHING
+from backend.schemas import SearchFilters
+from backend.core import metrics
 
-def search_relevant_summaries(project_id: int, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+# --- Context Packing Configuration ---
+# How many candidates to retrieve before packing the context.
+CONTEXT_CANDIDATES = int(os.getenv("CONTEXT_CANDIDATES", "20"))
+# Approximate prompt budget for the context block, in tokens.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200"))
+# Chroma's default distance is squared L2; on normalized MiniLM embeddings that
+# is 2 - 2 * cosine, so 1.2 keeps results with a cosine similarity above 0.4.
+CONTEXT_MAX_DISTANCE = float(os.getenv("CONTEXT_MAX_DISTANCE", "1.2"))
+# Trade-off between relevance (1.0) and diversity (0.0) for MMR ordering.
+CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))
+
+# --- Cross-Project Search Configuration ---
+# How many project indexes are searched at the same time.
+CROSS_PROJECT_MAX_CONCURRENCY = int(os.getenv("CROSS_PROJECT_MAX_CONCURRENCY", "4"))
+# Overall time budget for a cross-project search; projects that have not
+# answered by then are reported as timed out and left out of the results.
+CROSS_PROJECT_DEADLINE_SECONDS = float(os.getenv("CROSS_PROJECT_DEADLINE_SECONDS", "2.0"))
+
+NO_CONTEXT_MESSAGE = "No relevant context found in the codebase for this question."
+CONTEXT_HEADER = "Here is some relevant context from the codebase summaries:\n\n"
+
+def search_relevant_summaries(
+    project_id: int,
+    query: str,
+    top_k: int = 5,
+    filters: Optional[SearchFilters] = None,
+    include_embeddings: bool = False
+) -> List[Dict[str, Any]]:
     """
     Searches the vector store for a given project for code summaries that are
-    most relevant to the user's query.
+    most relevant to the user's query. Optional filters are compiled into a
+    Chroma `where` clause so they are applied inside the index.
     """
     print(f"--- Searching summaries for project_id '{project_id}' relevant to query: '{query}' ---")
+
+    # 1. Compile the filters; bail out early if they rule out every file
+    where = build_where_clause(project_id, filters)
+    if where is MATCH_NOTHING:
+        print("Filters match no files in this project. Skipping vector search.")
+        return []
+
+    # 2. Instantiate the VectorStore for the specific project
+    vector_store = get_vector_store(project_id)
     
-    # 1. Instantiate the VectorStore for the specific project
-    vector_store = VectorStore(project_id=project_id)
-    
-    # 2. Use the search method of the project-specific instance
-    results = vector_store.search(query, top_k=top_k)
+    # 3. Use the search method of the project-specific instance
+    results = vector_store.search(query, top_k=top_k, where=where, include_embeddings=include_embeddings)
     
     print(f"Found {len(results)} relevant summaries.")
     return results
 
+def search_relevant_summaries_batch(
+    project_id: int,
+    queries: List[str],
+    top_k: int = 5,
+    filters: Optional[SearchFilters] = None,
+    include_embeddings: bool = False
+) -> List[List[Dict[str, Any]]]:
+    """
+    Batch variant of `search_relevant_summaries`: all queries share one
+    VectorStore, one embedding call and one Chroma lookup.
+    """
+    print(f"--- Searching summaries for project_id '{project_id}' for a batch of {len(queries)} queries ---")
+
+    where = build_where_clause(project_id, filters)
+    if where is MATCH_NOTHING:
+        print("Filters match no files in this project. Skipping vector search.")
+        return [[] for _ in queries]
+
+    vector_store = get_vector_store(project_id)
+    results = vector_store.search_many(queries, top_k=top_k, where=where, include_embeddings=include_embeddings)
+
+    print(f"Found {sum(len(r) for r in results)} relevant summaries across the batch.")
+    return results
+
+def embed_queries(queries: List[str]) -> List[List[float]]:
+    """Embeds queries with the shared embedding model, in one call."""
+    # Imported lazily so the flat backend does not pull in Chroma on import.
+    import numpy as np
+    from backend.vectorstore.embeddings import get_embedding
+
+    embedding_function = get_embedding()
+    if embedding_function is None:
+        raise RuntimeError("Embedding model is not available.")
+    with metrics.time_embedding("query", len(queries)):
+        vectors = embedding_function(queries)
+    return [np.asarray(vector, dtype=np.float32).tolist() for vector in vectors]
+
+def _search_project_by_embedding(
+    project_id: int,
+    query_embedding: List[float],
+    top_k: int,
+    filters: Optional[SearchFilters],
+    include_embeddings: bool
+) -> List[Dict[str, Any]]:
+    """Searches one project's index with an already computed query embedding."""
+    where = build_where_clause(project_id, filters)
+    if where is MATCH_NOTHING:
+        return []
+    vector_store = get_vector_store(project_id)
+    results = vector_store.search_by_embeddings(
+        [query_embedding], top_k=top_k, where=where, include_embeddings=include_embeddings
+    )[0]
+    for result in results:
+        result["project_id"] = project_id
+    return results
+
+async def search_across_projects(
+    project_ids: List[int],
+    query: str,
+    top_k: int = 5,
+    filters: Optional[SearchFilters] = None,
+    include_embeddings: bool = False,
+    max_concurrency: int = CROSS_PROJECT_MAX_CONCURRENCY,
+    deadline_seconds: float = CROSS_PROJECT_DEADLINE_SECONDS
+) -> Dict[str, Any]:
+    """
+    Searches several projects for one query. The query is embedded once, the
+    project indexes are searched concurrently (at most `max_concurrency` at a
+    time) and the results are merged by distance, each tagged with its
+    `project_id`.
+
+    The deadline covers the whole call. Projects still running when it
+    expires are listed under `timed_out` and projects whose search raised
+    are listed under `failed`. Neither blocks the results from the others.
+    """
+    print(f"--- Searching {len(project_ids)} projects relevant to query: '{query}' ---")
+    if not project_ids:
+        return {"results": [], "timed_out": [], "failed": []}
+
+    started = time.monotonic()
+    query_embedding = (await asyncio.to_thread(embed_queries, [query]))[0]
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def search_one(project_id: int):
+        async with semaphore:
+            return await asyncio.to_thread(
+                _search_project_by_embedding, project_id, query_embedding, top_k, filters, include_embeddings
+            )
+
+    tasks = {asyncio.create_task(search_one(project_id)): project_id for project_id in project_ids}
+    remaining = max(deadline_seconds - (time.monotonic() - started), 0)
+    done, pending = await asyncio.wait(tasks, timeout=remaining)
+    # Threads already running finish in the background; their results are dropped.
+    for task in pending:
+        task.cancel()
+
+    merged, failed = [], []
+    for task in done:
+        if task.exception() is not None:
+            print(f"Search failed for project {tasks[task]}: {task.exception()}")
+            failed.append(tasks[task])
+            continue
+        merged.extend(task.result())
+    merged.sort(key=lambda r: r['score'])
+
+    timed_out = sorted(tasks[task] for task in pending)
+    if timed_out:
+        print(f"Cross-project search deadline hit; skipped projects {timed_out}.")
+    print(f"Found {len(merged)} relevant summaries across {len(done) - len(failed)} projects.")
+    return {"results": merged[:top_k], "timed_out": timed_out, "failed": sorted(failed)}
+
+def _format_result_block(result: Dict[str, Any]) -> str:
+    """Formats a single search result as one block of the LLM context."""
+    metadata = result['metadata']
+    lines = [f"--- Context from file: {metadata.get('source', 'N/A')} ---"]
+    # Results merged from several projects say which project they came from
+    if result.get('project_name'):
+        lines.append(f"Project: {result['project_name']}")
+    lines.append(f"Type: {metadata.get('type', 'N/A')}")
+    # Add class name if it's a method
+    if metadata.get('type') == 'method':
+        lines.append(f"Class: {metadata.get('class', 'N/A')}")
+    lines.append(f"Name: {metadata.get('name', 'N/A')}")
+    lines.append(f"Summary: {result['text']}")
+    lines.append("---\n\n")
+    return "\n".join(lines)
+
 def format_context_for_llm(search_results: List[Dict[str, Any]]) -> str:
     """
     Formats the search results into a single string to be used as
     context for the language model.
     """
     if not search_results:
-        return "No relevant context found in the codebase for this question."
+        return NO_CONTEXT_MESSAGE
+
+    return CONTEXT_HEADER + "".join(_format_result_block(result) for result in search_results)
 
-    context_str = "Here is some relevant context from the codebase summaries:\n\n"
-    for result in search_results:
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English and code)."""
+    return len(text) // 4 + 1
+
+def _collapse_redundant(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Removes exact duplicate summaries, and methods whose class summary was
+    retrieved with an equal or better distance (the class summary already
+    covers them). Methods that are more relevant than their class are kept.
+    """
+    class_scores = {}
+    for result in results:
         metadata = result['metadata']
-        context_str += f"--- Context from file: {metadata.get('source', 'N/A')} ---\n"
-        context_str += f"Type: {metadata.get('type', 'N/A')}\n"
-        
-        # Add class name if it's a method
+        if metadata.get('type') == 'class':
+            key = (metadata.get('source'), metadata.get('name'))
+            class_scores[key] = min(result['score'], class_scores.get(key, float('inf')))
+
+    collapsed = []
+    seen_texts = set()
+    for result in results:
+        metadata = result['metadata']
+        if result['text'] in seen_texts:
+            continue
         if metadata.get('type') == 'method':
-            context_str += f"Class: {metadata.get('class', 'N/A')}\n"
-            
-        context_str += f"Name: {metadata.get('name', 'N/A')}\n"
-        context_str += f"Summary: {result['text']}\n"
-        context_str += "---\n\n"
-        
-    return context_str
+            parent_score = class_scores.get((metadata.get('source'), metadata.get('class')))
+            if parent_score is not None and parent_score <= result['score']:
+                continue
+        seen_texts.add(result['text'])
+        collapsed.append(result)
+    return collapsed
+
+def _mmr_order(results: List[Dict[str, Any]], mmr_lambda: float) -> List[Dict[str, Any]]:
+    """
+    Orders results by maximal marginal relevance using their stored
+    embeddings, so near-duplicates of already chosen results sink to the end.
+    Falls back to plain distance order when embeddings are missing.
+    """
+    ordered = sorted(results, key=lambda r: r['score'])
+    if len(ordered) < 3 or any(r.get('embedding') is None for r in ordered):
+        return ordered
+
+    # Imported here so the API starts without loading NumPy.
+    import numpy as np
+
+    vectors = np.asarray([r['embedding'] for r in ordered], dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.maximum(norms, 1e-12)
+    similarity = vectors @ vectors.T
+    # Squared L2 on unit vectors -> cosine similarity to the query.
+    relevance = 1.0 - np.asarray([r['score'] for r in ordered], dtype=np.float32) / 2.0
+
+    selected = [0]
+    remaining = list(range(1, len(ordered)))
+    while remaining:
+        redundancy = similarity[np.ix_(remaining, selected)].max(axis=1)
+        scores = mmr_lambda * relevance[remaining] - (1.0 - mmr_lambda) * redundancy
+        best = remaining.pop(int(np.argmax(scores)))
+        selected.append(best)
+    return [ordered[i] for i in selected]
+
+def build_context(
+    search_results: List[Dict[str, Any]],
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+    max_distance: float = CONTEXT_MAX_DISTANCE,
+    mmr_lambda: float = CONTEXT_MMR_LAMBDA
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Builds the LLM context from a pool of candidate results.
+
+    1. Drops results further away than `max_distance`.
+    2. Collapses duplicates and methods already covered by their class.
+    3. Orders the rest by maximal marginal relevance.
+    4. Packs blocks in that order until `token_budget` is used up.
+
+    Returns the context string and the results that made it in.
+    """
+    candidates = [r for r in search_results if r['score'] <= max_distance]
+    candidates = _mmr_order(_collapse_redundant(candidates), mmr_lambda)
+
+    blocks = []
+    packed = []
+    used_tokens = estimate_tokens(CONTEXT_HEADER)
+    for result in candidates:
+        block = _format_result_block(result)
+        block_tokens = estimate_tokens(block)
+        if used_tokens + block_tokens > token_budget:
+            continue
+        blocks.append(block)
+        packed.append(result)
+        used_tokens += block_tokens
 
+    if not packed:
+        return NO_CONTEXT_MESSAGE, []
+    return CONTEXT_HEADER + "".join(blocks), packed
@@ -0,0 +1,231 @@
+import bisect
+import json
+import os
+import re
+from typing import List, Dict, Any, Tuple, Optional
+
+# --- Configuration ---
+SYMBOL_INDEX_FILENAME = "symbol_index.json"
+SYMBOL_INDEX_VERSION = 2
+
+# Separator used when joining symbol names into a single searchable blob.
+# It can never appear in a Python identifier or a qualified name.
+_BLOB_SEPARATOR = "\n"
+
+
+# --- Helper functions for project-specific index files ---
+
+def get_symbol_index_path(project_id: int) -> str:
+    """Constructs the file path for a project's symbol index."""
+    project_data_dir = f"project_data/{project_id}"
+    os.makedirs(project_data_dir, exist_ok=True)
+    return os.path.join(project_data_dir, SYMBOL_INDEX_FILENAME)
+
+
+def build_symbol_entries(hashes: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """
+    Builds (qualified_name, kind) pairs from a project's code hashes.
+
+    Qualified names use the same `path::Class::method` format as the summary
+    database and the vector store IDs, so a symbol found here can be looked up
+    directly in either of them.
+    """
+    entries = []
+    for file_path, file_hashes in hashes.items():
+        for func_name in file_hashes.get("functions", {}):
+            entries.append((f"{file_path}::{func_name}", "function"))
+        for class_name, class_details in file_hashes.get("classes", {}).items():
+            entries.append((f"{file_path}::{class_name}", "class"))
+            for method_name in class_details.get("methods", {}):
+                entries.append((f"{file_path}::{class_name}::{method_name}", "method"))
+    return entries
+
+
+def save_symbol_index(project_id: int, entries: List[Tuple[str, str]], root: Optional[str] = None):
+    """
+    Saves the sorted symbol list for a project and drops any cached copy.
+    `root` is the directory the project was ingested from ("" for archives,
+    whose paths are already relative); path filters are resolved against it.
+    """
+    index_path = get_symbol_index_path(project_id)
+    payload = {"version": SYMBOL_INDEX_VERSION, "root": root, "symbols": sorted(entries)}
+    try:
+        with open(index_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+    except IOError as e:
+        print(f"Error saving symbol index to {index_path}: {e}")
+    _index_cache.pop(project_id, None)
+
+
+def _rebuild_from_hashes(project_id: int) -> bool:
+    """
+    Builds the index from `code_hashes.json` for projects that were ingested
+    before the symbol index existed. Returns False if there is nothing to build.
+    """
+    hashes_file_path = os.path.join(f"project_data/{project_id}", "code_hashes.json")
+    if not os.path.exists(hashes_file_path):
+        return False
+    try:
+        with open(hashes_file_path, "r") as f:
+            hashes = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return False
+    save_symbol_index(project_id, build_symbol_entries(hashes))
+    return True
+
+
+# --- The Index ---
+
+class SymbolIndex:
+    """
+    An in-memory, read-only index over a project's qualified symbol names.
+
+    Prefix lookups are answered with binary search over a sorted key array, so
+    they stay well under a millisecond even for projects with 100k+ symbols.
+    Each symbol is reachable by three keys: its bare name (`withdraw`), its
+    name within the file (`Account::withdraw`) and its full qualified name.
+    Fuzzy lookups run a single compiled regex over a newline-joined blob of
+    bare names, which keeps the scan inside the C regex engine.
+    """
+    def __init__(self, entries: List[Tuple[str, str]], root: Optional[str] = None):
+        self.entries = sorted(entries)
+        self.root = root
+        self._file_paths: Optional[List[str]] = None
+
+        keyed = []
+        names = []
+        for position, (qualified_name, _kind) in enumerate(self.entries):
+            parts = qualified_name.split("::")
+            name = parts[-1].lower()
+            local_name = "::".join(parts[1:]).lower()
+            names.append(name)
+            keyed.append((name, position))
+            if local_name != name:
+                keyed.append((local_name, position))
+            keyed.append((qualified_name.lower(), position))
+        keyed.sort()
+
+        self._keys = [key for key, _ in keyed]
+        self._positions = [position for _, position in keyed]
+
+        # Offsets of each name inside the blob, used to map regex matches
+        # back to entry positions with a single bisect.
+        self._blob = _BLOB_SEPARATOR.join(names)
+        self._offsets = []
+        offset = 0
+        for name in names:
+            self._offsets.append(offset)
+            offset += len(name) + len(_BLOB_SEPARATOR)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def file_paths(self) -> List[str]:
+        """Returns the sorted, de-duplicated list of files that define symbols."""
+        if self._file_paths is None:
+            self._file_paths = sorted({qualified_name.split("::", 1)[0] for qualified_name, _ in self.entries})
+        return self._file_paths
+
+    def search_prefix(self, prefix: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Returns up to `limit` symbols with any key starting with `prefix`."""
+        prefix = prefix.lower()
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        start = bisect.bisect_left(self._keys, prefix)
+        for i in range(start, len(self._keys)):
+            if not self._keys[i].startswith(prefix):
+                break
+            position = self._positions[i]
+            if position in seen:
+                continue
+            seen.add(position)
+            results.append(self._to_result(position))
+            if len(results) >= limit:
+                break
+        return results
+
+    def search_fuzzy(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Returns up to `limit` symbols whose bare name contains the characters
+        of `query` in order (e.g. `wdr` matches `withdraw`). Tighter matches,
+        i.e. shorter spans, are ranked first.
+        """
+        query = query.lower()
+        if not query:
+            return []
+
+        pattern = re.compile("[^\n]*?".join(re.escape(ch) for ch in query))
+        candidates = []
+        last_position = -1
+        for match in pattern.finditer(self._blob):
+            position = bisect.bisect_right(self._offsets, match.start()) - 1
+            if position == last_position:
+                continue
+            last_position = position
+            candidates.append((match.end() - match.start(), position))
+            # Over-collect a little so ranking has something to choose from.
+            if len(candidates) >= limit * 5:
+                break
+
+        candidates.sort()
+        return [self._to_result(position) for _, position in candidates[:limit]]
+
+    def search(self, query: str, limit: int = 20, fuzzy: bool = False) -> List[Dict[str, Any]]:
+        """Prefix search, optionally topped up with fuzzy matches."""
+        results = self.search_prefix(query, limit=limit)
+        if fuzzy and len(results) < limit:
+            seen = {r["qualified_name"] for r in results}
+            for result in self.search_fuzzy(query, limit=limit):
+                if result["qualified_name"] not in seen:
+                    results.append(result)
+                    if len(results) >= limit:
+                        break
+        return results
+
+    def _to_result(self, position: int) -> Dict[str, Any]:
+        qualified_name, kind = self.entries[position]
+        parts = qualified_name.split("::")
+        return {
+            "qualified_name": qualified_name,
+            "name": parts[-1],
+            "kind": kind,
+            "file_path": parts[0],
+            "class_name": parts[1] if kind == "method" and len(parts) == 3 else None,
+        }
+
+
+# --- Per-project cache ---
+# Maps project_id -> (mtime of the index file, loaded SymbolIndex).
+_index_cache: Dict[int, Tuple[float, SymbolIndex]] = {}
+
+
+def load_symbol_index(project_id: int) -> Optional[SymbolIndex]:
+    """
+    Returns the symbol index for a project, reloading it from disk only when
+    the file has been rewritten by another ingestion run.
+    """
+    index_path = get_symbol_index_path(project_id)
+    if not os.path.exists(index_path) and not _rebuild_from_hashes(project_id):
+        return None
+    try:
+        mtime = os.path.getmtime(index_path)
+    except OSError:
+        return None
+
+    cached = _index_cache.get(project_id)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except (json.JSONDecodeError, IOError) as e:
+        print(f"Error reading symbol index for project {project_id}: {e}")
+        return None
+
+    index = SymbolIndex([tuple(entry) for entry in payload.get("symbols", [])], root=payload.get("root"))
+    _index_cache[project_id] = (mtime, index)
+    return index
@@ -2,7 +2,7 @@
 
 from pydantic import BaseModel
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
 
 # --- Pydantic Models for Project ---
 
@@ -47,6 +47,121 @@ class QueryHistory(QueryHistoryBase):
     class Config:
         orm_mode = True
 
+class HistoryPage(BaseModel):
+    """One page of query history; pass `next_cursor` back to get the next one."""
+    items: List[QueryHistory]
+    next_cursor: Optional[str] = None
+
+class HistorySearchResult(QueryHistory):
+    """A history record matched by a full-text search."""
+    score: float
+    # The best matching fragment, with matched words in [brackets]
+    snippet: str
+
+
+# --- Pydantic Models for Symbol Search ---
+
+class SymbolMatch(BaseModel):
+    """A single symbol returned by the autocomplete endpoint."""
+    qualified_name: str
+    name: str
+    kind: str
+    file_path: str
+    class_name: Optional[str] = None
+
+
+# --- Pydantic Models for Retrieval Filters ---
+
+class SearchFilters(BaseModel):
+    """
+    Optional filters applied inside the vector index during retrieval.
+    All given filters must match (they are combined with AND).
+    """
+    path_prefix: Optional[str] = None        # e.g. "backend/api" or an absolute path
+    kinds: Optional[List[str]] = None        # any of "function", "class", "method"
+    class_name: Optional[str] = None         # a class and its methods
+    file_globs: Optional[List[str]] = None   # e.g. ["*/models.py", "backend/db/*"]
+
+
+# --- Pydantic Models for Ingestion Jobs ---
+
+class IngestionJob(BaseModel):
+    """
+    Model for reading an ingestion job's status and per-node progress.
+    """
+    id: str
+    project_id: int
+    directory: str
+    status: str
+    current_node: Optional[str] = None
+    progress: Dict[str, Any] = {}
+    cancel_requested: bool = False
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+# --- Pydantic Models for LLM Usage ---
+
+class LLMUsageCreate(BaseModel):
+    """One LLM call, as recorded by the usage callback."""
+    timestamp: datetime
+    project_id: Optional[int] = None
+    user_id: Optional[int] = None
+    job_id: Optional[str] = None
+    purpose: str
+    model: str
+    status: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latency_seconds: float = 0.0
+    cost_usd: float = 0.0
+
+class UsageTotals(BaseModel):
+    """Aggregated LLM usage over a set of calls."""
+    calls: int = 0
+    failed_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+    avg_latency_seconds: float = 0.0
+    first_call_at: Optional[datetime] = None
+    last_call_at: Optional[datetime] = None
+
+class ProjectUsage(UsageTotals):
+    project_id: Optional[int] = None
+    project_name: Optional[str] = None
+
+class UserUsage(UsageTotals):
+    user_id: Optional[int] = None
+
+class RunUsage(UsageTotals):
+    """Usage of one ingestion run; `job_id` is None for interactive queries."""
+    job_id: Optional[str] = None
+
+class PurposeUsage(UsageTotals):
+    purpose: str
+    model: str
+
+class ProjectUsageReport(BaseModel):
+    project_id: int
+    totals: UsageTotals
+    by_purpose: List[PurposeUsage]
+    by_user: List[UserUsage]
+    by_run: List[RunUsage]
+
+class RunUsageReport(BaseModel):
+    job_id: str
+    project_id: Optional[int] = None
+    user_id: Optional[int] = None
+    status: Optional[str] = None  # the job's status, if it is still on record
+    totals: UsageTotals
+    by_purpose: List[PurposeUsage]
+
 
 # --- Pydantic Models for User ---
 
@@ -73,6 +188,10 @@ class User(UserBase):
     class Config:
         orm_mode = True
 
+class UserRoleUpdate(BaseModel):
+    """Model used by admins to change a user's role."""
+    role: str
+
 # --- Pydantic Models for Authentication Tokens ---
 
 class Token(BaseModel):
@@ -9,6 +9,19 @@ CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH", "vectorstore/chroma_db")
 # EMBEDDING_MODEL_PROVIDER = "google_genai"
 EMBEDDING_MODEL_PROVIDER = os.getenv("EMBEDDING_MODEL_NAME", "text-embedding-004")
 
+# --- Vector Backend Selection ---
+# "auto" picks the in-process NumPy flat index for projects up to
+# FLAT_INDEX_MAX_VECTORS symbols at their first ingestion, and Chroma above it.
+# "chroma" or "flat" forces one backend for every new project.
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "auto")
+FLAT_INDEX_MAX_VECTORS = int(os.getenv("FLAT_INDEX_MAX_VECTORS", "50000"))
+
+# Storage of the flat index's in-memory search copy: "float32" (exact),
+# "float16" or "int8". Quantized modes re-rank the best
+# top_k * FLAT_INDEX_RERANK_FACTOR candidates against full-precision vectors.
+FLAT_INDEX_STORAGE = os.getenv("FLAT_INDEX_STORAGE", "float32")
+FLAT_INDEX_RERANK_FACTOR = int(os.getenv("FLAT_INDEX_RERANK_FACTOR", "4"))
+
 db_dir = os.path.dirname(CHROMA_DB_PATH)
 if not os.path.exists(db_dir):
     os.makedirs(db_dir)
@@ -30,17 +30,27 @@ from chromadb.utils import embedding_functions
 EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
 
 
+# The loaded embedding function, shared by every vector store in the process.
+_embedding_function = None
+
+
 def get_embedding():
     """
     Initializes and returns a SentenceTransformer embedding function.
     This function handles the model loading and provides error handling.
+    The model is loaded once per process and reused afterwards.
     """
+    global _embedding_function
+    if _embedding_function is not None:
+        return _embedding_function
+
     print(f"--- Initializing local embedding model: {EMBEDDING_MODEL_NAME} ---")
     try:
         embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
             model_name=EMBEDDING_MODEL_NAME
         )
         print("--- Local embedding model loaded successfully. ---")
+        _embedding_function = embedding_function
         return embedding_function
     except Exception as e:
         # If the model fails to load, print a critical error and return None.
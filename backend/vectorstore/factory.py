@@ -0,0 +1,74 @@
+import os
+from typing import Dict
+
+from .config import VECTOR_BACKEND, FLAT_INDEX_MAX_VECTORS
+
+# --- Per-project backend selection ---
+# The chosen backend is recorded once per project, so a project never silently
+# switches index (and loses its vectors) when it grows or the config changes.
+BACKEND_MARKER_FILENAME = "vector_backend"
+SUPPORTED_BACKENDS = ("chroma", "flat")
+
+# Flat stores are cheap to keep around and reload themselves when their files
+# change, so one instance per project is shared by the whole process.
+_flat_stores: Dict[int, "FlatVectorStore"] = {}
+
+
+def _get_marker_path(project_id: int) -> str:
+    return os.path.join(f"project_data/{project_id}", BACKEND_MARKER_FILENAME)
+
+
+def get_project_backend(project_id: int) -> str:
+    """
+    Returns the vector backend recorded for a project. Projects ingested
+    before backends were selectable have no marker and live in Chroma.
+    """
+    try:
+        with open(_get_marker_path(project_id), "r") as f:
+            backend = f.read().strip()
+    except IOError:
+        return "chroma"
+    return backend if backend in SUPPORTED_BACKENDS else "chroma"
+
+
+def select_backend_for_project(project_id: int, expected_vectors: int) -> str:
+    """
+    Chooses and records the backend for a project on its first ingestion.
+    With VECTOR_BACKEND=auto, projects up to FLAT_INDEX_MAX_VECTORS symbols get
+    the in-process flat index; larger ones get Chroma.
+    """
+    marker_path = _get_marker_path(project_id)
+    if os.path.exists(marker_path):
+        return get_project_backend(project_id)
+
+    if VECTOR_BACKEND in SUPPORTED_BACKENDS:
+        backend = VECTOR_BACKEND
+    else:
+        backend = "flat" if expected_vectors <= FLAT_INDEX_MAX_VECTORS else "chroma"
+
+    os.makedirs(os.path.dirname(marker_path), exist_ok=True)
+    with open(marker_path, "w") as f:
+        f.write(backend)
+    print(f"Selected '{backend}' vector backend for project {project_id} ({expected_vectors} symbols).")
+    return backend
+
+
+def get_vector_store(project_id: int):
+    """
+    Returns the vector store for a project, backed by Chroma or the flat index.
+    Both expose `add_documents`, `delete_summaries`, `search` and `search_many`.
+    """
+    if not project_id:
+        raise ValueError("Project ID is required to get a vector store.")
+
+    if get_project_backend(project_id) == "flat":
+        store = _flat_stores.get(project_id)
+        if store is None:
+            # Imported lazily, like Chroma below, so the API starts without NumPy.
+            from .flat_store import FlatVectorStore
+            store = _flat_stores[project_id] = FlatVectorStore(project_id=project_id)
+        return store
+
+    # Imported lazily so flat-only deployments never load Chroma.
+    from .store import VectorStore
+    return VectorStore(project_id=project_id)
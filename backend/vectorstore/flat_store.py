@@ -0,0 +1,452 @@
+import json
+import os
+import threading
+from typing import List, Dict, Any, NamedTuple, Optional
+
+import numpy as np
+
+# Import the LangChain Document object for type hinting and consistency
+from langchain_core.documents import Document
+
+from .config import FLAT_INDEX_STORAGE, FLAT_INDEX_RERANK_FACTOR
+from backend.core import metrics
+
+EMBEDDINGS_FILENAME = "embeddings.npy"
+RECORDS_FILENAME = "records.json"
+# Compact copies of the embeddings used for the first search pass.
+QUANTIZED_FILENAMES = {"int8": "embeddings.int8.npy", "float16": "embeddings.f16.npy"}
+SCALES_FILENAME = "scales.npy"
+STORAGE_MODES = ("float32", "float16", "int8")
+
+# Rows upcast to float32 at a time when scoring quantized vectors, which bounds
+# the temporary memory of a query to CHUNK_ROWS * dim * 4 bytes.
+CHUNK_ROWS = 8192
+
+
+def get_flat_index_dir(project_id: int) -> str:
+    """Constructs the directory holding a project's flat index files."""
+    return os.path.join(f"project_data/{project_id}", "flat_index")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scales each row to unit length so a dot product is a cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def quantize_int8(vectors: np.ndarray):
+    """
+    Symmetric int8 quantization with one scale per vector, so that
+    `codes[i] * scales[i]` approximates `vectors[i]`.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales = np.maximum(scales, 1e-12).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def _metadata_columns(metadatas: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Metadata columns as string arrays, so `where` clauses can be evaluated
+    with vectorized comparisons instead of a Python loop per record.
+    Missing keys become "", which no filter value produced by the API uses.
+    """
+    keys = {key for metadata in metadatas for key in metadata}
+    return {
+        key: np.array([str(metadata.get(key, "")) for metadata in metadatas], dtype=str)
+        for key in keys
+    }
+
+
+class _Snapshot(NamedTuple):
+    """
+    One consistent version of the index. Writers build a new snapshot and
+    publish it with a single assignment, so a search running concurrently in
+    another thread sees either the old index or the new one, never a mix.
+    """
+    embeddings: np.ndarray
+    ids: List[str]
+    documents: List[str]
+    metadatas: List[Dict[str, Any]]
+    columns: Dict[str, np.ndarray]
+    codes: Optional[np.ndarray]
+    scales: Optional[np.ndarray]
+
+
+_EMPTY_SNAPSHOT = _Snapshot(np.zeros((0, 0), dtype=np.float32), [], [], [], {}, None, None)
+
+
+class FlatVectorStore:
+    """
+    An in-process, exact vector index for small and medium projects.
+
+    Embeddings are stored L2-normalized as a float32 matrix in a `.npy` file
+    that is memory-mapped for reads, with ids, documents and metadata in a JSON
+    sidecar. A query is one matrix-vector product followed by `argpartition`,
+    which for up to ~50k vectors is faster and far lighter than a Chroma
+    `PersistentClient`.
+
+    With `storage` set to "int8" (one scale per vector) or "float16", a
+    compact copy of the matrix is held in memory and scanned first; the best
+    `top_k * FLAT_INDEX_RERANK_FACTOR` candidates are then re-ranked against
+    the full-precision vectors, of which only those rows are paged in from
+    disk. int8 cuts the in-memory index about 4x, float16 2x.
+
+    It implements the same interface as the Chroma-backed `VectorStore`, and
+    reports squared L2 distances (2 - 2 * cosine) so scores from both
+    backends can be compared against the same thresholds.
+    """
+    backend_name = "flat"
+
+    def __init__(self, project_id: int, storage: Optional[str] = None):
+        if not project_id:
+            raise ValueError("Project ID is required to initialize the FlatVectorStore.")
+        storage = storage or FLAT_INDEX_STORAGE
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"Unsupported flat index storage mode: {storage}")
+
+        self.project_id = project_id
+        self.storage = storage
+        self.rerank_factor = FLAT_INDEX_RERANK_FACTOR
+        self.index_dir = get_flat_index_dir(project_id)
+        self.embeddings_path = os.path.join(self.index_dir, EMBEDDINGS_FILENAME)
+        self.records_path = os.path.join(self.index_dir, RECORDS_FILENAME)
+
+        self._lock = threading.Lock()
+        self._loaded_mtime = None
+        self._snapshot = _EMPTY_SNAPSHOT
+        self._refresh()
+
+    # --- Loading and saving ---
+
+    def _refresh(self):
+        """Reloads the index if another store instance or process rewrote it."""
+        try:
+            mtime = os.path.getmtime(self.records_path)
+        except OSError:
+            return
+        if mtime == self._loaded_mtime:
+            return
+
+        with self._lock:
+            with open(self.records_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            embeddings = np.load(self.embeddings_path, mmap_mode="r")
+            if embeddings.shape[0] != len(records["ids"]):
+                # Caught another writer between its two file replacements;
+                # keep serving the previous snapshot and retry next time.
+                return
+            self._snapshot = self._build_snapshot(embeddings, records["ids"], records["documents"], records["metadatas"])
+            self._loaded_mtime = mtime
+
+    def _build_snapshot(self, embeddings: np.ndarray, ids: List[str], documents: List[str],
+                        metadatas: List[Dict[str, Any]], rebuild: bool = False) -> _Snapshot:
+        codes, scales = self._load_quantized(embeddings, len(ids), rebuild=rebuild)
+        return _Snapshot(embeddings, ids, documents, metadatas, _metadata_columns(metadatas), codes, scales)
+
+    def _save(self, embeddings: np.ndarray, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]):
+        """Atomically replaces the index files, then re-maps the new matrix."""
+        os.makedirs(self.index_dir, exist_ok=True)
+        tmp_embeddings = self.embeddings_path + ".tmp.npy"
+        tmp_records = self.records_path + ".tmp"
+
+        np.save(tmp_embeddings, np.ascontiguousarray(embeddings, dtype=np.float32))
+        with open(tmp_records, "w", encoding="utf-8") as f:
+            json.dump({"ids": ids, "documents": documents, "metadatas": metadatas}, f)
+
+        # Searches still holding the previous snapshot keep reading its memory
+        # map: the replaced file's data stays valid until the map is released.
+        os.replace(tmp_embeddings, self.embeddings_path)
+        os.replace(tmp_records, self.records_path)
+
+        mapped = np.load(self.embeddings_path, mmap_mode="r")
+        self._snapshot = self._build_snapshot(mapped, ids, documents, metadatas, rebuild=True)
+        self._loaded_mtime = os.path.getmtime(self.records_path)
+
+    def _load_quantized(self, embeddings: np.ndarray, count: int, rebuild: bool = False):
+        """
+        Loads the compact search copy into memory, (re)building it from the
+        full-precision matrix when missing, stale or explicitly requested.
+        Returns the codes and (for int8) the per-vector scales.
+        """
+        if self.storage == "float32":
+            return None, None
+
+        codes_path = os.path.join(self.index_dir, QUANTIZED_FILENAMES[self.storage])
+        scales_path = os.path.join(self.index_dir, SCALES_FILENAME)
+        if not rebuild and os.path.exists(codes_path):
+            codes = np.load(codes_path)
+            scales = np.load(scales_path) if self.storage == "int8" else None
+            if codes.shape[0] == count and (scales is None or scales.shape[0] == count):
+                return codes, scales
+
+        full = np.asarray(embeddings, dtype=np.float32)
+        if self.storage == "int8":
+            codes, scales = quantize_int8(full)
+            np.save(scales_path + ".tmp.npy", scales)
+            os.replace(scales_path + ".tmp.npy", scales_path)
+        else:
+            codes, scales = full.astype(np.float16), None
+        np.save(codes_path + ".tmp.npy", codes)
+        os.replace(codes_path + ".tmp.npy", codes_path)
+        return codes, scales
+
+    def memory_bytes(self) -> int:
+        """Bytes held in memory for the first search pass over all vectors."""
+        snapshot = self._snapshot
+        if snapshot.codes is None:
+            return int(snapshot.embeddings.nbytes)
+        return int(snapshot.codes.nbytes + (snapshot.scales.nbytes if snapshot.scales is not None else 0))
+
+    # --- Embedding ---
+
+    def _embed(self, texts: List[str], operation: str = "documents") -> np.ndarray:
+        # Imported lazily so the flat backend does not pull in Chroma on import.
+        from backend.vectorstore.embeddings import get_embedding
+
+        embedding_function = get_embedding()
+        if embedding_function is None:
+            raise RuntimeError("Embedding model is not available.")
+        with metrics.time_embedding(operation, len(texts)):
+            vectors = embedding_function(texts)
+        return _normalize(np.asarray(vectors, dtype=np.float32))
+
+    # --- Public interface (shared with the Chroma VectorStore) ---
+
+    def count(self) -> int:
+        self._refresh()
+        return len(self._snapshot.ids)
+
+    def add_documents(self, documents: List[Document], ids: List[str]):
+        """
+        Adds or updates (upserts) a list of documents in the flat index.
+        """
+        if not documents:
+            return
+
+        texts = [doc.page_content for doc in documents]
+        metadatas = [doc.metadata for doc in documents]
+        self.add_embeddings(ids=ids, embeddings=self._embed(texts), documents=texts, metadatas=metadatas)
+        print(f"Added/updated {len(documents)} documents in flat index for project {self.project_id}.")
+
+    def add_embeddings(self, ids: List[str], embeddings: np.ndarray, documents: List[str], metadatas: List[Dict[str, Any]]):
+        """Upserts pre-computed embeddings; existing IDs are overwritten in place."""
+        if not ids:
+            return
+        self._refresh()
+        vectors = _normalize(embeddings)
+
+        with self._lock:
+            snapshot = self._snapshot
+            all_ids = list(snapshot.ids)
+            all_documents = list(snapshot.documents)
+            all_metadatas = list(snapshot.metadatas)
+            if len(snapshot.embeddings):
+                matrix = np.array(snapshot.embeddings, dtype=np.float32)
+            else:
+                matrix = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+
+            row_of = {doc_id: row for row, doc_id in enumerate(all_ids)}
+            new_rows = []
+            for i, doc_id in enumerate(ids):
+                row = row_of.get(doc_id)
+                if row is None:
+                    row_of[doc_id] = len(all_ids)
+                    all_ids.append(doc_id)
+                    all_documents.append(documents[i])
+                    all_metadatas.append(metadatas[i])
+                    new_rows.append(vectors[i])
+                else:
+                    matrix[row] = vectors[i]
+                    all_documents[row] = documents[i]
+                    all_metadatas[row] = metadatas[i]
+
+            if new_rows:
+                matrix = np.vstack([matrix, np.asarray(new_rows, dtype=np.float32)])
+            self._save(matrix, all_ids, all_documents, all_metadatas)
+
+    def delete_summaries(self, ids_to_delete: List[str]):
+        """
+        Deletes summaries from the flat index by their unique IDs.
+        """
+        if not ids_to_delete:
+            return
+        self._refresh()
+
+        with self._lock:
+            snapshot = self._snapshot
+            doomed = set(ids_to_delete)
+            keep = [row for row, doc_id in enumerate(snapshot.ids) if doc_id not in doomed]
+            deleted = len(snapshot.ids) - len(keep)
+            if not deleted:
+                return
+            matrix = np.array(snapshot.embeddings[keep], dtype=np.float32) if keep else np.zeros((0, snapshot.embeddings.shape[1]), dtype=np.float32)
+            self._save(
+                matrix,
+                [snapshot.ids[row] for row in keep],
+                [snapshot.documents[row] for row in keep],
+                [snapshot.metadatas[row] for row in keep],
+            )
+        print(f"Deleted {deleted} documents from flat index for project {self.project_id}.")
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        include_embeddings: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Searches the flat index for the most similar documents to a query.
+        """
+        return self.search_many([query], top_k=top_k, where=where, include_embeddings=include_embeddings)[0]
+
+    def search_many(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        include_embeddings: bool = False
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Searches the flat index for several queries, embedded in one call.
+        """
+        if not queries:
+            return []
+        self._refresh()
+        if not self._snapshot.ids:
+            return [[] for _ in queries]
+        return self.search_by_embeddings(self._embed(queries, operation="query"), top_k=top_k, where=where, include_embeddings=include_embeddings)
+
+    def search_by_embeddings(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        include_embeddings: bool = False
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Searches with pre-computed query embeddings. All queries are scored in
+        a single matrix product against the (optionally filtered) rows.
+        """
+        self._refresh()
+        queries = _normalize(query_embeddings)
+        # Every step below reads this one snapshot, even if a writer publishes a new one meanwhile.
+        snapshot = self._snapshot
+        if not snapshot.ids:
+            return [[] for _ in range(len(queries))]
+
+        rows = None
+        if where:
+            rows = np.flatnonzero(self._where_mask(snapshot, where))
+            if not len(rows):
+                return [[] for _ in range(len(queries))]
+
+        with metrics.time_vector_query(self.backend_name, self.project_id):
+            ranked = self._rank(snapshot, queries, rows, top_k)
+
+        all_results = []
+        for q, (ranked_rows, similarities) in enumerate(ranked):
+            results = []
+            for row, similarity in zip(ranked_rows.tolist(), similarities.tolist()):
+                result = {
+                    "text": snapshot.documents[row],
+                    "metadata": snapshot.metadatas[row],
+                    "score": float(2.0 - 2.0 * similarity),
+                }
+                if include_embeddings:
+                    result["embedding"] = np.asarray(snapshot.embeddings[row])
+                results.append(result)
+            all_results.append(results)
+        return all_results
+
+    def _rank(self, snapshot: _Snapshot, queries: np.ndarray, rows: Optional[np.ndarray], top_k: int):
+        """
+        Returns, per query, the best row indices and their exact cosine
+        similarities, best first.
+        """
+        if snapshot.codes is None:
+            candidates = snapshot.embeddings if rows is None else snapshot.embeddings[rows]
+            similarities = queries @ np.asarray(candidates).T
+            return [
+                self._top_rows(similarities[q], rows, top_k)
+                for q in range(len(queries))
+            ]
+
+        # First pass over the compact copy, then exact re-ranking of a shortlist
+        approximate = self._approximate_similarities(snapshot, queries, rows)
+        shortlist_size = min(approximate.shape[1], top_k * self.rerank_factor)
+        ranked = []
+        for q in range(len(queries)):
+            shortlist, _ = self._top_rows(approximate[q], rows, shortlist_size)
+            # Sorted row order keeps the memory-mapped reads sequential.
+            shortlist = np.sort(shortlist)
+            exact = np.asarray(snapshot.embeddings[shortlist]) @ queries[q]
+            order, _ = self._top_rows(exact, None, top_k)
+            ranked.append((shortlist[order], exact[order]))
+        return ranked
+
+    @staticmethod
+    def _approximate_similarities(snapshot: _Snapshot, queries: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """Scores queries against the quantized vectors, a chunk of rows at a time."""
+        codes = snapshot.codes if rows is None else snapshot.codes[rows]
+        scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), CHUNK_ROWS):
+            block = codes[start:start + CHUNK_ROWS].astype(np.float32)
+            scores[:, start:start + CHUNK_ROWS] = queries @ block.T
+        if snapshot.scales is not None:
+            scores *= snapshot.scales if rows is None else snapshot.scales[rows]
+        return scores
+
+    @staticmethod
+    def _top_rows(similarities: np.ndarray, rows: Optional[np.ndarray], k: int):
+        """Top-k positions of a similarity vector, best first, mapped to row ids."""
+        k = min(k, len(similarities))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return (top if rows is None else rows[top]), similarities[top]
+
+    # --- Metadata filtering ---
+
+    def _where_mask(self, snapshot: _Snapshot, where: Dict[str, Any]) -> np.ndarray:
+        """
+        Evaluates the subset of Chroma's `where` syntax produced by
+        `backend.query.filters` ($and, $or, $eq, $ne, $in, $nin and implicit
+        equality) as a boolean mask over all rows.
+        """
+        size = len(snapshot.ids)
+        mask = np.ones(size, dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self._where_mask(snapshot, clause)
+            elif key == "$or":
+                any_mask = np.zeros(size, dtype=bool)
+                for clause in condition:
+                    any_mask |= self._where_mask(snapshot, clause)
+                mask &= any_mask
+            else:
+                column = snapshot.columns.get(key)
+                if column is None:
+                    column = np.full(size, "", dtype=str)
+                mask &= self._compare(column, condition)
+        return mask
+
+    @staticmethod
+    def _compare(column: np.ndarray, condition: Any) -> np.ndarray:
+        if not isinstance(condition, dict):
+            return column == str(condition)
+        operator, value = next(iter(condition.items()))
+        if operator == "$eq":
+            return column == str(value)
+        if operator == "$ne":
+            return column != str(value)
+        if operator == "$in":
+            return np.isin(column, [str(v) for v in value])
+        if operator == "$nin":
+            return ~np.isin(column, [str(v) for v in value])
+        raise ValueError(f"Unsupported filter operator for the flat index: {operator}")
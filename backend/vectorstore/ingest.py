@@ -2,7 +2,7 @@ import json
 import os
 from typing import List, Dict, Any
 
-from backend.vectorstore.store import VectorStore
+from backend.vectorstore.factory import get_vector_store
 from langchain_core.documents import Document
 
 def _build_id_from_metadata(metadata: Dict[str, Any]) -> str:
@@ -88,10 +88,10 @@ def ingest_summaries_to_vector_store(project_id: int) -> int:
     ]
     ids = [_build_id_from_metadata(doc.metadata) for doc in langchain_documents]
 
-    # Instantiate the VectorStore for the specific project
-    vector_store = VectorStore(project_id=project_id)
+    # Get the vector store (Chroma or flat index) for the specific project
+    vector_store = get_vector_store(project_id)
     
-    # Add the documents to the project's ChromaDB collection
+    # Add the documents to the project's vector index
     vector_store.add_documents(documents=langchain_documents, ids=ids)
 
     print(f"--- ChromaDB ingestion complete for project {project_id}. Added/updated {len(langchain_documents)} summaries. ---")
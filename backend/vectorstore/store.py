@@ -1,9 +1,10 @@
 import chromadb
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 # Import our configuration and embedding utility
 from .config import CHROMA_DB_PATH
 from backend.vectorstore.embeddings import get_embedding
+from backend.core import metrics
 
 # Import the LangChain Document object for type hinting and consistency
 from langchain_core.documents import Document
@@ -12,6 +13,8 @@ class VectorStore:
     """
     A wrapper class for managing a ChromaDB vector store for a specific project.
     """
+    backend_name = "chroma"
+
     def __init__(self, project_id: int):
         if not project_id:
             raise ValueError("Project ID is required to initialize the VectorStore.")
@@ -29,6 +32,9 @@ class VectorStore:
             embedding_function=get_embedding()
         )
 
+    def count(self) -> int:
+        return self.collection.count()
+
     def add_documents(self, documents: List[Document], ids: List[str]):
         """
         Adds or updates (upserts) a list of documents in the ChromaDB collection.
@@ -58,22 +64,84 @@ class VectorStore:
         self.collection.delete(ids=ids_to_delete)
         print(f"Deleted {len(ids_to_delete)} documents from collection '{self.collection_name}'.")
 
-    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    def search(
+        self,
+        query: str,
+        top_k: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        include_embeddings: bool = False
+    ) -> List[Dict[str, Any]]:
         """
         Searches the collection for the most similar documents to a query.
+        An optional Chroma `where` clause restricts the search to matching
+        metadata inside the index itself.
         """
-        results = self.collection.query(
-            query_texts=[query],
-            n_results=top_k
-        )
-        
+        return self.search_many([query], top_k=top_k, where=where, include_embeddings=include_embeddings)[0]
+
+    def search_many(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        include_embeddings: bool = False
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Searches the collection for several queries at once. All queries are
+        embedded in a single model call and answered by one Chroma lookup.
+        Returns one result list per query, in the same order. With
+        `include_embeddings`, each result also carries its stored vector.
+        """
+        if not queries:
+            return []
+
+        return self._query({"query_texts": queries}, len(queries), top_k, where, include_embeddings)
+
+    def search_by_embeddings(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        include_embeddings: bool = False
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Searches with pre-computed query embeddings, skipping the embedding
+        model. Used when one question is searched across many projects.
+        """
+        if len(query_embeddings) == 0:
+            return []
+        return self._query({"query_embeddings": query_embeddings}, len(query_embeddings), top_k, where, include_embeddings)
+
+    def _query(
+        self,
+        query_kwargs: Dict[str, Any],
+        query_count: int,
+        top_k: int,
+        where: Optional[Dict[str, Any]],
+        include_embeddings: bool
+    ) -> List[List[Dict[str, Any]]]:
+        """Runs one Chroma query and formats one result list per query."""
+        query_kwargs["n_results"] = top_k
+        if where:
+            query_kwargs["where"] = where
+        if include_embeddings:
+            query_kwargs["include"] = ["documents", "metadatas", "distances", "embeddings"]
+        # Includes embedding the query texts, which Chroma does itself
+        with metrics.time_vector_query(self.backend_name, self.project_id):
+            results = self.collection.query(**query_kwargs)
+
         # Format the results to match the expected output structure of our RAG pipeline
-        formatted_results = []
-        if results and results.get('documents'):
-            for i, doc_text in enumerate(results['documents'][0]):
-                formatted_results.append({
-                    "text": doc_text,
-                    "metadata": results['metadatas'][0][i],
-                    "score": results['distances'][0][i] # Chroma returns distances, lower is better
-                })
-        return formatted_results
+        all_formatted = []
+        for q in range(query_count):
+            formatted_results = []
+            if results and results.get('documents'):
+                for i, doc_text in enumerate(results['documents'][q]):
+                    result = {
+                        "text": doc_text,
+                        "metadata": results['metadatas'][q][i],
+                        "score": results['distances'][q][i] # Chroma returns distances, lower is better
+                    }
+                    if include_embeddings:
+                        result["embedding"] = results['embeddings'][q][i]
+                    formatted_results.append(result)
+            all_formatted.append(formatted_results)
+        return all_formatted
@@ -0,0 +1,175 @@
+"""
+Times the CPU-bound front of the ingestion pipeline on synthetic
+repositories: scan_python_files, parse_file, create_hashes_from_parse_result
+and detect_changes (after a round of edits).
+
+Repositories come from benchmarks.synthetic_repo, so every run measures the
+same input. Each stage reports the best of `--repeat` runs. Results can be
+saved as a JSON baseline and later runs checked against it: the check exits
+with status 1 when any stage got slower than the baseline by more than
+`--threshold` (stages faster than `--min-seconds` are compared against that
+floor, so timer noise on tiny stages does not fail the check).
+
+Timings depend on the machine: check against a baseline saved on the same
+machine. The committed one under benchmarks/baselines/ records where it was
+measured.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_ingestion_pipeline --sizes 1000 10000 100000
+    python -m benchmarks.bench_ingestion_pipeline --sizes 1000 10000 --save-baseline
+    python -m benchmarks.bench_ingestion_pipeline --sizes 1000 10000 --check --threshold 0.25
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from backend.diffing.code_change_detector import detect_changes
+from backend.parser.hasher import create_hashes_from_parse_result
+from backend.parser.parser import parse_file
+from backend.parser.scanner import scan_python_files
+from benchmarks.synthetic_repo import edit_repository, generate_repository
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "ingestion_pipeline.json")
+STAGES = ["scan", "parse", "hash", "diff"]
+
+
+def _parse_and_hash(paths: List[str]):
+    """Parses and hashes every file, timing the two steps separately."""
+    hashes, parse_seconds, hash_seconds = {}, 0.0, 0.0
+    for path in paths:
+        started = time.perf_counter()
+        result = parse_file(path)
+        parsed = time.perf_counter()
+        hashes[path] = create_hashes_from_parse_result(result)
+        hash_seconds += time.perf_counter() - parsed
+        parse_seconds += parsed - started
+    return hashes, parse_seconds, hash_seconds
+
+
+def run_size(files: int, spec: Dict[str, Any], repeat: int) -> List[Dict[str, Any]]:
+    """Generates a repository of `files` modules and times each stage on it."""
+    shape = {key: spec[key] for key in ("classes", "methods", "functions", "seed")}
+    best = {stage: float("inf") for stage in STAGES}
+    with tempfile.TemporaryDirectory() as root:
+        generate_repository(root, files, **shape)
+
+        for _ in range(repeat):
+            gc.collect()
+            started = time.perf_counter()
+            paths = scan_python_files(root)
+            best["scan"] = min(best["scan"], time.perf_counter() - started)
+            gc.collect()
+            old_hashes, parse_seconds, hash_seconds = _parse_and_hash(paths)
+            best["parse"] = min(best["parse"], parse_seconds)
+            best["hash"] = min(best["hash"], hash_seconds)
+
+        edits = edit_repository(root, files, spec["edit_ratio"], **shape)
+        new_hashes = dict(old_hashes)
+        for path in edits["removed"]:
+            del new_hashes[path]
+        new_hashes.update(_parse_and_hash(edits["modified"] + edits["added"])[0])
+
+        for _ in range(repeat):
+            gc.collect()
+            started = time.perf_counter()
+            changes = detect_changes(old_hashes, new_hashes)
+            best["diff"] = min(best["diff"], time.perf_counter() - started)
+
+    items = {"scan": len(paths), "parse": len(paths), "hash": len(paths), "diff": len(changes)}
+    return [
+        {"files": files, "stage": stage, "seconds": round(best[stage], 6), "items": items[stage],
+         "us_per_file": round(best[stage] / files * 1e6, 3)}
+        for stage in STAGES
+    ]
+
+
+def compare_to_baseline(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                        threshold: float, min_seconds: float) -> List[Dict[str, Any]]:
+    """
+    Pairs each result with the baseline row of the same size and stage.
+    A stage regressed when it took more than (1 + threshold) times its
+    baseline, with baselines below `min_seconds` raised to that floor.
+    """
+    baseline_rows = {(row["files"], row["stage"]): row for row in baseline}
+    compared = []
+    for row in results:
+        reference = baseline_rows.get((row["files"], row["stage"]))
+        if reference is None:
+            continue
+        ratio = row["seconds"] / max(reference["seconds"], min_seconds)
+        compared.append({**row, "baseline_seconds": reference["seconds"], "ratio": round(ratio, 3),
+                         "regressed": ratio > 1 + threshold})
+    return compared
+
+
+def _environment() -> Dict[str, Any]:
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "machine": platform.machine(), "cpu_count": os.cpu_count()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--classes", type=int, default=2, help="Classes per module.")
+    parser.add_argument("--methods", type=int, default=4, help="Methods per class.")
+    parser.add_argument("--functions", type=int, default=3, help="Top-level functions per module.")
+    parser.add_argument("--edit-ratio", type=float, default=0.05, help="Share of modules edited before the diff.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage; the best one is reported.")
+    parser.add_argument("--output", help="Optional path to write the results as JSON.")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                        help=f"Write the results as a baseline (default: {DEFAULT_BASELINE}).")
+    parser.add_argument("--check", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                        help="Compare against a baseline and exit with status 1 on a regression.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown, e.g. 0.25 for 25%%.")
+    parser.add_argument("--min-seconds", type=float, default=0.01, help="Noise floor for baseline timings.")
+    args = parser.parse_args()
+
+    spec = {"classes": args.classes, "methods": args.methods, "functions": args.functions,
+            "edit_ratio": args.edit_ratio, "seed": args.seed}
+    baseline = None
+    if args.check:
+        with open(args.check) as f:
+            baseline = json.load(f)
+        if baseline["spec"] != spec:
+            raise SystemExit(f"Baseline {args.check} was measured with {baseline['spec']}, not {spec}.")
+
+    results = []
+    for size in args.sizes:
+        for row in run_size(size, spec, args.repeat):
+            results.append(row)
+            print(f"{row['stage']:>6} n={size:<7} {row['seconds']:>10.4f}s {row['us_per_file']:>10.2f}us/file "
+                  f"items={row['items']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, "w") as f:
+            json.dump({"environment": _environment(), "spec": spec, "results": results}, f, indent=2)
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if baseline is not None:
+        compared = compare_to_baseline(results, baseline["results"], args.threshold, args.min_seconds)
+        if not compared:
+            raise SystemExit(f"No sizes in common with the baseline {args.check}.")
+        for row in compared:
+            verdict = "REGRESSED" if row["regressed"] else "ok"
+            print(f"{row['stage']:>6} n={row['files']:<7} {row['seconds']:>10.4f}s vs "
+                  f"{row['baseline_seconds']:>10.4f}s  x{row['ratio']:<6} {verdict}")
+        regressions = [row for row in compared if row["regressed"]]
+        if regressions:
+            print(f"{len(regressions)} stage(s) slower than the baseline by more than {args.threshold:.0%}.")
+            sys.exit(1)
+        print(f"No stage slower than the baseline by more than {args.threshold:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
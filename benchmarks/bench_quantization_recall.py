@@ -0,0 +1,105 @@
+"""
+Measures recall@k and in-memory index size of the flat index's quantized
+storage modes (int8 with per-vector scales, float16) against exact float32
+search, with full-precision re-ranking of the shortlist.
+
+The default corpus is synthetic clustered vectors with the dimensionality of
+all-MiniLM-L6-v2. `--corpus fixtures` instead embeds the summaries stored
+under project_data/*/summaries_db.json (needs the embedding model), and uses
+each summary as a query against the others.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_quantization_recall --sizes 10000 50000 --k 5 10
+"""
+import argparse
+import glob
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from backend.vectorstore.flat_store import FlatVectorStore, STORAGE_MODES
+
+EMBEDDING_DIM = 384
+QUERY_COUNT = 200
+
+
+def _synthetic_corpus(size: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(size // 100, 10), EMBEDDING_DIM))
+    labels = rng.integers(0, len(centers), size + QUERY_COUNT)
+    vectors = (centers[labels] + 0.5 * rng.standard_normal((len(labels), EMBEDDING_DIM))).astype(np.float32)
+    return vectors[:size], vectors[size:]
+
+
+def _fixture_corpus():
+    from backend.vectorstore.embeddings import get_embedding
+
+    texts = []
+    for path in sorted(glob.glob("project_data/*/summaries_db.json")):
+        with open(path, "r") as f:
+            for section in json.load(f).values():
+                texts.extend(item["summary"] for item in section.values() if item.get("summary"))
+    if not texts:
+        raise SystemExit("No summaries found under project_data/*/summaries_db.json.")
+    embedding_function = get_embedding()
+    if embedding_function is None:
+        raise SystemExit("Embedding model is not available.")
+    vectors = np.asarray(embedding_function(texts), dtype=np.float32)
+    return vectors, vectors
+
+
+def _evaluate(vectors, queries, ks, rerank_factor):
+    ids = [f"/bench/mod.py::f{i}" for i in range(len(vectors))]
+    metadatas = [{"source": "/bench/mod.py", "name": f"f{i}"} for i in range(len(vectors))]
+    max_k = max(ks)
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            FlatVectorStore(project_id=1, storage="float32").add_embeddings(ids, vectors, [""] * len(ids), metadatas)
+            exact = FlatVectorStore(project_id=1, storage="float32").search_by_embeddings(queries, top_k=max_k)
+            for storage in STORAGE_MODES:
+                store = FlatVectorStore(project_id=1, storage=storage)
+                store.rerank_factor = rerank_factor
+                found = store.search_by_embeddings(queries, top_k=max_k)
+                row = {"storage": storage, "size": len(vectors), "index_bytes": store.memory_bytes(),
+                       "bytes_per_vector": round(store.memory_bytes() / len(vectors), 1)}
+                for k in ks:
+                    hits = sum(
+                        len({r["metadata"]["name"] for r in e[:k]} & {r["metadata"]["name"] for r in g[:k]})
+                        for e, g in zip(exact, found)
+                    )
+                    row[f"recall@{k}"] = round(hits / (len(queries) * min(k, len(vectors))), 4)
+                results.append(row)
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", choices=["synthetic", "fixtures"], default="synthetic")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10])
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    parser.add_argument("--output", help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    corpora = [_fixture_corpus()] if args.corpus == "fixtures" else [_synthetic_corpus(size) for size in args.sizes]
+    results = []
+    for vectors, queries in corpora:
+        for row in _evaluate(vectors, queries, args.k, args.rerank_factor):
+            results.append(row)
+            recalls = " ".join(f"recall@{k}={row[f'recall@{k}']:.4f}" for k in args.k)
+            print(f"{row['storage']:>7} n={row['size']:<7} {row['bytes_per_vector']:>7.1f} B/vec {recalls}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
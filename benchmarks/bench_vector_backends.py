@@ -0,0 +1,153 @@
+"""
+Compares the in-process NumPy flat index with Chroma for query latency, cold
+start and resident memory.
+
+Each backend runs in its own subprocess so RSS numbers are not polluted by the
+other one. Vectors are random unit vectors with the dimensionality of
+all-MiniLM-L6-v2, so no embedding model is needed.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_vector_backends --sizes 1000 10000 50000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+EMBEDDING_DIM = 384
+QUERY_COUNT = 200
+TOP_K = 5
+
+
+def _rss_mb() -> float:
+    """Current resident set size of this process, in MiB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except IOError:
+        pass
+    import resource
+    # ru_maxrss is KiB on Linux and bytes on macOS; this is a peak, not current.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _make_corpus(size: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((size, EMBEDDING_DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"/repo/mod{i // 50}.py::func_{i}" for i in range(size)]
+    documents = [f"Summary of func_{i}." for i in range(size)]
+    metadatas = [{"source": f"/repo/mod{i // 50}.py", "type": "function", "name": f"func_{i}"} for i in range(size)]
+    queries = rng.standard_normal((QUERY_COUNT, EMBEDDING_DIM)).astype(np.float32)
+    return vectors, ids, documents, metadatas, queries
+
+
+def _latency_stats(latencies):
+    latencies = np.asarray(latencies) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "mean_ms": round(float(latencies.mean()), 3),
+    }
+
+
+def _run_flat(size: int, workdir: str) -> dict:
+    from backend.vectorstore.flat_store import FlatVectorStore
+
+    vectors, ids, documents, metadatas, queries = _make_corpus(size)
+    os.chdir(workdir)
+    FlatVectorStore(project_id=1).add_embeddings(ids, vectors, documents, metadatas)
+    del vectors
+
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    store = FlatVectorStore(project_id=1)
+    store.search_by_embeddings(queries[:1], top_k=TOP_K)
+    cold_start = time.perf_counter() - start
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        store.search_by_embeddings(query, top_k=TOP_K)
+        latencies.append(time.perf_counter() - start)
+    return {"cold_start_ms": round(cold_start * 1000, 3), "rss_delta_mb": round(_rss_mb() - rss_before, 1), **_latency_stats(latencies)}
+
+
+def _run_chroma(size: int, workdir: str) -> dict:
+    import chromadb
+
+    vectors, ids, documents, metadatas, queries = _make_corpus(size)
+    path = os.path.join(workdir, "chroma")
+    client = chromadb.PersistentClient(path=path)
+    collection = client.get_or_create_collection("project_1", embedding_function=None)
+    batch = 5000
+    for i in range(0, size, batch):
+        collection.add(
+            ids=ids[i:i + batch],
+            embeddings=vectors[i:i + batch],
+            documents=documents[i:i + batch],
+            metadatas=metadatas[i:i + batch],
+        )
+    del client, collection, vectors
+
+    # Measure a fresh process-level open, like a worker serving its first query.
+    chromadb.api.client.SharedSystemClient.clear_system_cache()
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    collection = chromadb.PersistentClient(path=path).get_collection("project_1", embedding_function=None)
+    collection.query(query_embeddings=queries[:1], n_results=TOP_K)
+    cold_start = time.perf_counter() - start
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        collection.query(query_embeddings=[query], n_results=TOP_K)
+        latencies.append(time.perf_counter() - start)
+    return {"cold_start_ms": round(cold_start * 1000, 3), "rss_delta_mb": round(_rss_mb() - rss_before, 1), **_latency_stats(latencies)}
+
+
+def _run_one(backend: str, size: int):
+    with tempfile.TemporaryDirectory() as workdir:
+        runner = _run_flat if backend == "flat" else _run_chroma
+        print(json.dumps({"backend": backend, "size": size, **runner(size, workdir)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--backends", nargs="+", default=["flat", "chroma"], choices=["flat", "chroma"])
+    parser.add_argument("--output", help="Optional path to write the results as JSON.")
+    parser.add_argument("--_child", nargs=2, metavar=("BACKEND", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._child:
+        _run_one(args._child[0], int(args._child[1]))
+        return
+
+    results = []
+    for size in args.sizes:
+        for backend in args.backends:
+            completed = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_vector_backends", "--_child", backend, str(size)],
+                capture_output=True, text=True, check=True,
+            )
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            results.append(result)
+            print(f"{backend:>7} n={size:<7} cold={result['cold_start_ms']:>9.1f}ms "
+                  f"p50={result['p50_ms']:>7.3f}ms p95={result['p95_ms']:>7.3f}ms rss+={result['rss_delta_mb']:>6.1f}MiB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Fake LLM and embedding providers for load tests. They respond after a
+latency drawn from a configurable distribution instead of calling Gemini
+or loading a local model, so the rest of the stack (graphs, vector stores,
+database, API) runs for real at a repeatable cost.
+
+Latency distributions are given as "<kind>:<params>", in seconds:
+    fixed:0.5            always 0.5
+    uniform:0.2,0.8      uniform between 0.2 and 0.8
+    normal:0.5,0.1       mean 0.5, standard deviation 0.1 (never negative)
+    lognormal:0.5,0.6    median 0.5, sigma 0.6 (a long right tail, like real LLMs)
+    exponential:0.5      mean 0.5
+A bare number is the same as "fixed:<number>".
+"""
+import asyncio
+import math
+import random
+import threading
+import time
+import zlib
+from typing import Any, Callable, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+EMBEDDING_DIM = 384  # all-MiniLM-L6-v2
+
+
+def parse_latency(spec: str, seed: int = 0) -> Callable[[], float]:
+    """Returns a function drawing latencies (seconds) from the distribution `spec`."""
+    kind, _, params = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+    values = [float(value) for value in params.split(",") if value.strip()]
+    rng = random.Random(seed)
+    lock = threading.Lock()  # random.Random is not safe to share between threads
+
+    samplers = {
+        ("fixed", 1): lambda: values[0],
+        ("uniform", 2): lambda: rng.uniform(values[0], values[1]),
+        ("normal", 2): lambda: max(0.0, rng.gauss(values[0], values[1])),
+        ("lognormal", 2): lambda: rng.lognormvariate(math.log(values[0]), values[1]),
+        ("exponential", 1): lambda: rng.expovariate(1 / values[0]),
+    }
+    sampler = samplers.get((kind, len(values)))
+    if sampler is None:
+        raise ValueError(f"Unknown latency distribution {spec!r}; see benchmarks/fake_providers.py.")
+
+    def sample() -> float:
+        with lock:
+            return sampler()
+    return sample
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    A chat model that answers after a sampled latency, reporting token usage
+    like Gemini does (about four characters per token). A share of calls
+    (`error_rate`) fails instead, to exercise error handling under load.
+    """
+
+    sample_latency: Callable[[], float]
+    error_rate: float = 0.0
+    seed: int = 0
+    _rng: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-load-test"
+
+    def _reply(self, messages: List[BaseMessage]) -> ChatResult:
+        if self._rng is None:
+            self._rng = random.Random(self.seed)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise RuntimeError("Fake LLM failure")
+        prompt_chars = sum(len(str(message.content)) for message in messages)
+        text = f"This is a fake answer based on {prompt_chars} characters of context."
+        input_tokens, output_tokens = prompt_chars // 4, len(text) // 4
+        message = AIMessage(content=text, usage_metadata={
+            "input_tokens": input_tokens, "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.sample_latency())
+        return self._reply(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.sample_latency())
+        return self._reply(messages)
+
+
+class FakeEmbeddingFunction:
+    """
+    Stands in for the SentenceTransformer embedding function: one sampled
+    latency per call (the model embeds a batch at once), and deterministic
+    bag-of-words vectors, so texts sharing words land close together.
+    """
+
+    def __init__(self, sample_latency: Callable[[], float], dim: int = EMBEDDING_DIM):
+        self.sample_latency = sample_latency
+        self.dim = dim
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        time.sleep(self.sample_latency())
+        vectors = []
+        for text in input:
+            vector = [0.0] * self.dim
+            for word in text.lower().split():
+                vector[zlib.crc32(word.encode("utf-8")) % self.dim] += 1.0
+            vector[0] += 1e-3  # never all zeros
+            vectors.append(vector)
+        return vectors
+
+
+def install_fake_providers(llm_latency: str, embedding_latency: str, llm_error_rate: float = 0.0,
+                           seed: int = 0):
+    """
+    Replaces the answer and summary LLMs and the embedding model of this
+    process with fakes, and turns off the summarizer's delay between calls
+    (it paces requests to the Gemini rate limit). Usage and metrics are still
+    recorded, under the model name "fake".
+    """
+    from backend import graph_query
+    from backend.core.llm_metrics import LLMMetricsCallback
+    from backend.nodes import summarize_changes_node
+    from backend.vectorstore import embeddings
+
+    answer_llm = FakeChatModel(
+        sample_latency=parse_latency(llm_latency, seed), error_rate=llm_error_rate, seed=seed,
+        callbacks=[LLMMetricsCallback("answer", model="fake")],
+    )
+    summary_llm = FakeChatModel(
+        sample_latency=parse_latency(llm_latency, seed + 1), error_rate=llm_error_rate, seed=seed + 1,
+        callbacks=[LLMMetricsCallback("summary", model="fake")],
+    )
+    graph_query.get_rag_chain.cache_clear()
+    graph_query.get_llm = lambda: answer_llm
+    summarize_changes_node.get_summarizer_chain.cache_clear()
+    summarize_changes_node.get_llm = lambda: summary_llm
+    summarize_changes_node.API_CALL_DELAY = 0
+    embeddings._embedding_function = FakeEmbeddingFunction(parse_latency(embedding_latency, seed + 2))
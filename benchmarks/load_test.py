@@ -0,0 +1,313 @@
+"""
+Load test for the ask and ingest endpoints, with fake LLM and embedding
+providers (see benchmarks/fake_providers.py for the latency distributions).
+
+Closed-loop asyncio workers send a mix of `/ask` and `/ingest` requests for
+one project for `--duration` seconds at each `--concurrency` level. Each
+level reports throughput, latency percentiles and error rates, per request
+kind and overall. Before an ingest request, a few modules of the synthetic
+repository are edited, so every run has changes to summarize and embed.
+
+In process (the default), the harness sets up a scratch database, user,
+project and synthetic repository in a temporary directory, and drives the
+app through httpx's ASGI transport. The load generator then shares the
+event loop and CPU with the app, so treat these numbers as relative.
+For capacity numbers, serve the app with the fakes in its own process and
+drive it over HTTP:
+
+    python -m benchmarks.load_test serve --port 8001 --target-file target.json
+    python -m benchmarks.load_test run --target target.json --concurrency 1 8 32 64
+
+Both must run on the same machine: ingest requests edit the served
+repository on disk. The provider options (latencies, error rate, repository
+size) then apply to `serve`; `run --target` ignores them.
+
+Usage (from the repository root):
+    python -m benchmarks.load_test run --concurrency 1 4 16 --duration 20 --llm-latency lognormal:0.8,0.5
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.synthetic_repo import generate_repository, module_path, render_module
+
+QUESTIONS = [
+    "How is the weight adjusted value computed?",
+    "Which class computes the total adjusted count?",
+    "What does function_12_0 return?",
+    "Where is the offset adjusted limit calculated?",
+    "Explain the score computation in the synthetic modules.",
+]
+REPO_SHAPE = {"classes": 2, "methods": 4, "functions": 3, "seed": 0}
+
+# --- Setup ---
+# The backend reads its configuration from the environment on import, so it
+# is only imported once the scratch environment is in place.
+
+def _prepare_environment(workdir: str):
+    os.chdir(workdir)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'load_test.db')}"
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ["VECTOR_BACKEND"] = "flat"
+    os.environ["WARMUP_ENABLED"] = "false"
+    os.environ.setdefault("SECRET_KEY", "load-test")
+    os.environ.setdefault("GOOGLE_API_KEY", "unused")
+
+
+def _create_target(workdir: str, repo_files: int) -> Dict[str, Any]:
+    """Creates the user, project and repository the load runs against."""
+    from backend.core import auth_utils
+    from backend.db import crud, db_models
+    from backend.db.database import SessionLocal
+    from backend.main import app, init_database
+
+    init_database()
+    repo = os.path.join(workdir, "repo")
+    generate_repository(repo, repo_files, **REPO_SHAPE)
+    with SessionLocal() as db:
+        user = crud.create_user(db, username="load-test", hashed_password=auth_utils.get_password_hash("load-test"))
+        project = db_models.Project(name="load-test", user_id=user.id)
+        db.add(project)
+        db.commit()
+        project_id = project.id
+    return {
+        "token": auth_utils.create_access_token(data={"sub": "load-test"}),
+        "project_id": project_id,
+        "repo": repo,
+        "repo_files": repo_files,
+        "ask_path": app.url_path_for("ask_question", project_id=project_id),
+        "ingest_path": app.url_path_for("run_project_ingestion", project_id=project_id),
+    }
+
+# --- Workload ---
+
+class RepoEditor:
+    """Rewrites a few modules of the synthetic repository at a new revision before each ingest."""
+
+    def __init__(self, repo: str, files: int, edits: int, seed: int):
+        self.repo = repo
+        self.files = files
+        self.edits = edits
+        self.revision = 0
+        self.rng = random.Random(seed)
+
+    def edit(self):
+        self.revision += 1
+        for index in self.rng.sample(range(self.files), min(self.edits, self.files)):
+            with open(module_path(self.repo, index), "w", encoding="utf-8") as f:
+                f.write(render_module(index, REPO_SHAPE["classes"], REPO_SHAPE["methods"],
+                                      REPO_SHAPE["functions"], REPO_SHAPE["seed"], revision=self.revision))
+
+
+async def _send(client: httpx.AsyncClient, target: Dict[str, Any], kind: str, rng: random.Random,
+                editor: RepoEditor, timeout: float) -> Optional[str]:
+    """Sends one request; returns None on success or a short error description."""
+    headers = {"Authorization": f"Bearer {target['token']}"}
+    try:
+        if kind == "ask":
+            response = await client.post(target["ask_path"], json={"question": rng.choice(QUESTIONS)},
+                                         headers=headers, timeout=timeout)
+        else:
+            editor.edit()
+            response = await client.post(target["ingest_path"], json={"directory": target["repo"]},
+                                         headers=headers, timeout=timeout)
+    except httpx.TimeoutException:
+        return "timeout"
+    except httpx.HTTPError as e:
+        return type(e).__name__
+    if response.status_code != 200:
+        return f"HTTP {response.status_code}"
+    if kind == "ingest" and response.json().get("status") != "succeeded":
+        return f"job {response.json().get('status')}"
+    return None
+
+
+async def run_level(client: httpx.AsyncClient, target: Dict[str, Any], concurrency: int, duration: float,
+                    ingest_ratio: float, editor: RepoEditor, seed: int, timeout: float) -> List[Dict[str, Any]]:
+    """Runs `concurrency` closed-loop workers for `duration` seconds; returns one sample per request."""
+    rng = random.Random(seed)
+    samples = []
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            kind = "ingest" if rng.random() < ingest_ratio else "ask"
+            started = time.perf_counter()
+            error = await _send(client, target, kind, rng, editor, timeout)
+            samples.append({"kind": kind, "latency": time.perf_counter() - started, "error": error})
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+# --- Reporting ---
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(-(-q * len(sorted_values) // 100)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """Throughput, latency percentiles (ms) and errors for a set of samples."""
+    latencies = sorted(sample["latency"] * 1000 for sample in samples)
+    errors: Dict[str, int] = {}
+    for sample in samples:
+        if sample["error"]:
+            errors[sample["error"]] = errors.get(sample["error"], 0) + 1
+    failed = sum(errors.values())
+    return {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / elapsed, 3) if elapsed else 0.0,
+        "error_rate": round(failed / len(samples), 4) if samples else 0.0,
+        "errors": errors,
+        **{f"p{q}_ms": round(_percentile(latencies, q), 1) for q in (50, 90, 99)},
+        "max_ms": round(latencies[-1], 1) if latencies else 0.0,
+    }
+
+
+def report_level(samples: List[Dict[str, Any]], concurrency: int, elapsed: float) -> Dict[str, Any]:
+    row = {"concurrency": concurrency, "elapsed_s": round(elapsed, 3), "all": summarize(samples, elapsed)}
+    for kind in ("ask", "ingest"):
+        row[kind] = summarize([sample for sample in samples if sample["kind"] == kind], elapsed)
+    return row
+
+
+def _print_level(row: Dict[str, Any]):
+    for kind in ("all", "ask", "ingest"):
+        stats = row[kind]
+        if not stats["requests"]:
+            continue
+        print(f"c={row['concurrency']:<4} {kind:>6} n={stats['requests']:<6} {stats['throughput_rps']:>8.2f} req/s "
+              f"p50={stats['p50_ms']:>8.1f}ms p90={stats['p90_ms']:>8.1f}ms p99={stats['p99_ms']:>8.1f}ms "
+              f"errors={stats['error_rate']:.2%}")
+
+# --- Commands ---
+
+async def _drive(client: httpx.AsyncClient, target: Dict[str, Any], args) -> List[Dict[str, Any]]:
+    editor = RepoEditor(target["repo"], target["repo_files"], args.edits_per_ingest, args.seed)
+    # Untimed: index the repository once, so questions have something to
+    # retrieve, and answer one question to build the query graph.
+    rng = random.Random(args.seed)
+    for kind in ("ingest", "ask"):
+        error = await _send(client, target, kind, rng, editor, args.timeout)
+        if error:
+            raise SystemExit(f"Setup {kind} request failed: {error}")
+
+    rows = []
+    for level, concurrency in enumerate(args.concurrency):
+        started = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            if not args.verbose:
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+            samples = await run_level(client, target, concurrency, args.duration, args.ingest_ratio,
+                                      editor, args.seed + level, args.timeout)
+        row = report_level(samples, concurrency, time.perf_counter() - started)
+        _print_level(row)
+        rows.append(row)
+    return rows
+
+
+async def _run_in_process(args) -> List[Dict[str, Any]]:
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        _prepare_environment(workdir)
+        try:
+            from backend.main import app
+            from benchmarks.fake_providers import install_fake_providers
+
+            install_fake_providers(args.llm_latency, args.embedding_latency, args.llm_error_rate, args.seed)
+            target = _create_target(workdir, args.repo_files)
+            async with app.router.lifespan_context(app):
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+                    return await _drive(client, target, args)
+        finally:
+            os.chdir(cwd)
+
+
+async def _run_over_http(args) -> List[Dict[str, Any]]:
+    with open(args.target) as f:
+        target = json.load(f)
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=target["url"], limits=limits) as client:
+        return await _drive(client, target, args)
+
+
+def run(args):
+    runner = _run_over_http if args.target else _run_in_process
+    rows = asyncio.run(runner(args))
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key not in ("command", "handler", "output")}
+        with open(args.output, "w") as f:
+            json.dump({"config": config, "levels": rows}, f, indent=2)
+
+
+def serve(args):
+    """Serves the app with the fake providers and writes the target file for `run --target`."""
+    import uvicorn
+
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="load-test-"))
+    target_file = os.path.abspath(args.target_file)
+    os.makedirs(workdir, exist_ok=True)
+    _prepare_environment(workdir)
+    from backend.main import app
+    from benchmarks.fake_providers import install_fake_providers
+
+    install_fake_providers(args.llm_latency, args.embedding_latency, args.llm_error_rate, args.seed)
+    target = _create_target(workdir, args.repo_files)
+    target["url"] = f"http://{args.host}:{args.port}"
+    with open(target_file, "w") as f:
+        json.dump(target, f, indent=2)
+    print(f"Serving {target['url']} from {workdir}; target written to {target_file}", file=sys.stderr)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+def _add_provider_options(parser: argparse.ArgumentParser):
+    parser.add_argument("--llm-latency", default="lognormal:0.8,0.5", help="Latency of each fake LLM call.")
+    parser.add_argument("--embedding-latency", default="fixed:0.01", help="Latency of each fake embedding call.")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Share of fake LLM calls that fail.")
+    parser.add_argument("--repo-files", type=int, default=200, help="Modules in the synthetic repository.")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Drive the app and report per concurrency level.")
+    _add_provider_options(run_parser)
+    run_parser.add_argument("--target", help="Target file written by `serve`; drives that server over HTTP.")
+    run_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    run_parser.add_argument("--duration", type=float, default=20.0, help="Seconds per concurrency level.")
+    run_parser.add_argument("--ingest-ratio", type=float, default=0.05, help="Share of requests that ingest.")
+    run_parser.add_argument("--edits-per-ingest", type=int, default=5, help="Modules edited before each ingest.")
+    run_parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds.")
+    run_parser.add_argument("--verbose", action="store_true", help="Keep the app's own output.")
+    run_parser.add_argument("--output", help="Optional path to write the results as JSON.")
+    run_parser.set_defaults(handler=run)
+
+    serve_parser = commands.add_parser("serve", help="Serve the app with fake providers for `run --target`.")
+    _add_provider_options(serve_parser)
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8001)
+    serve_parser.add_argument("--workdir", help="Directory for the database, indexes and repository.")
+    serve_parser.add_argument("--target-file", default="load_test_target.json")
+    serve_parser.set_defaults(handler=serve)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Deterministic generator of synthetic Python repositories for the ingestion
+benchmarks. The same arguments always produce byte-identical trees, so
+timings from different runs (and machines) are measured on the same input.
+
+Modules are spread over packages of `MODULES_PER_PACKAGE` files each, and
+every package also holds an ignored `__pycache__` directory, so the scanner
+has to prune the way it does on real checkouts.
+"""
+import os
+import random
+from typing import Dict, List
+
+MODULES_PER_PACKAGE = 100
+
+_OPERATORS = ["+", "-", "*", "//", "%"]
+_NAMES = ["value", "count", "total", "offset", "limit", "index", "score", "weight"]
+
+
+def module_path(root: str, index: int) -> str:
+    return os.path.join(root, f"pkg_{index // MODULES_PER_PACKAGE:04d}", f"module_{index:06d}.py")
+
+
+def _function_source(name: str, rng: random.Random, indent: str = "", is_method: bool = False) -> str:
+    """A small function whose body is drawn from `rng`."""
+    first, second = rng.sample(_NAMES, 2)
+    params = f"self, {first}, {second}=None" if is_method else f"{first}, {second}=None"
+    lines = [
+        f"{indent}def {name}({params}):",
+        f'{indent}    """Computes the {second} adjusted {first} ({rng.randrange(10 ** 6)})."""',
+        f"{indent}    if {second} is None:",
+        f"{indent}        {second} = {rng.randrange(1, 1000)}",
+        f"{indent}    result = {first} {rng.choice(_OPERATORS)} {second}",
+    ]
+    for step in range(rng.randrange(2, 6)):
+        lines.append(f"{indent}    result = result {rng.choice(_OPERATORS)} {rng.randrange(1, 97)}  # step {step}")
+    lines.append(f"{indent}    return result")
+    return "\n".join(lines) + "\n"
+
+
+def render_module(index: int, classes: int, methods: int, functions: int, seed: int = 0, revision: int = 0) -> str:
+    """
+    Source of module `index`. Each `revision` changes the body of one
+    function and, on odd revisions, adds a method to the first class.
+    """
+    # One generator per function, so adding a method leaves the others unchanged
+    def rng(name: str) -> random.Random:
+        return random.Random(f"{seed}:{index}:{name}")
+
+    parts = [f'"""Synthetic module {index}."""\nimport math\n']
+    for f in range(functions):
+        name = f"function_{index}_{f}"
+        source = _function_source(name, rng(name))
+        if f == 0 and revision:
+            source = source.replace("    return result", f"    result = result + {revision}\n    return result")
+        parts.append(source)
+    for c in range(classes):
+        body = [f"class Class_{index}_{c}:", f'    """Synthetic class {c} of module {index}."""', ""]
+        method_names = [f"method_{m}" for m in range(methods)]
+        if c == 0 and revision % 2:
+            method_names.append(f"added_method_{revision}")
+        for name in method_names:
+            body.append(_function_source(name, rng(f"{c}.{name}"), indent="    ", is_method=True))
+        parts.append("\n".join(body))
+    return "\n\n".join(parts)
+
+
+def generate_repository(root: str, files: int, classes: int = 2, methods: int = 4, functions: int = 3,
+                        seed: int = 0) -> List[str]:
+    """Writes a repository of `files` modules under `root` and returns their paths."""
+    paths = []
+    for index in range(files):
+        path = module_path(root, index)
+        if index % MODULES_PER_PACKAGE == 0:
+            package = os.path.dirname(path)
+            os.makedirs(os.path.join(package, "__pycache__"), exist_ok=True)
+            with open(os.path.join(package, "__init__.py"), "w", encoding="utf-8") as f:
+                f.write("")
+            with open(os.path.join(package, "__pycache__", "stale.py"), "w", encoding="utf-8") as f:
+                f.write("# ignored by the scanner\n")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(render_module(index, classes, methods, functions, seed))
+        paths.append(path)
+    return paths
+
+
+def edit_repository(root: str, files: int, edit_ratio: float, classes: int = 2, methods: int = 4,
+                    functions: int = 3, seed: int = 0) -> Dict[str, List[str]]:
+    """
+    Applies a deterministic round of edits to a generated repository:
+    `edit_ratio` of the modules are rewritten at revision 1 (one function
+    body changed, one method added), and a tenth as many modules are removed
+    and added. Returns the edited paths by kind.
+    """
+    rng = random.Random(f"{seed}:edits")
+    edited_count = int(files * edit_ratio)
+    churn = edited_count // 10
+    chosen = rng.sample(range(files), edited_count + churn)
+    modified, removed = chosen[:edited_count], chosen[edited_count:]
+    added = range(files, files + churn)
+
+    for index in modified:
+        with open(module_path(root, index), "w", encoding="utf-8") as f:
+            f.write(render_module(index, classes, methods, functions, seed, revision=1))
+    for index in removed:
+        os.remove(module_path(root, index))
+    for index in added:
+        path = module_path(root, index)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(render_module(index, classes, methods, functions, seed))
+
+    return {
+        "modified": [module_path(root, index) for index in modified],
+        "removed": [module_path(root, index) for index in removed],
+        "added": [module_path(root, index) for index in added],
+    }
@@ -0,0 +1,99 @@
+# tests/test_archive_ingestion.py
+
+import asyncio
+import io
+import json
+import tarfile
+import zipfile
+
+import pytest
+
+from backend.nodes.change_detection_node import change_detection_node
+from backend.parser.archive import (
+    count_python_members,
+    detect_archive_format,
+    iter_parsed_files,
+    iter_python_members,
+)
+
+# --- Fixtures ---
+
+FILES = {
+    "./pkg/bank.py": "class Account:\n    def withdraw(self):\n        return 1\n",
+    "./pkg/util.py": "def fmt():\n    return 'x'\n",
+    "./pkg/__pycache__/util.py": "def cached():\n    pass\n",
+    "./.git/hooks/hook.py": "def hook():\n    pass\n",
+    "./README.md": "# readme\n",
+    "../escape.py": "def escape():\n    pass\n",
+}
+
+def _write_zip(path, files):
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return str(path)
+
+def _write_tar(path, files):
+    with tarfile.open(path, "w:gz") as archive:
+        for name, content in files.items():
+            data = content.encode("utf-8")
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return str(path)
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Runs the test from a temporary cwd so project_data/ is isolated."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+def _run(state):
+    return asyncio.run(change_detection_node(state))
+
+# --- Test Cases ---
+
+@pytest.mark.parametrize("writer, expected_format", [(_write_zip, "zip"), (_write_tar, "tar")])
+def test_only_scanned_python_members_are_read(tmp_path, writer, expected_format):
+    archive_path = writer(tmp_path / "upload", FILES)
+
+    assert detect_archive_format(archive_path) == expected_format
+    members = dict(iter_python_members(archive_path))
+    assert sorted(members) == ["pkg/bank.py", "pkg/util.py"]
+    assert members["pkg/util.py"] == FILES["./pkg/util.py"]
+
+def test_member_counts_come_from_the_zip_directory_only(tmp_path):
+    assert count_python_members(_write_zip(tmp_path / "a.zip", FILES)) == 2
+    # Counting a compressed tarball would mean decompressing it twice.
+    assert count_python_members(_write_tar(tmp_path / "a.tgz", FILES)) is None
+
+def test_non_archives_are_rejected(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("just text")
+    assert detect_archive_format(str(path)) is None
+    with pytest.raises(ValueError):
+        list(iter_python_members(str(path)))
+
+def test_parsed_files_are_streamed_from_the_archive(tmp_path):
+    archive_path = _write_tar(tmp_path / "upload", FILES)
+
+    parsed = dict(iter_parsed_files(["pkg/bank.py"], archive_path=archive_path))
+
+    assert list(parsed) == ["pkg/bank.py"]
+    assert [m.name for m in parsed["pkg/bank.py"].classes[0].methods] == ["withdraw"]
+
+def test_archive_uploads_are_diffed_by_archive_relative_path(workdir):
+    first = _run({"project_id": 1, "directory": "code.zip", "archive_path": _write_zip(workdir / "v1", FILES)})
+
+    assert first["files_scanned"] == 2
+    with open("project_data/1/code_hashes.json") as f:
+        assert set(json.load(f)) == {"pkg/bank.py", "pkg/util.py"}
+
+    changed = {**FILES, "./pkg/util.py": "def fmt():\n    return 'y'\n"}
+    del changed["./pkg/bank.py"]
+    second = _run({"project_id": 1, "directory": "code.tar.gz", "archive_path": _write_tar(workdir / "v2", changed)})
+
+    assert sorted((c.file_path, c.item_name, c.change_type) for c in second["changes"]) == [
+        ("pkg/bank.py", "Account", "removed"),
+        ("pkg/util.py", "fmt", "modified"),
+    ]
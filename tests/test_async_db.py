@@ -0,0 +1,103 @@
+# tests/test_async_db.py
+
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from backend.db import database, db_models
+from backend.db import crud as history_crud
+from backend.crud import project_crud
+from backend.db.database import Base, create_db_engine, create_async_db_engine, to_async_url
+from backend import schemas as pydantic_models
+
+# --- Fixtures ---
+
+@pytest.fixture
+def db_url(tmp_path):
+    """A file-backed SQLite database with the schema and one user's project."""
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    engine = create_db_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, username, hashed_password, role) VALUES (1, 'ada', 'x', 'user')"))
+        connection.execute(text("INSERT INTO projects (id, name, user_id) VALUES (1, 'bank', 1)"))
+    engine.dispose()
+    return url
+
+# --- Test Cases ---
+
+def test_async_urls_are_derived_from_the_sync_url():
+    assert to_async_url("sqlite:///./code_intel.db") == "sqlite+aiosqlite:///./code_intel.db"
+    assert to_async_url("postgresql://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert to_async_url("sqlite+aiosqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+    # Explicit sync drivers are swapped; async-capable ones are kept.
+    assert to_async_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert to_async_url("postgres://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert to_async_url("postgresql+psycopg://u:p@db/app") == "postgresql+psycopg://u:p@db/app"
+    assert to_async_url("mysql+pymysql://u:p@db/app") == "mysql+aiomysql://u:p@db/app"
+    assert to_async_url("sqlite+pysqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+
+def test_async_engine_is_created_on_first_use(db_url, monkeypatch):
+    monkeypatch.setattr(database, "_async_engine", None)
+    monkeypatch.setattr(database, "_async_session_factory", None)
+    monkeypatch.setattr(database, "ASYNC_DATABASE_URL", "nosuchdialect+nodriver://db/app")
+    with pytest.raises(Exception):
+        database.get_async_engine()
+
+    monkeypatch.setattr(database, "ASYNC_DATABASE_URL", to_async_url(db_url))
+
+    async def scenario():
+        async with database.AsyncSessionLocal() as db:
+            count = (await db.execute(text("SELECT COUNT(*) FROM projects"))).scalar()
+        assert database.get_async_engine() is database._async_engine
+        await database.dispose_async_engine()
+        return count
+
+    assert asyncio.run(scenario()) == 1
+    assert database._async_engine is None
+
+def test_sqlite_connections_use_wal_and_a_busy_timeout(db_url, monkeypatch):
+    monkeypatch.setattr(database, "SQLITE_BUSY_TIMEOUT_MS", 1234)
+    engine = create_db_engine(db_url)
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+    assert engine.pool.size() == database.DB_POOL_SIZE
+    engine.dispose()
+
+    async def async_pragmas():
+        async_engine = create_async_db_engine(to_async_url(db_url))
+        async with async_engine.connect() as connection:
+            modes = ((await connection.execute(text("PRAGMA journal_mode"))).scalar(),
+                     (await connection.execute(text("PRAGMA busy_timeout"))).scalar())
+        await async_engine.dispose()
+        return modes
+
+    assert asyncio.run(async_pragmas()) == ("wal", 1234)
+
+def test_async_crud_serves_concurrent_requests(db_url):
+    async def scenario():
+        async_engine = create_async_db_engine(to_async_url(db_url))
+        sessions = async_sessionmaker(async_engine, expire_on_commit=False)
+
+        async def ask(i):
+            async with sessions() as db:
+                project = await project_crud.get_project_async(db, project_id=1, user_id=1)
+                assert project is not None and project.name == "bank"
+                await history_crud.create_user_query_async(db, pydantic_models.QueryHistoryCreate(
+                    question=f"q{i}", answer=f"a{i}", user_id=1, project_id=project.id
+                ))
+
+        await asyncio.gather(*(ask(i) for i in range(20)))
+        async with sessions() as db:
+            history = await history_crud.get_user_queries_async(db, user_id=1, limit=100)
+            missing = await project_crud.get_project_async(db, project_id=1, user_id=2)
+            user = await history_crud.get_user_by_username_async(db, "ada")
+        await async_engine.dispose()
+        return history, missing, user
+
+    history, missing, user = asyncio.run(scenario())
+    assert sorted(h.question for h in history) == sorted(f"q{i}" for i in range(20))
+    assert missing is None and user.id == 1
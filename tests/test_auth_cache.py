@@ -0,0 +1,86 @@
+# tests/test_auth_cache.py
+
+import os
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+from backend.core import auth_utils
+from backend.core.cache import TTLLookupCache
+from backend.crud import project_crud
+from backend.db import crud, db_models
+from backend.db.database import Base
+
+# --- Fixtures ---
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(db_models.User(id=1, username="ada", hashed_password="x", role="user"))
+    session.add(db_models.Project(id=1, name="bank", user_id=1))
+    session.commit()
+    auth_utils.principal_cache.clear()
+    project_crud.project_cache.clear()
+    yield session
+    session.close()
+
+class NoDatabase:
+    """Stands in for a session on requests that must be served from the cache."""
+    def query(self, *args):
+        raise AssertionError("the database was queried")
+
+# --- Test Cases ---
+
+def test_tokens_are_resolved_from_the_cache_until_invalidated(db):
+    token = auth_utils.create_access_token({"sub": "ada"})
+
+    principal = auth_utils.get_current_user(token, db)
+    assert principal == auth_utils.Principal(id=1, username="ada", role="user")
+    assert auth_utils.get_current_user(token, NoDatabase()) == principal
+
+    # A role change drops the cached principal, so the next request sees it.
+    crud.update_user_role(db, user_id=1, role="admin")
+    assert auth_utils.invalidate_user_principals(1) == 1
+    assert auth_utils.get_current_user(token, db).role == "admin"
+
+def test_cached_tokens_still_expire(db, monkeypatch):
+    token = auth_utils.create_access_token({"sub": "ada"})
+    auth_utils.get_current_user(token, db)
+
+    monkeypatch.setattr(time, "time", lambda: 2 ** 40)
+    with pytest.raises(HTTPException) as error:
+        auth_utils.get_current_user(token, NoDatabase())
+    assert error.value.status_code == 401
+
+def test_deleted_users_lose_access(db):
+    token = auth_utils.create_access_token({"sub": "ada"})
+    auth_utils.get_current_user(token, db)
+
+    crud.delete_user(db, user_id=1)
+    auth_utils.invalidate_user_principals(1)
+    with pytest.raises(HTTPException):
+        auth_utils.get_current_user(token, db)
+
+def test_project_ownership_is_cached_and_invalidated_on_writes(db):
+    ref = project_crud.get_owned_project(db, project_id=1, user_id=1)
+    assert ref.name == "bank"
+    assert project_crud.get_owned_project(NoDatabase(), project_id=1, user_id=1) == ref
+
+    # Misses are not cached and other users never see the project.
+    assert project_crud.get_owned_project(db, project_id=1, user_id=2) is None
+
+    project_crud.delete_project(db, project_id=1, user_id=1)
+    assert project_crud.get_owned_project(db, project_id=1, user_id=1) is None
+
+def test_a_zero_ttl_disables_caching():
+    cache = TTLLookupCache(maxsize=100, ttl=0)
+    cache.set("token", "principal")
+    assert cache.get("token") is None and len(cache) == 0
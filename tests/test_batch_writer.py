@@ -0,0 +1,88 @@
+# tests/test_batch_writer.py
+
+import asyncio
+
+from backend.jobs.batch_writer import BatchWriter
+
+# --- Fakes ---
+
+class SlowSink:
+    """Records batches; each write waits until `release` is set."""
+
+    def __init__(self):
+        self.batches = []
+        self.release = asyncio.Event()
+
+    async def write(self, batch):
+        await self.release.wait()
+        self.batches.append(list(batch))
+
+# --- Test Cases ---
+
+def test_records_queued_during_a_write_go_out_together():
+    async def scenario():
+        sink = SlowSink()
+        writer = BatchWriter("test", sink.write, max_queue_size=100, batch_size=3)
+        await writer.put(0)
+        await asyncio.sleep(0)  # the worker takes record 0 and blocks writing it
+        for i in range(1, 6):
+            await writer.put(i)
+        sink.release.set()
+        await writer.flush()
+        return sink.batches, writer.written
+
+    batches, written = asyncio.run(scenario())
+
+    assert batches == [[0], [1, 2, 3], [4, 5]] and written == 6
+
+def test_a_full_queue_makes_producers_wait():
+    async def scenario():
+        sink = SlowSink()
+        writer = BatchWriter("test", sink.write, max_queue_size=2, batch_size=10)
+        await writer.put(0)
+        await asyncio.sleep(0)
+        await writer.put(1)
+        await writer.put(2)
+        blocked = asyncio.ensure_future(writer.put(3))
+        await asyncio.sleep(0.01)
+        was_blocked = not blocked.done()
+        sink.release.set()
+        await blocked
+        await writer.shutdown()
+        return was_blocked, sink.batches
+
+    was_blocked, batches = asyncio.run(scenario())
+
+    assert was_blocked
+    assert sum(batches, []) == [0, 1, 2, 3]
+
+def test_shutdown_writes_everything_still_queued():
+    async def scenario():
+        sink = SlowSink()
+        sink.release.set()
+        writer = BatchWriter("test", sink.write, max_queue_size=100, batch_size=100)
+        for i in range(50):
+            await writer.put(i)
+        await writer.shutdown()
+        return sink.batches
+
+    assert sum(asyncio.run(scenario()), []) == list(range(50))
+
+def test_a_failed_batch_is_dropped_and_the_writer_keeps_going():
+    async def scenario():
+        written = []
+
+        async def write(batch):
+            if "bad" in batch:
+                raise RuntimeError("database is locked")
+            written.extend(batch)
+
+        writer = BatchWriter("test", write, max_queue_size=10, batch_size=1)
+        for record in ["a", "bad", "b"]:
+            await writer.put(record)
+        await writer.shutdown()
+        return written, writer.dropped
+
+    written, dropped = asyncio.run(scenario())
+
+    assert written == ["a", "b"] and dropped == 1
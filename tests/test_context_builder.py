@@ -0,0 +1,77 @@
+# tests/test_context_builder.py
+
+import pytest
+
+from backend.query.query_engine import (
+    build_context,
+    format_context_for_llm,
+    estimate_tokens,
+    NO_CONTEXT_MESSAGE,
+)
+
+# --- Helpers ---
+
+def make_result(name, score, text=None, item_type="function", class_name=None, embedding=None, source="/repo/bank.py"):
+    metadata = {"source": source, "type": item_type, "name": name}
+    if class_name:
+        metadata["class"] = class_name
+    result = {"text": text or f"Summary of {name}.", "metadata": metadata, "score": score}
+    if embedding is not None:
+        result["embedding"] = embedding
+    return result
+
+# --- Test Cases ---
+
+def test_results_beyond_the_distance_threshold_are_dropped():
+    results = [make_result("close", 0.3), make_result("far", 1.9)]
+
+    context, packed = build_context(results, max_distance=1.0)
+
+    assert [r["metadata"]["name"] for r in packed] == ["close"]
+    assert "far" not in context
+
+def test_nothing_relevant_yields_the_no_context_message():
+    context, packed = build_context([make_result("far", 1.9)], max_distance=1.0)
+    assert context == NO_CONTEXT_MESSAGE and packed == []
+
+def test_methods_covered_by_a_more_relevant_class_are_collapsed():
+    results = [
+        make_result("Account", 0.2, item_type="class"),
+        make_result("deposit", 0.4, item_type="method", class_name="Account"),
+        make_result("withdraw", 0.1, item_type="method", class_name="Account"),
+    ]
+
+    _, packed = build_context(results)
+
+    assert sorted(r["metadata"]["name"] for r in packed) == ["Account", "withdraw"]
+
+def test_duplicate_summaries_are_kept_once():
+    results = [make_result("a", 0.2, text="Same text."), make_result("b", 0.3, text="Same text.")]
+    _, packed = build_context(results)
+    assert len(packed) == 1
+
+def test_packing_respects_the_token_budget():
+    results = [make_result(f"f{i}", 0.1 + i / 100, text="x" * 400) for i in range(10)]
+
+    context, packed = build_context(results, token_budget=400)
+
+    assert 0 < len(packed) < 10
+    assert estimate_tokens(context) <= 400 + len(packed)
+
+def test_mmr_prefers_diverse_results_over_near_duplicates():
+    results = [
+        make_result("login", 0.10, embedding=[1.0, 0.0, 0.0]),
+        make_result("login_again", 0.11, embedding=[0.99, 0.01, 0.0]),
+        make_result("logout", 0.30, embedding=[0.0, 1.0, 0.0]),
+    ]
+
+    _, packed = build_context(results, mmr_lambda=0.5)
+
+    assert [r["metadata"]["name"] for r in packed] == ["login", "logout", "login_again"]
+
+def test_format_context_for_llm_keeps_its_layout():
+    context = format_context_for_llm([make_result("withdraw", 0.1, item_type="method", class_name="Account")])
+
+    assert context.startswith("Here is some relevant context from the codebase summaries:")
+    assert "Type: method\nClass: Account\nName: withdraw\nSummary: Summary of withdraw.\n---\n\n" in context
+    assert format_context_for_llm([]) == NO_CONTEXT_MESSAGE
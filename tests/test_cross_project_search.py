@@ -0,0 +1,100 @@
+# tests/test_cross_project_search.py
+
+import asyncio
+import time
+
+import pytest
+
+from backend.query import query_engine
+
+# --- Fakes ---
+
+class FakeStore:
+    """Returns canned results after an optional delay, recording its queries."""
+
+    def __init__(self, project_id, scores, delay=0.0, error=None):
+        self.project_id = project_id
+        self.scores = scores
+        self.delay = delay
+        self.error = error
+        self.queries = []
+
+    def search_by_embeddings(self, query_embeddings, top_k=5, where=None, include_embeddings=False):
+        self.queries.append(query_embeddings)
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return [[
+            {"text": f"p{self.project_id} #{i}", "metadata": {"name": f"p{self.project_id}_{i}"}, "score": score}
+            for i, score in enumerate(self.scores[:top_k])
+        ]]
+
+@pytest.fixture
+def stores(monkeypatch):
+    stores = {}
+    embed_calls = []
+
+    def fake_embed(queries):
+        embed_calls.append(list(queries))
+        return [[1.0, 0.0]]
+
+    monkeypatch.setattr(query_engine, "embed_queries", fake_embed)
+    monkeypatch.setattr(query_engine, "get_vector_store", lambda project_id: stores[project_id])
+    monkeypatch.setattr(query_engine, "build_where_clause", lambda project_id, filters: None)
+    stores["embed_calls"] = embed_calls
+    return stores
+
+# --- Test Cases ---
+
+def test_results_are_merged_by_distance_and_tagged_with_their_project(stores):
+    stores[1] = FakeStore(1, [0.5, 0.9])
+    stores[2] = FakeStore(2, [0.1, 0.7])
+
+    search = asyncio.run(query_engine.search_across_projects([1, 2], "where is login?", top_k=3))
+
+    assert [(r["project_id"], r["score"]) for r in search["results"]] == [(2, 0.1), (1, 0.5), (2, 0.7)]
+    assert search["timed_out"] == [] and search["failed"] == []
+
+def test_the_question_is_embedded_once_for_all_projects(stores):
+    for project_id in (1, 2, 3):
+        stores[project_id] = FakeStore(project_id, [0.2])
+
+    asyncio.run(query_engine.search_across_projects([1, 2, 3], "where is login?"))
+
+    assert stores["embed_calls"] == [["where is login?"]]
+    assert all(stores[p].queries == [[[1.0, 0.0]]] for p in (1, 2, 3))
+
+def test_slow_projects_are_cut_off_by_the_deadline(stores):
+    stores[1] = FakeStore(1, [0.3])
+    stores[2] = FakeStore(2, [0.1], delay=1.0)
+
+    async def timed_search():
+        started = time.monotonic()
+        search = await query_engine.search_across_projects([1, 2], "q", deadline_seconds=0.2)
+        return search, time.monotonic() - started
+
+    # Timed inside the loop: asyncio.run itself waits for the abandoned thread.
+    search, elapsed = asyncio.run(timed_search())
+
+    assert elapsed < 0.9
+    assert [r["project_id"] for r in search["results"]] == [1]
+    assert search["timed_out"] == [2]
+
+def test_a_failing_project_does_not_sink_the_search(stores):
+    stores[1] = FakeStore(1, [0.3])
+    stores[2] = FakeStore(2, [], error=RuntimeError("collection missing"))
+
+    search = asyncio.run(query_engine.search_across_projects([1, 2], "q"))
+
+    assert [r["project_id"] for r in search["results"]] == [1]
+    assert search["failed"] == [2]
+
+def test_parallelism_is_bounded(stores):
+    for project_id in range(1, 7):
+        stores[project_id] = FakeStore(project_id, [0.1], delay=0.1)
+
+    started = time.monotonic()
+    asyncio.run(query_engine.search_across_projects(list(range(1, 7)), "q", max_concurrency=2, deadline_seconds=5))
+
+    # Six 0.1s searches two at a time take at least three rounds.
+    assert time.monotonic() - started >= 0.3
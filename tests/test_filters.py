@@ -0,0 +1,108 @@
+# tests/test_filters.py
+
+import pytest
+
+from backend.schemas import SearchFilters
+from backend.query.filters import compile_where_clause, resolve_source_paths, MATCH_NOTHING
+
+# --- Fixtures ---
+
+@pytest.fixture
+def known_sources():
+    return [
+        "/home/dev/bank/backend/api/routes.py",
+        "/home/dev/bank/backend/db/models.py",
+        "/home/dev/bank/backend/db/crud.py",
+        "/home/dev/bank/scripts/seed.py",
+    ]
+
+# --- Test Cases ---
+
+def test_no_filters_compile_to_no_where_clause():
+    assert compile_where_clause(None) is None
+    assert compile_where_clause(SearchFilters()) is None
+
+def test_single_kind_uses_equality_and_many_kinds_use_in():
+    assert compile_where_clause(SearchFilters(kinds=["method"])) == {"type": "method"}
+    assert compile_where_clause(SearchFilters(kinds=["method", "function"])) == {
+        "type": {"$in": ["function", "method"]}
+    }
+
+def test_class_filter_matches_class_record_and_its_methods():
+    where = compile_where_clause(SearchFilters(class_name="Account"))
+    assert where == {"$or": [
+        {"class": "Account"},
+        {"$and": [{"type": "class"}, {"name": "Account"}]},
+    ]}
+
+def test_path_prefix_matches_relative_and_absolute_paths(known_sources):
+    relative = resolve_source_paths(SearchFilters(path_prefix="backend/db"), known_sources)
+    absolute = resolve_source_paths(SearchFilters(path_prefix="/home/dev/bank/backend/db/"), known_sources)
+
+    assert relative == absolute == [
+        "/home/dev/bank/backend/db/crud.py",
+        "/home/dev/bank/backend/db/models.py",
+    ]
+
+def test_path_prefix_matches_whole_directories_or_an_exact_file(known_sources):
+    sources = known_sources + ["/home/dev/bank/backend/api_old/routes.py"]
+
+    assert resolve_source_paths(SearchFilters(path_prefix="backend/api"), sources) == [
+        "/home/dev/bank/backend/api/routes.py",
+    ]
+    assert resolve_source_paths(SearchFilters(path_prefix="backend/db/crud.py"), sources) == [
+        "/home/dev/bank/backend/db/crud.py",
+    ]
+    assert resolve_source_paths(SearchFilters(path_prefix="backend/db/cr"), sources) == []
+
+def test_relative_filters_resolve_against_the_recorded_root():
+    # Every file lives under src/, so the common directory is not the root.
+    sources = ["/home/dev/bank/src/api/routes.py", "/home/dev/bank/src/db/models.py"]
+
+    assert resolve_source_paths(SearchFilters(path_prefix="src/api"), sources, root="/home/dev/bank") == [
+        "/home/dev/bank/src/api/routes.py",
+    ]
+    assert resolve_source_paths(SearchFilters(path_prefix="api"), sources, root="/home/dev/bank") == []
+    assert resolve_source_paths(SearchFilters(file_globs=["src/db/*"]), sources[1:], root="/home/dev/bank") == [
+        "/home/dev/bank/src/db/models.py",
+    ]
+    # Archive members are stored relative already.
+    assert resolve_source_paths(SearchFilters(path_prefix="pkg"), ["pkg/a.py", "tools/b.py"], root="") == ["pkg/a.py"]
+
+def test_file_globs_are_expanded_into_source_membership(known_sources):
+    where = compile_where_clause(SearchFilters(file_globs=["*/models.py", "scripts/*"]), known_sources)
+    assert where == {"source": {"$in": [
+        "/home/dev/bank/backend/db/models.py",
+        "/home/dev/bank/scripts/seed.py",
+    ]}}
+
+def test_filters_that_match_no_files_short_circuit(known_sources):
+    assert compile_where_clause(SearchFilters(path_prefix="frontend/"), known_sources) is MATCH_NOTHING
+
+def test_multiple_filters_are_combined_with_and(known_sources):
+    where = compile_where_clause(
+        SearchFilters(kinds=["method"], path_prefix="backend/api"), known_sources
+    )
+    assert where == {"$and": [
+        {"type": "method"},
+        {"source": "/home/dev/bank/backend/api/routes.py"},
+    ]}
+
+def test_compiled_clause_is_accepted_by_chroma(known_sources):
+    chromadb = pytest.importorskip("chromadb")
+    collection = chromadb.EphemeralClient().get_or_create_collection("filters_test", embedding_function=None)
+    collection.add(
+        ids=["a", "b", "c"],
+        documents=["routes", "Account model", "withdraw"],
+        metadatas=[
+            {"source": known_sources[0], "type": "function", "name": "index"},
+            {"source": known_sources[1], "type": "class", "name": "Account"},
+            {"source": known_sources[1], "type": "method", "class": "Account", "name": "withdraw"},
+        ],
+        embeddings=[[1.0, 0.0], [0.0, 1.0], [0.5, 0.5]],
+    )
+
+    where = compile_where_clause(SearchFilters(class_name="Account", file_globs=["*/models.py"]), known_sources)
+    results = collection.query(query_embeddings=[[1.0, 0.0]], n_results=3, where=where)
+
+    assert sorted(results["ids"][0]) == ["b", "c"]
@@ -0,0 +1,162 @@
+# tests/test_flat_store.py
+
+import threading
+
+import numpy as np
+import pytest
+
+from backend.vectorstore.flat_store import FlatVectorStore
+from backend.vectorstore import factory
+
+# --- Fixtures ---
+
+@pytest.fixture
+def project_dir(tmp_path, monkeypatch):
+    """Runs the test from a temporary cwd so project_data/ is isolated."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def store(project_dir):
+    """A flat store holding a class, one of its methods and a function."""
+    store = FlatVectorStore(project_id=1)
+    store.add_embeddings(
+        ids=["/r/bank.py::Account", "/r/bank.py::Account::withdraw", "/r/util.py::fmt"],
+        embeddings=np.array([[1.0, 0.0, 0.0], [0.8, 0.6, 0.0], [0.0, 0.0, 2.0]]),
+        documents=["Bank account.", "Withdraws money.", "Formats amounts."],
+        metadatas=[
+            {"source": "/r/bank.py", "type": "class", "name": "Account"},
+            {"source": "/r/bank.py", "type": "method", "class": "Account", "name": "withdraw"},
+            {"source": "/r/util.py", "type": "function", "name": "fmt"},
+        ],
+    )
+    return store
+
+# --- Test Cases ---
+
+def test_search_returns_nearest_first_with_squared_l2_distances(store):
+    results = store.search_by_embeddings(np.array([1.0, 0.0, 0.0]), top_k=2)[0]
+
+    assert [r["metadata"]["name"] for r in results] == ["Account", "withdraw"]
+    assert results[0]["score"] == pytest.approx(0.0, abs=1e-6)
+    assert results[1]["score"] == pytest.approx(2 - 2 * 0.8, abs=1e-6)
+
+def test_multiple_queries_are_answered_in_one_call(store):
+    results = store.search_by_embeddings(np.array([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0]]), top_k=1)
+    assert [r[0]["metadata"]["name"] for r in results] == ["Account", "fmt"]
+
+def test_where_clauses_are_applied_before_ranking(store):
+    query = np.array([1.0, 0.0, 0.0])
+
+    methods = store.search_by_embeddings(query, top_k=3, where={"type": "method"})[0]
+    assert [r["metadata"]["name"] for r in methods] == ["withdraw"]
+
+    by_source = store.search_by_embeddings(query, top_k=3, where={"source": {"$in": ["/r/util.py"]}})[0]
+    assert [r["metadata"]["name"] for r in by_source] == ["fmt"]
+
+    by_class = store.search_by_embeddings(query, top_k=3, where={"$or": [
+        {"class": "Account"},
+        {"$and": [{"type": "class"}, {"name": "Account"}]},
+    ]})[0]
+    assert sorted(r["metadata"]["name"] for r in by_class) == ["Account", "withdraw"]
+
+    assert store.search_by_embeddings(query, where={"type": "module"}) == [[]]
+
+def test_upsert_overwrites_existing_ids(store):
+    store.add_embeddings(
+        ids=["/r/util.py::fmt"],
+        embeddings=np.array([[1.0, 0.0, 0.0]]),
+        documents=["Formats amounts nicely."],
+        metadatas=[{"source": "/r/util.py", "type": "function", "name": "fmt"}],
+    )
+
+    assert store.count() == 3
+    top = store.search_by_embeddings(np.array([1.0, 0.0, 0.0]), top_k=3, where={"name": "fmt"})[0][0]
+    assert top["text"] == "Formats amounts nicely."
+    assert top["score"] == pytest.approx(0.0, abs=1e-6)
+
+def test_deletes_persist_and_are_seen_by_other_instances(store):
+    store.delete_summaries(["/r/bank.py::Account::withdraw", "/r/missing.py::nothing"])
+
+    reopened = FlatVectorStore(project_id=1)
+    assert reopened.count() == 2
+    assert "withdraw" not in [r["metadata"]["name"] for r in reopened.search_by_embeddings(np.array([0.8, 0.6, 0.0]), top_k=3)[0]]
+
+def test_backend_is_selected_by_size_and_recorded(project_dir, monkeypatch):
+    monkeypatch.setattr(factory, "VECTOR_BACKEND", "auto")
+    monkeypatch.setattr(factory, "FLAT_INDEX_MAX_VECTORS", 100)
+
+    assert factory.get_project_backend(7) == "chroma"  # legacy projects stay on Chroma
+    assert factory.select_backend_for_project(7, expected_vectors=50) == "flat"
+    assert factory.select_backend_for_project(8, expected_vectors=500) == "chroma"
+
+    # The first choice sticks even if the project later grows.
+    assert factory.select_backend_for_project(7, expected_vectors=5000) == "flat"
+    assert isinstance(factory.get_vector_store(7), FlatVectorStore)
+
+def _clustered_vectors(count, dim=64, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    return (centers[rng.integers(0, clusters, count)] + 0.3 * rng.standard_normal((count, dim))).astype(np.float32)
+
+@pytest.mark.parametrize("storage", ["int8", "float16"])
+def test_quantized_storage_keeps_recall_after_reranking(project_dir, storage):
+    vectors = _clustered_vectors(2000)
+    ids = [f"/r/m.py::f{i}" for i in range(len(vectors))]
+    metadatas = [{"source": "/r/m.py", "type": "function", "name": f"f{i}"} for i in range(len(vectors))]
+    FlatVectorStore(project_id=1, storage="float32").add_embeddings(ids, vectors, [""] * len(ids), metadatas)
+
+    exact = FlatVectorStore(project_id=1, storage="float32")
+    quantized = FlatVectorStore(project_id=1, storage=storage)
+    queries = _clustered_vectors(50, seed=1)
+
+    hits = 0
+    for expected, got in zip(exact.search_by_embeddings(queries, top_k=10), quantized.search_by_embeddings(queries, top_k=10)):
+        hits += len({r["metadata"]["name"] for r in expected} & {r["metadata"]["name"] for r in got})
+        # Re-ranked scores are exact, so they can never beat the true nearest neighbour.
+        assert got[0]["score"] >= expected[0]["score"] - 1e-5
+    assert hits / (50 * 10) >= 0.95
+
+def test_int8_storage_shrinks_the_in_memory_index(project_dir):
+    vectors = _clustered_vectors(500, dim=384)
+    ids = [f"/r/m.py::f{i}" for i in range(len(vectors))]
+    metadatas = [{"source": "/r/m.py"} for _ in ids]
+    store = FlatVectorStore(project_id=1, storage="int8")
+    store.add_embeddings(ids, vectors, [""] * len(ids), metadatas)
+
+    full_bytes = vectors.size * 4
+    assert store.memory_bytes() <= full_bytes / 3.5
+    # The quantized copy is persisted and reused by new instances.
+    assert FlatVectorStore(project_id=1, storage="int8").memory_bytes() == store.memory_bytes()
+
+@pytest.mark.parametrize("storage", ["float32", "int8"])
+def test_searches_see_a_consistent_index_while_another_thread_writes(project_dir, storage):
+    vectors = _clustered_vectors(200, dim=32)
+    ids = [f"/r/m.py::f{i}" for i in range(len(vectors))]
+    store = FlatVectorStore(project_id=1, storage=storage)
+    store.add_embeddings(ids, vectors, ids, [{"type": "function", "name": doc_id} for doc_id in ids])
+    queries = _clustered_vectors(4, dim=32, seed=1)
+    stop, errors = threading.Event(), []
+
+    def search():
+        while not stop.is_set():
+            try:
+                for results in store.search_by_embeddings(queries, top_k=5, where={"type": "function"}):
+                    assert len(results) == 5
+                    assert all(r["text"] == r["metadata"]["name"] for r in results)
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=search) for _ in range(2)]
+    for reader in readers:
+        reader.start()
+    for round_ in range(30):
+        extra = f"/r/m.py::extra{round_}"
+        store.add_embeddings([extra], vectors[:1], [extra], [{"type": "function", "name": extra}])
+        store.delete_summaries([extra])
+    stop.set()
+    for reader in readers:
+        reader.join()
+
+    assert errors == []
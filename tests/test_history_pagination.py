@@ -0,0 +1,100 @@
+# tests/test_history_pagination.py
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.db import crud, db_models
+from backend.db.database import Base
+from backend.db.migrations import create_missing_indexes
+
+# --- Fixtures ---
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    session.add(db_models.User(id=1, username="ada", hashed_password="x"))
+    session.add(db_models.User(id=2, username="bob", hashed_password="x"))
+    # Rows written within the same second share a timestamp.
+    for i in range(7):
+        session.execute(text(
+            "INSERT INTO query_history (question, answer, timestamp, user_id, project_id) "
+            "VALUES (:q, 'a', :ts, 1, :project)"
+        ), {"q": f"q{i}", "ts": f"2025-01-0{1 + i // 3} 12:00:00", "project": 1 + i % 2})
+    session.add(db_models.QueryHistory(question="other", answer="a", user_id=2, project_id=1))
+    session.commit()
+    yield session
+    session.close()
+
+def _all_pages(db, **kwargs):
+    pages, cursor = [], None
+    while True:
+        items, cursor = crud.get_history_page(db, user_id=1, cursor=cursor, **kwargs)
+        pages.append([item.question for item in items])
+        if cursor is None:
+            return pages
+
+# --- Test Cases ---
+
+def test_pages_cover_the_history_once_newest_first(db):
+    pages = _all_pages(db, limit=2)
+
+    assert pages == [["q6", "q5"], ["q4", "q3"], ["q2", "q1"], ["q0"]]
+
+def test_pages_can_be_limited_to_a_project(db):
+    assert _all_pages(db, project_id=2, limit=2) == [["q5", "q3"], ["q1"]]
+
+def test_malformed_cursors_are_rejected(db):
+    with pytest.raises(ValueError):
+        crud.get_history_page(db, user_id=1, cursor="not-a-cursor")
+
+def test_pages_are_read_through_the_composite_index(engine, db):
+    _, cursor = crud.get_history_page(db, user_id=1, limit=2)
+    timestamp, entry_id = crud.decode_history_cursor(cursor)
+
+    with engine.connect() as connection:
+        plan = connection.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM query_history WHERE user_id = 1 "
+            "AND (timestamp, id) < (:ts, :id) ORDER BY timestamp DESC, id DESC LIMIT 3"
+        ), {"ts": timestamp, "id": entry_id}).fetchall()
+
+    details = " ".join(row[-1] for row in plan)
+    assert "ix_query_history_user_timestamp" in details and "TEMP B-TREE" not in details
+
+def test_missing_indexes_are_added_to_existing_tables():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_query_history_user_timestamp"))
+
+    assert create_missing_indexes(engine) == 1
+    names = {index["name"] for index in inspect(engine).get_indexes("query_history")}
+    assert "ix_query_history_user_timestamp" in names
+    assert create_missing_indexes(engine) == 0
+
+def test_history_endpoint_returns_pages(engine, db):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from backend.api import history_routes
+    from backend.core import auth_utils
+    from backend.db.database import get_db
+
+    app = FastAPI()
+    app.include_router(history_routes.router)
+    app.dependency_overrides[auth_utils.get_current_user] = lambda: auth_utils.Principal(1, "ada", "user")
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    first = client.get("/api/history", params={"limit": 4}).json()
+    second = client.get("/api/history", params={"limit": 4, "cursor": first["next_cursor"]}).json()
+
+    assert [item["question"] for item in first["items"] + second["items"]] == [f"q{i}" for i in range(6, -1, -1)]
+    assert second["next_cursor"] is None
+    assert client.get("/api/history", params={"cursor": "not-a-cursor"}).status_code == 400
@@ -0,0 +1,75 @@
+# tests/test_history_search.py
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.db import crud, db_models
+from backend.db.database import Base
+from backend.db.migrations import create_history_search_index
+
+# --- Fixtures ---
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        db_models.QueryHistory(question="How does withdrawal work?", answer="Account.withdraw checks the balance.", user_id=1, project_id=1),
+        db_models.QueryHistory(question="Where are deposits handled?", answer="In Account.deposit.", user_id=1, project_id=1),
+        db_models.QueryHistory(question="What does withdraw do in the ATM?", answer="It calls the bank.", user_id=1, project_id=2),
+        db_models.QueryHistory(question="withdraw withdraw", answer="Someone else's question.", user_id=2, project_id=1),
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+def _questions(results):
+    return [entry.question for entry, _, _ in results]
+
+# --- Test Cases ---
+
+def test_search_is_ranked_and_scoped_to_the_user(db):
+    results = crud.search_history(db, user_id=1, search="withdraw balance")
+
+    assert _questions(results) == ["How does withdrawal work?"]
+    entry, score, snippet = results[0]
+    assert score > 0 and "[balance]" in snippet
+
+    # Stemming matches "withdrawal" too; the other user's row is never returned.
+    assert sorted(_questions(crud.search_history(db, user_id=1, search="withdraw"))) == [
+        "How does withdrawal work?", "What does withdraw do in the ATM?"
+    ]
+    assert _questions(crud.search_history(db, user_id=1, search="withdraw", project_id=2)) == [
+        "What does withdraw do in the ATM?"
+    ]
+
+def test_index_follows_updates_and_deletes(db):
+    entry = db.query(db_models.QueryHistory).filter_by(question="Where are deposits handled?").one()
+    entry.answer = "Overdraft rules live in the ledger."
+    db.commit()
+    assert _questions(crud.search_history(db, user_id=1, search="overdraft")) == ["Where are deposits handled?"]
+
+    db.delete(entry)
+    db.commit()
+    assert crud.search_history(db, user_id=1, search="overdraft") == []
+
+def test_search_syntax_in_user_input_is_taken_literally(db):
+    assert crud.search_history(db, user_id=1, search='withdraw" OR NEAR(') == []
+    assert crud.search_history(db, user_id=1, search="?!") == []
+
+def test_existing_history_is_indexed_by_the_migration():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE query_history (id INTEGER PRIMARY KEY, question TEXT, answer TEXT, "
+            "timestamp DATETIME, user_id INTEGER, project_id INTEGER)"
+        ))
+        connection.execute(text("INSERT INTO query_history VALUES (1, 'Old question about ledgers', 'x', NULL, 1, 1)"))
+
+    assert create_history_search_index(engine) is True
+    session = sessionmaker(bind=engine)()
+    assert _questions(crud.search_history(session, user_id=1, search="ledgers")) == ["Old question about ledgers"]
+    assert create_history_search_index(engine) is False
@@ -0,0 +1,319 @@
+# tests/test_ingestion_jobs.py
+
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.db import db_models
+from backend.db.database import Base
+from backend.crud import job_crud
+from backend.jobs.manager import IngestionJobManager
+
+# --- Fakes ---
+
+class FakeGraph:
+    """Yields one update per ingestion node, optionally pausing before a node."""
+
+    def __init__(self, pause_before=None, fail_at=None):
+        self.pause_before = pause_before
+        self.fail_at = fail_at
+        self.paused = asyncio.Event()
+        self.resume = asyncio.Event()
+        self.runs = []
+        self.active = 0
+        self.max_active = 0
+
+    async def astream(self, state, stream_mode="updates"):
+        self.runs.append(state["directory"])
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            async for chunk in self._updates():
+                yield chunk
+        finally:
+            self.active -= 1
+
+    async def _updates(self):
+        updates = [
+            ("detect_changes", {"changes": ["a", "b", "c"], "files_scanned": 7}),
+            ("summarize_changes", {"summaries": ["s1", "s2"]}),
+            ("ingest_text_updates", {}),
+            ("ingest_vector_updates", {"ingestion_status": "success", "vectors_written": 2, "vectors_deleted": 1}),
+        ]
+        for node, update in updates:
+            if node == self.pause_before and len(self.runs) == 1:
+                self.paused.set()
+                await self.resume.wait()
+            if node == self.fail_at:
+                raise RuntimeError(f"{node} blew up")
+            yield {node: update}
+
+# --- Fixtures ---
+
+@pytest.fixture
+def session_factory(tmp_path):
+    # A file, not a shared in-memory connection: the manager writes from worker threads.
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with factory() as db:
+        db.add(db_models.User(id=1, username="ada", hashed_password="x"))
+        db.add(db_models.Project(id=1, name="bank", user_id=1))
+        db.commit()
+    return factory
+
+def _manager(session_factory, graph=None, **kwargs):
+    return IngestionJobManager(session_factory=session_factory, graph=graph, lock_poll_seconds=0.01, **kwargs)
+
+def _job(session_factory, job_id):
+    with session_factory() as db:
+        return job_crud.get_ingestion_job(db, job_id)
+
+async def _wait_for(manager, job_id):
+    task = manager._tasks.get(job_id)
+    if task is not None:
+        await task
+
+# --- Test Cases ---
+
+def test_job_runs_in_the_background_and_records_progress(session_factory):
+    manager = _manager(session_factory, graph=FakeGraph())
+
+    async def scenario():
+        job, _ = manager.submit(project_id=1, user_id=1, directory="/repo")
+        assert job.status == "queued"
+        await _wait_for(manager, job.id)
+        return job.id
+
+    job = _job(session_factory, asyncio.run(scenario()))
+
+    assert job.status == "succeeded"
+    assert job.current_node == "ingest_vector_updates"
+    assert job.progress == {
+        "nodes_completed": ["detect_changes", "summarize_changes", "ingest_text_updates", "ingest_vector_updates"],
+        "files_scanned": 7, "changes": 3, "summaries_done": 2, "vectors_written": 2, "vectors_deleted": 1,
+    }
+    assert job.started_at is not None and job.finished_at is not None
+
+def test_failures_are_recorded_on_the_job(session_factory):
+    manager = _manager(session_factory, graph=FakeGraph(fail_at="summarize_changes"))
+
+    async def scenario():
+        job, _ = manager.submit(project_id=1, user_id=1, directory="/repo")
+        await _wait_for(manager, job.id)
+        return job.id
+
+    job = _job(session_factory, asyncio.run(scenario()))
+    assert job.status == "failed"
+    assert "summarize_changes blew up" in job.error
+    assert job.progress["nodes_completed"] == ["detect_changes"]
+
+def test_running_jobs_can_be_cancelled(session_factory):
+    graph = FakeGraph(pause_before="summarize_changes")
+    manager = _manager(session_factory, graph=graph)
+
+    async def scenario():
+        job, _ = manager.submit(project_id=1, user_id=1, directory="/repo")
+        await graph.paused.wait()
+        assert manager.cancel(job.id, user_id=2) is None  # not the owner
+        assert manager.cancel(job.id, user_id=1).cancel_requested
+        await _wait_for(manager, job.id)
+        return job.id
+
+    job = _job(session_factory, asyncio.run(scenario()))
+    assert job.status == "cancelled"
+    assert job.progress["nodes_completed"] == ["detect_changes"]
+
+def test_job_database_writes_do_not_block_the_event_loop(session_factory):
+    def slow_factory():
+        time.sleep(0.15)  # a write waiting on another connection's lock
+        return session_factory()
+
+    manager = _manager(slow_factory, graph=FakeGraph())
+
+    async def scenario():
+        job, _ = manager.submit(project_id=1, user_id=1, directory="/repo")
+        gaps, last = [], time.perf_counter()
+        while job.id in manager._tasks:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+        return job.id, max(gaps)
+
+    job_id, longest_gap = asyncio.run(scenario())
+    assert _job(session_factory, job_id).status == "succeeded"
+    assert longest_gap < 0.1
+
+def test_jobs_interrupted_by_a_restart_are_failed(session_factory):
+    with session_factory() as db:
+        job = job_crud.create_ingestion_job(db, project_id=1, user_id=1, directory="/repo")
+        job_crud.update_ingestion_job(db, job.id, status="running")
+        done = job_crud.create_ingestion_job(db, project_id=1, user_id=1, directory="/repo")
+        job_crud.update_ingestion_job(db, done.id, status="succeeded")
+        job_id, done_id = job.id, done.id
+
+    assert _manager(session_factory).recover_interrupted_jobs() == 1
+    assert _job(session_factory, job_id).status == "failed"
+    assert _job(session_factory, done_id).status == "succeeded"
+
+def test_overlapping_requests_queue_one_follow_up_run(session_factory):
+    graph = FakeGraph(pause_before="summarize_changes")
+    manager = _manager(session_factory, graph=graph)
+
+    async def scenario():
+        first, created_first = manager.submit(project_id=1, user_id=1, directory="/repo/v1")
+        await graph.paused.wait()
+        second, created_second = manager.submit(project_id=1, user_id=1, directory="/repo/v2")
+        third, created_third = manager.submit(project_id=1, user_id=1, directory="/repo/v3")
+        assert (created_first, created_second, created_third) == (True, True, False)
+        assert third.id == second.id
+
+        graph.resume.set()
+        await manager.wait(second.id)
+        return first.id, second.id
+
+    first_id, second_id = asyncio.run(scenario())
+
+    # The follow-up ran once, after the first run, with the latest directory.
+    assert graph.runs == ["/repo/v1", "/repo/v3"]
+    assert graph.max_active == 1
+    assert _job(session_factory, first_id).status == "succeeded"
+    assert _job(session_factory, second_id).status == "succeeded"
+
+def test_project_lock_excludes_other_workers_until_stale(session_factory):
+    with session_factory() as db:
+        assert job_crud.try_acquire_project_lock(db, 1, "job-a", "host:1", ttl_seconds=60)
+        assert not job_crud.try_acquire_project_lock(db, 1, "job-b", "host:2", ttl_seconds=60)
+
+        # Once the holder stops heart-beating, another worker may take over.
+        lock = db.get(db_models.IngestionLock, 1)
+        lock.heartbeat_at -= timedelta(seconds=120)
+        db.commit()
+        assert job_crud.try_acquire_project_lock(db, 1, "job-b", "host:2", ttl_seconds=60)
+        assert not job_crud.refresh_project_lock(db, 1, "job-a")
+
+        job_crud.release_project_lock(db, 1, "job-b")
+        assert db.get(db_models.IngestionLock, 1) is None
+
+def test_jobs_that_lose_the_project_lock_are_stopped_and_failed(session_factory):
+    graph = FakeGraph(pause_before="summarize_changes")
+    manager = _manager(session_factory, graph=graph, lock_ttl_seconds=0.03)
+
+    async def scenario():
+        job, _ = manager.submit(project_id=1, user_id=1, directory="/repo")
+        await graph.paused.wait()
+        # Another worker takes the lock over while this one is stalled.
+        with session_factory() as db:
+            lock = db.get(db_models.IngestionLock, 1)
+            lock.job_id, lock.owner = "job-b", "host:2"
+            db.commit()
+        await _wait_for(manager, job.id)
+        return job.id
+
+    job = _job(session_factory, asyncio.run(scenario()))
+    assert job.status == "failed" and "lost the project lock" in job.error.lower()
+    assert job.progress["nodes_completed"] == ["detect_changes"]
+    with session_factory() as db:
+        assert db.get(db_models.IngestionLock, 1).job_id == "job-b"  # not released by the loser
+
+def test_jobs_held_by_a_live_worker_survive_another_workers_restart(session_factory):
+    with session_factory() as db:
+        job = job_crud.create_ingestion_job(db, project_id=1, user_id=1, directory="/repo")
+        job_crud.update_ingestion_job(db, job.id, status="running")
+        job_crud.try_acquire_project_lock(db, 1, job.id, "other-host:42", ttl_seconds=60)
+        job_id = job.id
+
+    assert _manager(session_factory).recover_interrupted_jobs() == 0
+    assert _job(session_factory, job_id).status == "running"
+
+def test_live_progress_reaches_subscribers_and_the_job_record(session_factory, monkeypatch):
+    from backend.jobs import manager as manager_module, progress as progress_module
+    from backend.jobs.progress import progress_bus, progress_reporter
+
+    monkeypatch.setattr(manager_module, "LIVE_PROGRESS_PERSIST_SECONDS", 0.01)
+    monkeypatch.setattr(progress_module, "PROGRESS_MIN_INTERVAL_SECONDS", 0)
+
+    class ReportingGraph(FakeGraph):
+        async def _updates(self):
+            reporter = progress_reporter({"job_id": self.job_id}, "detect_changes", total=2, unit="files")
+            reporter.advance(current_file="/repo/a.py")
+            await asyncio.sleep(0.05)  # let the snapshot be persisted
+            reporter.advance(current_file="/repo/b.py")
+            reporter.finish()
+            yield {"detect_changes": {"changes": [], "files_scanned": 2}}
+
+        async def astream(self, state, stream_mode="updates"):
+            self.job_id = state["job_id"]
+            async for chunk in super().astream(state, stream_mode):
+                yield chunk
+
+    manager = _manager(session_factory, graph=ReportingGraph())
+    persisted = []
+
+    async def scenario():
+        job, _ = manager.submit(project_id=1, user_id=1, directory="/repo")
+        with progress_bus.subscribe(job.id) as events:
+            while True:
+                event = await events.get()
+                if event["event"] == "progress" and not persisted:
+                    await asyncio.sleep(0.03)
+                    persisted.append(_job(session_factory, job.id).progress.get("current"))
+                if event["event"] == "job_finished":
+                    break
+                received.append(event)
+        return job.id
+
+    received = []
+    job_id = asyncio.run(scenario())
+
+    assert [e["event"] for e in received] == ["node_started", "progress", "progress", "node_completed"]
+    assert persisted[0]["current_file"] == "/repo/a.py"
+    # The final record keeps the node counters, not the transient snapshot.
+    assert "current" not in _job(session_factory, job_id).progress
+
+def test_attached_requests_merge_their_changed_paths(session_factory):
+    with session_factory() as db:
+        running = job_crud.create_ingestion_job(db, project_id=1, user_id=1, directory="/repo")
+        job_crud.update_ingestion_job(db, running.id, status="running")
+
+        queued, created = job_crud.create_or_attach_ingestion_job(db, 1, 1, "/repo", changed_paths=["/repo/a.py"])
+        merged, attached = job_crud.create_or_attach_ingestion_job(db, 1, 1, "/repo", changed_paths=["/repo/b.py"])
+        assert created and not attached and merged.id == queued.id
+        assert merged.changed_paths == ["/repo/a.py", "/repo/b.py"]
+
+        # A full-scan request widens the queued job to a full scan.
+        full, _ = job_crud.create_or_attach_ingestion_job(db, 1, 1, "/repo")
+        assert full.id == queued.id and full.changed_paths is None
+
+def test_uploaded_archives_are_deleted_once_no_job_reads_them(session_factory, tmp_path):
+    first, second = tmp_path / "first", tmp_path / "second"
+    first.write_bytes(b"zip")
+    second.write_bytes(b"zip")
+    graph = FakeGraph(pause_before="summarize_changes")
+
+    async def scenario():
+        manager = _manager(session_factory, graph)
+        running, _ = manager.submit(1, 1, "v1.zip", archive_path=str(first))
+        await asyncio.wait_for(graph.paused.wait(), timeout=5)
+
+        queued, _ = manager.submit(1, 1, "v2.zip", archive_path=str(first))
+        assert first.exists()  # still read by the running job
+        # A newer upload replaces the archive of the queued follow-up run.
+        manager.submit(1, 1, "v3.zip", archive_path=str(second))
+        assert first.exists()
+
+        graph.resume.set()
+        await _wait_for(manager, running.id)
+        await _wait_for(manager, queued.id)
+        return queued.id
+
+    queued_id = asyncio.run(scenario())
+
+    assert graph.runs == ["v1.zip", "v3.zip"]
+    assert _job(session_factory, queued_id).archive_path == str(second)
+    assert not first.exists() and not second.exists()
@@ -0,0 +1,158 @@
+# tests/test_ingestion_progress.py
+
+import asyncio
+import time
+
+import pytest
+
+from backend.jobs import progress as progress_module
+from backend.jobs.progress import ProgressBus, ProgressReporter, progress_bus
+from backend.nodes.change_detection_node import change_detection_node
+from backend.nodes.vector_ingest_node import vector_ingest_node
+
+# --- Fixtures ---
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """A tiny repository, with project_data/ isolated under a temporary cwd."""
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "repo"
+    source.mkdir()
+    (source / "a.py").write_text("def first():\n    return 1\n")
+    (source / "b.py").write_text("class Second:\n    def run(self):\n        return 2\n")
+    return source
+
+def _drain(queue):
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+# --- Test Cases ---
+
+def test_reporter_publishes_counts_rate_and_eta(monkeypatch):
+    monkeypatch.setattr(progress_module, "PROGRESS_MIN_INTERVAL_SECONDS", 0)
+    bus = ProgressBus()
+
+    async def scenario():
+        with bus.subscribe("job-1") as events:
+            reporter = ProgressReporter(bus, "job-1", "detect_changes", total=4, unit="files")
+            reporter.started -= 2.0  # pretend two seconds have passed
+            reporter.advance(current_file="/repo/a.py")
+            reporter.advance(current_file="/repo/b.py")
+            reporter.finish()
+            return _drain(events)
+
+    started, first, second, completed = asyncio.run(scenario())
+
+    assert started["event"] == "node_started" and started["total"] == 4
+    assert (first["done"], first["current_file"]) == (1, "/repo/a.py")
+    assert second["rate_per_second"] == pytest.approx(1.0, rel=0.05)
+    assert second["eta_seconds"] == pytest.approx(2.0, rel=0.05)
+    assert completed["event"] == "node_completed" and completed["done"] == 2
+    assert bus.latest("job-1") == completed
+
+def test_progress_events_are_throttled_except_the_last_one(monkeypatch):
+    monkeypatch.setattr(progress_module, "PROGRESS_MIN_INTERVAL_SECONDS", 60)
+    bus = ProgressBus()
+
+    async def scenario():
+        with bus.subscribe("job-1") as events:
+            reporter = ProgressReporter(bus, "job-1", "summarize_changes", total=100, unit="summaries")
+            for _ in range(100):
+                reporter.advance()
+            return _drain(events)
+
+    events = asyncio.run(scenario())
+    assert [(e["event"], e["done"]) for e in events] == [("node_started", 0), ("progress", 100)]
+
+def test_slow_subscribers_drop_their_oldest_events(monkeypatch):
+    monkeypatch.setattr(progress_module, "SUBSCRIBER_QUEUE_SIZE", 3)
+    bus = ProgressBus()
+
+    async def scenario():
+        with bus.subscribe("job-1") as events:
+            for i in range(5):
+                bus.publish("job-1", {"event": "progress", "done": i})
+            received = [e["done"] for e in _drain(events)]
+        bus.publish("job-1", {"event": "progress", "done": 5})  # nobody listening
+        return received
+
+    assert asyncio.run(scenario()) == [2, 3, 4]
+
+def test_reporters_without_a_job_only_count():
+    bus = ProgressBus()
+    reporter = ProgressReporter(bus, None, "detect_changes", total=1, unit="files")
+    reporter.advance()
+    assert reporter.done == 1 and bus.latest(None) is None
+
+def test_change_detection_reports_each_scanned_file(repo, monkeypatch):
+    monkeypatch.setattr(progress_module, "PROGRESS_MIN_INTERVAL_SECONDS", 0)
+
+    async def scenario():
+        with progress_bus.subscribe("job-cd") as events:
+            result = await change_detection_node({"project_id": 1, "directory": str(repo), "job_id": "job-cd"})
+            return result, _drain(events)
+
+    result, events = asyncio.run(scenario())
+    progress_bus.forget("job-cd")
+
+    assert result["files_scanned"] == 2
+    files = [e["current_file"] for e in events if e["event"] == "progress"]
+    assert sorted(f.rsplit("/", 1)[-1] for f in files) == ["a.py", "b.py"]
+    assert events[-1]["event"] == "node_completed" and events[-1]["done"] == 2
+
+def test_change_detection_progress_arrives_while_the_node_runs(repo, monkeypatch):
+    from backend.nodes import change_detection_node as node_module
+
+    monkeypatch.setattr(progress_module, "PROGRESS_MIN_INTERVAL_SECONDS", 0)
+    parse_file = node_module.parse_file
+
+    def slow_parse(path):
+        time.sleep(0.05)
+        return parse_file(path)
+
+    monkeypatch.setattr(node_module, "parse_file", slow_parse)
+    for i in range(4):
+        (repo / f"extra_{i}.py").write_text(f"def extra_{i}():\n    return {i}\n")
+
+    async def scenario():
+        with progress_bus.subscribe("job-live") as events:
+            node = asyncio.create_task(change_detection_node({"project_id": 1, "directory": str(repo), "job_id": "job-live"}))
+            first = await asyncio.wait_for(events.get(), timeout=5)  # node_started
+            second = await asyncio.wait_for(events.get(), timeout=5)
+            still_running = not node.done()
+            await node
+            return first, second, still_running
+
+    first, second, still_running = asyncio.run(scenario())
+    progress_bus.forget("job-live")
+
+    assert (first["event"], second["event"]) == ("node_started", "progress")
+    assert still_running
+
+def test_vector_writes_leave_the_event_loop_free(monkeypatch):
+    from backend.nodes import vector_ingest_node as node_module
+
+    class SlowStore:
+        def delete_summaries(self, ids):
+            time.sleep(0.1)
+
+        def add_documents(self, documents, ids):
+            time.sleep(0.2)  # embedding
+
+    monkeypatch.setattr(node_module, "get_vector_store", lambda project_id: SlowStore())
+    summaries = [{"file_path": "/r/a.py", "function_name": "first", "summary": "Returns one."}]
+
+    async def scenario():
+        node = asyncio.create_task(vector_ingest_node({"project_id": 1, "changes": [], "summaries": summaries}))
+        ticks = 0
+        while not node.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        return await node, ticks
+
+    result, ticks = asyncio.run(scenario())
+
+    assert (result["ingestion_status"], result["vectors_written"], result["vectors_deleted"]) == ("success", 1, 1)
+    assert ticks >= 10
@@ -0,0 +1,166 @@
+# tests/test_llm_usage.py
+
+import asyncio
+import threading
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.api import admin_routes, search_routes
+from backend.core import auth_utils, llm_metrics
+from backend.core.llm_metrics import LLMMetricsCallback
+from backend.core.llm_usage import estimate_cost, llm_usage_scope
+from backend.crud import usage_crud
+from backend.db import db_models
+from backend.db.database import Base, get_async_db, get_db
+from backend.jobs.batch_writer import BatchWriter
+
+# --- Fixtures ---
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(db_models.Project(id=1, name="alpha", user_id=1))
+    session.add(db_models.IngestionJob(id="job-a", project_id=1, user_id=1, directory="/src", status="succeeded", progress={}))
+    calls = [
+        # (project, user, job, purpose, model, status, input, output, day)
+        (1, 1, "job-a", "summary", "gemini-2.0-flash", "ok", 1000, 200, 1),
+        (1, 1, "job-a", "summary", "gemini-2.0-flash", "error", 0, 0, 1),
+        (1, 2, None, "answer", "gemini-1.5-flash", "ok", 3000, 500, 2),
+        (2, 2, None, "answer", "gemini-1.5-flash", "ok", 100, 10, 3),
+    ]
+    for project_id, user_id, job_id, purpose, model, status, input_tokens, output_tokens, day in calls:
+        session.add(db_models.LLMUsage(
+            project_id=project_id, user_id=user_id, job_id=job_id, purpose=purpose, model=model,
+            status=status, input_tokens=input_tokens, output_tokens=output_tokens, latency_seconds=0.5,
+            cost_usd=estimate_cost(model, input_tokens, output_tokens), timestamp=datetime(2025, 1, day, 12),
+        ))
+    session.commit()
+    yield session
+    session.close()
+
+def _response(input_tokens, output_tokens):
+    message = AIMessage(content="ok", usage_metadata={
+        "input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens,
+    })
+    return LLMResult(generations=[[ChatGeneration(message=message)]])
+
+# --- Test Cases ---
+
+def test_calls_are_attributed_to_the_scope_they_start_in(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(llm_metrics, "_record_usage", recorded.append)
+    callback = LLMMetricsCallback("summary", model="gemini-2.0-flash")
+
+    async def call():
+        run_id = uuid4()
+        callback.on_chat_model_start({}, [[]], run_id=run_id)
+        await asyncio.sleep(0)
+        callback.on_llm_end(_response(2_000_000, 500_000), run_id=run_id)
+
+    async def scenario():
+        with llm_usage_scope(project_id=7, user_id=3, job_id="job-7"):
+            await asyncio.create_task(call())  # tasks inherit the scope
+        await call()
+
+    asyncio.run(scenario())
+
+    scoped, unscoped = recorded
+    assert (scoped.project_id, scoped.user_id, scoped.job_id) == (7, 3, "job-7")
+    assert (scoped.input_tokens, scoped.output_tokens, scoped.status) == (2_000_000, 500_000, "ok")
+    assert scoped.cost_usd == pytest.approx(2 * 0.10 + 0.5 * 0.40)
+    assert (unscoped.project_id, unscoped.job_id) == (None, None)
+
+def test_records_can_be_queued_without_awaiting():
+    async def scenario():
+        batches = []
+
+        async def write(batch):
+            batches.append(list(batch))
+
+        writer = BatchWriter("test", write, max_queue_size=2)
+        assert writer.put_nowait(1)
+        # From a worker thread while the writer's loop runs
+        thread = threading.Thread(target=writer.put_nowait, args=(2,))
+        thread.start()
+        await asyncio.to_thread(thread.join)
+        await asyncio.sleep(0)
+        await writer.flush()
+        await writer.shutdown()
+        return batches, writer
+
+    batches, writer = asyncio.run(scenario())
+
+    assert sum(batches, []) == [1, 2]
+    # Once the writer's loop is gone, records are counted as dropped.
+    assert writer.put_nowait(3) is False and writer.dropped == 1
+
+def test_project_report_breaks_usage_down(db):
+    projects = usage_crud.get_usage_by_project(db)
+    assert [(row["project_id"], row["project_name"], row["calls"]) for row in projects] == [(1, "alpha", 3), (2, None, 1)]
+
+    totals = usage_crud.get_usage_totals(db, project_id=1)
+    assert (totals["calls"], totals["failed_calls"], totals["input_tokens"], totals["output_tokens"]) == (3, 1, 4000, 700)
+
+    by_run = usage_crud.get_usage_by_run(db, project_id=1)
+    assert [(row["job_id"], row["calls"]) for row in by_run] == [(None, 1), ("job-a", 2)]
+
+    since = usage_crud.get_usage_totals(db, project_id=1, since=datetime(2025, 1, 2))
+    assert since["calls"] == 1
+
+def test_admin_usage_endpoints(db):
+    app = FastAPI()
+    app.include_router(admin_routes.router)
+    app.dependency_overrides[auth_utils.get_current_admin_user] = lambda: None
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    report = client.get("/admin/usage/runs/job-a").json()
+    assert report["status"] == "succeeded" and report["user_id"] == 1
+    assert report["totals"]["calls"] == 2 and report["totals"]["failed_calls"] == 1
+    assert [(row["purpose"], row["model"]) for row in report["by_purpose"]] == [("summary", "gemini-2.0-flash")]
+
+    project = client.get("/admin/usage/projects/1").json()
+    assert [row["user_id"] for row in project["by_user"]] == [1, 2]
+    assert project["totals"]["cost_usd"] == pytest.approx(sum(row["cost_usd"] for row in project["by_purpose"]))
+
+    assert client.get("/admin/usage/runs/missing").status_code == 404
+
+def test_cross_project_answers_are_billed_to_the_user(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(llm_metrics, "_record_usage", recorded.append)
+
+    async def search_user_projects(db, user_id, request, top_k, include_embeddings):
+        return {"results": [], "timed_out": [], "failed": []}
+
+    async def generate_node(state):
+        callback, run_id = LLMMetricsCallback("answer", model="gemini-1.5-flash"), uuid4()
+        callback.on_chat_model_start({}, [[]], run_id=run_id)
+        callback.on_llm_end(_response(300, 40), run_id=run_id)
+        return {"answer": "ok"}
+
+    async def no_db():
+        yield None
+
+    monkeypatch.setattr(search_routes, "_search_user_projects", search_user_projects)
+    monkeypatch.setattr(search_routes, "build_context", lambda results: ("", []))
+    monkeypatch.setattr(search_routes, "generate_node", generate_node)
+    app = FastAPI()
+    app.include_router(search_routes.router)
+    app.dependency_overrides[auth_utils.get_current_user] = lambda: auth_utils.Principal(5, "ada", "user")
+    app.dependency_overrides[get_async_db] = no_db
+
+    assert TestClient(app).post("/api/ask", json={"question": "Where is interest computed?"}).status_code == 200
+
+    (usage,) = recorded
+    assert (usage.user_id, usage.project_id, usage.purpose) == (5, None, "answer")
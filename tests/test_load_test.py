@@ -0,0 +1,57 @@
+# tests/test_load_test.py
+
+import asyncio
+import statistics
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from benchmarks.fake_providers import FakeChatModel, FakeEmbeddingFunction, parse_latency
+from benchmarks.load_test import _percentile, report_level
+
+# --- Test Cases ---
+
+def test_latency_distributions_are_seeded_and_bounded():
+    assert parse_latency("0.25")() == 0.25
+    assert parse_latency("fixed:0.5")() == 0.5
+
+    uniform = [parse_latency("uniform:0.2,0.4", seed=1)() for _ in range(3)]
+    assert uniform == [parse_latency("uniform:0.2,0.4", seed=1)() for _ in range(3)]
+    sample = parse_latency("uniform:0.2,0.4", seed=1)
+    assert all(0.2 <= sample() <= 0.4 for _ in range(100))
+
+    sample = parse_latency("lognormal:0.5,0.6", seed=2)
+    assert statistics.median(sample() for _ in range(2001)) == pytest.approx(0.5, rel=0.1)
+    sample = parse_latency("normal:0.01,1.0")
+    assert min(sample() for _ in range(100)) >= 0.0
+
+    for spec in ("gamma:1,2", "uniform:0.5", "fixed:"):
+        with pytest.raises(ValueError):
+            parse_latency(spec)
+
+def test_fake_chat_model_reports_usage_and_injects_failures():
+    model = FakeChatModel(sample_latency=lambda: 0.0)
+    message = asyncio.run(model.ainvoke([HumanMessage(content="x" * 400)]))
+    assert message.usage_metadata["input_tokens"] == 100
+    assert message.usage_metadata["output_tokens"] > 0
+
+    failing = FakeChatModel(sample_latency=lambda: 0.0, error_rate=1.0)
+    with pytest.raises(RuntimeError, match="Fake LLM failure"):
+        failing.invoke("hello")
+
+def test_fake_embeddings_are_deterministic_and_word_based():
+    embed = FakeEmbeddingFunction(lambda: 0.0, dim=64)
+    first, again, other = embed(["compute the total", "compute the total", "unrelated words here"])
+    assert first == again and len(first) == 64
+    assert first != other
+
+def test_report_breaks_samples_down_by_kind():
+    samples = [{"kind": "ask", "latency": latency / 1000, "error": None} for latency in range(1, 101)]
+    samples += [{"kind": "ingest", "latency": 2.0, "error": "HTTP 500"}, {"kind": "ingest", "latency": 1.0, "error": None}]
+
+    row = report_level(samples, concurrency=4, elapsed=10.0)
+
+    assert row["ask"]["p50_ms"] == 50.0 and row["ask"]["p99_ms"] == 99.0 and row["ask"]["max_ms"] == 100.0
+    assert row["ingest"]["errors"] == {"HTTP 500": 1} and row["ingest"]["error_rate"] == 0.5
+    assert row["all"]["requests"] == 102 and row["all"]["throughput_rps"] == 10.2
+    assert _percentile([], 99) == 0.0
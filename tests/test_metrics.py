@@ -0,0 +1,76 @@
+# tests/test_metrics.py
+
+import asyncio
+from uuid import uuid4
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from prometheus_client import REGISTRY
+
+from backend.core import metrics
+from backend.core.cache import TTLLookupCache
+from backend.core.llm_metrics import LLMMetricsCallback
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+# --- Test Cases ---
+
+def test_project_labels_are_bounded(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_MAX_PROJECTS", 2)
+    monkeypatch.setattr(metrics, "_project_labels", {})
+
+    labels = [metrics.project_label(project_id) for project_id in (7, 8, 9, 7, 10)]
+
+    assert labels == ["7", "8", "other", "7", "other"]
+
+def test_nodes_are_timed_and_tracked_in_flight():
+    in_flight = []
+
+    @metrics.instrument_node("test", "step")
+    async def step(state):
+        in_flight.append(_sample("codehelp_graph_nodes_in_flight", graph="test", node="step"))
+        if state.get("fail"):
+            raise RuntimeError("boom")
+        return {"done": True}
+
+    before_ok = _sample("codehelp_graph_node_duration_seconds_count", graph="test", node="step", project="1", status="ok")
+    assert asyncio.run(step({"project_id": 1})) == {"done": True}
+    with pytest.raises(RuntimeError):
+        asyncio.run(step({"project_id": 1, "fail": True}))
+
+    assert in_flight == [1.0, 1.0]
+    assert _sample("codehelp_graph_nodes_in_flight", graph="test", node="step") == 0.0
+    assert _sample("codehelp_graph_node_duration_seconds_count", graph="test", node="step", project="1", status="ok") == before_ok + 1
+    assert _sample("codehelp_graph_node_duration_seconds_count", graph="test", node="step", project="1", status="error") >= 1
+
+def test_llm_calls_and_tokens_are_recorded():
+    callback = LLMMetricsCallback("test")
+    run_id = uuid4()
+    message = AIMessage(content="ok", usage_metadata={"input_tokens": 120, "output_tokens": 30, "total_tokens": 150})
+
+    callback.on_chat_model_start({}, [[]], run_id=run_id)
+    assert _sample("codehelp_llm_calls_in_flight", purpose="test") == 1.0
+    callback.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=run_id)
+
+    assert _sample("codehelp_llm_calls_in_flight", purpose="test") == 0.0
+    assert _sample("codehelp_llm_call_duration_seconds_count", purpose="test", status="ok") == 1.0
+    assert _sample("codehelp_llm_tokens_total", purpose="test", kind="input") == 120.0
+    assert _sample("codehelp_llm_tokens_total", purpose="test", kind="output") == 30.0
+
+def test_cache_hits_and_misses_are_counted():
+    cache = TTLLookupCache(maxsize=10, ttl=60, name="test")
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1 and cache.get("b", "default") == "default"
+    assert _sample("codehelp_cache_lookups_total", cache="test", result="hit") == 1.0
+    assert _sample("codehelp_cache_lookups_total", cache="test", result="miss") == 1.0
+
+def test_metrics_render_in_prometheus_text_format():
+    body, content_type = metrics.render_metrics()
+
+    assert content_type.startswith("text/plain")
+    text = body.decode("utf-8")
+    assert "# TYPE codehelp_graph_node_duration_seconds histogram" in text
+    assert "# TYPE codehelp_db_commit_duration_seconds histogram" in text
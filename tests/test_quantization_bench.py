@@ -0,0 +1,28 @@
+# tests/test_quantization_bench.py
+
+import json
+
+from backend.vectorstore import embeddings
+from benchmarks.bench_quantization_recall import _evaluate, _fixture_corpus
+from benchmarks.fake_providers import FakeEmbeddingFunction
+
+# --- Test Cases ---
+
+def test_fixture_corpus_is_embedded_and_evaluated(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(embeddings, "_embedding_function", FakeEmbeddingFunction(lambda: 0.0))
+    summaries = {
+        "functions": {f"/r/m.py::f{i}": {"summary": f"Computes the total {word} of an account."}
+                      for i, word in enumerate(["balance", "interest", "fee", "limit", "deposit", "overdraft"])},
+        "classes": {"/r/m.py::Account": {"summary": "A bank account with a balance."}, "/r/m.py::Empty": {}},
+    }
+    (tmp_path / "project_data" / "1").mkdir(parents=True)
+    (tmp_path / "project_data" / "1" / "summaries_db.json").write_text(json.dumps(summaries))
+
+    vectors, queries = _fixture_corpus()
+    assert vectors.shape == (7, 384)
+
+    rows = _evaluate(vectors, queries, ks=[1, 5], rerank_factor=4)
+    assert [row["storage"] for row in rows] == ["float32", "float16", "int8"]
+    # Every summary is its own nearest neighbour, in every storage mode.
+    assert all(row["recall@1"] == 1.0 for row in rows)
@@ -0,0 +1,181 @@
+# tests/test_query_routes.py
+
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from backend.api import query_routes
+from backend.core.auth_utils import Principal, get_current_user
+from backend.crud import project_crud
+from backend.db.database import get_async_db
+
+# --- Fakes ---
+
+class FakeHistoryWriter:
+    def __init__(self):
+        self.records = []
+
+    async def put(self, record):
+        self.records.append(record)
+
+    def put_nowait(self, record):
+        self.records.append(record)
+        return True
+
+# --- Fixtures ---
+
+@pytest.fixture
+def history(monkeypatch):
+    writer = FakeHistoryWriter()
+    monkeypatch.setattr(query_routes, "history_writer", writer)
+    return writer
+
+@pytest.fixture
+def client(monkeypatch, history):
+    async def owned_project(db, project_id, user_id):
+        return project_crud.ProjectRef(project_id, "bank", None, user_id)
+
+    async def no_db():
+        yield None
+
+    monkeypatch.setattr(project_crud, "get_owned_project_async", owned_project)
+    app = FastAPI()
+    app.include_router(query_routes.router)
+    app.dependency_overrides[get_current_user] = lambda: Principal(1, "ada", "user")
+    app.dependency_overrides[get_async_db] = no_db
+    return TestClient(app)
+
+@pytest.fixture
+def stream_stubs(monkeypatch):
+    """Canned retrieval and a three-token answer; records whether the stream was closed."""
+    calls = {"closed": False}
+
+    async def retrieve_node(state):
+        calls["retrieve"] = state
+        return {"sources": [{"name": "withdraw"}], "context": "def withdraw(): ..."}
+
+    async def stream_answer(question, context):
+        try:
+            for token in ["It ", "withdraws ", "money."]:
+                yield token
+        finally:
+            calls["closed"] = True
+
+    monkeypatch.setattr(query_routes, "retrieve_node", retrieve_node)
+    monkeypatch.setattr(query_routes, "stream_answer", stream_answer)
+    return calls
+
+@pytest.fixture
+def batch_stubs(monkeypatch):
+    """One shared retrieval per batch; generation fails for questions containing "fail"."""
+    calls = {"searches": [], "active": 0, "max_active": 0}
+
+    def search_batch(project_id, questions, top_k=5, filters=None, include_embeddings=False):
+        calls["searches"].append(list(questions))
+        return [[{"text": f"ctx {q}", "metadata": {"name": q}, "score": 0.1}] for q in questions]
+
+    async def generate_node(state):
+        calls["active"] += 1
+        calls["max_active"] = max(calls["max_active"], calls["active"])
+        try:
+            await asyncio.sleep(0.01)
+            if "fail" in state["question"]:
+                raise RuntimeError("generation failed")
+            return {"answer": f"answer to {state['question']}"}
+        finally:
+            calls["active"] -= 1
+
+    monkeypatch.setattr(query_routes, "search_relevant_summaries_batch", search_batch)
+    monkeypatch.setattr(query_routes, "build_context", lambda results: (results[0]["text"], results))
+    monkeypatch.setattr(query_routes, "generate_node", generate_node)
+    return calls
+
+def _events(response):
+    """Parses an SSE body into (event, data) pairs."""
+    events = []
+    for frame in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+# --- Test Cases ---
+
+def test_stream_emits_retrieval_tokens_then_done(client, history, stream_stubs):
+    response = client.post("/api/projects/1/ask/stream", json={"question": "What does withdraw do?"})
+
+    events = _events(response)
+    assert [name for name, _ in events] == ["retrieval", "token", "token", "token", "done"]
+    assert events[0][1] == {"sources": [{"name": "withdraw"}]}
+    assert "".join(data["text"] for name, data in events if name == "token") == "It withdraws money."
+    assert events[-1][1] == {"answer": "It withdraws money."}
+
+    (record,) = history.records
+    assert (record.question, record.answer, record.user_id, record.project_id) == (
+        "What does withdraw do?", "It withdraws money.", 1, 1)
+    assert stream_stubs["retrieve"]["project_id"] == 1
+
+def test_stream_logs_nothing_when_the_client_disconnects(client, history, stream_stubs, monkeypatch):
+    checks = []
+
+    async def is_disconnected(self):
+        checks.append(True)
+        return len(checks) > 1  # gone after the first token
+
+    monkeypatch.setattr(Request, "is_disconnected", is_disconnected)
+    response = client.post("/api/projects/1/ask/stream", json={"question": "What does withdraw do?"})
+
+    assert [name for name, _ in _events(response)] == ["retrieval", "token"]
+    assert history.records == []
+    assert stream_stubs["closed"]  # the LLM stream was closed, not left running
+
+def test_stream_reports_failures_as_an_error_event(client, history, stream_stubs, monkeypatch):
+    async def failing_stream(question, context):
+        yield "It "
+        raise RuntimeError("quota exceeded")
+
+    monkeypatch.setattr(query_routes, "stream_answer", failing_stream)
+    response = client.post("/api/projects/1/ask/stream", json={"question": "What does withdraw do?"})
+
+    events = _events(response)
+    assert [name for name, _ in events] == ["retrieval", "token", "error"]
+    assert "quota exceeded" in events[-1][1]["detail"]
+    assert history.records == []
+
+def test_batch_reports_each_question_by_index_then_counts(client, history, batch_stubs):
+    questions = ["q0", "q1 fail", "q2"]
+    response = client.post("/api/projects/1/ask/batch", json={"questions": questions})
+
+    events = _events(response)
+    assert events[-1] == ("done", {"answered": 2, "failed": 1})
+    by_index = {data["index"]: (name, data) for name, data in events[:-1]}
+    assert sorted(by_index) == [0, 1, 2]
+    assert by_index[0][0] == "result" and by_index[0][1]["answer"] == "answer to q0"
+    assert by_index[0][1]["sources"] == [{"metadata": {"name": "q0"}, "score": 0.1}]
+    assert by_index[1][0] == "error" and "generation failed" in by_index[1][1]["detail"]
+    assert batch_stubs["searches"] == [questions]  # one retrieval for the whole batch
+    assert sorted(record.question for record in history.records) == ["q0", "q2"]
+
+def test_batch_generates_at_most_max_concurrency_answers_at_once(client, batch_stubs):
+    questions = [f"q{i}" for i in range(8)]
+    response = client.post("/api/projects/1/ask/batch", json={"questions": questions, "max_concurrency": 2})
+
+    assert _events(response)[-1] == ("done", {"answered": 8, "failed": 0})
+    assert batch_stubs["max_active"] == 2
+
+def test_batch_logs_answers_already_sent_when_the_client_disconnects(client, history, batch_stubs, monkeypatch):
+    checks = []
+
+    async def is_disconnected(self):
+        checks.append(True)
+        return len(checks) > 1  # gone after the first result
+
+    monkeypatch.setattr(Request, "is_disconnected", is_disconnected)
+    response = client.post("/api/projects/1/ask/batch", json={"questions": ["q0", "q1", "q2"], "max_concurrency": 1})
+
+    events = _events(response)
+    assert [name for name, _ in events] == ["result"]
+    assert [record.answer for record in history.records] == [events[0][1]["answer"]]
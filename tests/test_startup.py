@@ -0,0 +1,84 @@
+# tests/test_startup.py
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Packages that must only be imported once a graph, model or index is needed
+DEFERRED_PACKAGES = (
+    "langgraph",
+    "langchain_google_genai",
+    "langchain_community",
+    "google.generativeai",
+    "chromadb",
+    "sentence_transformers",
+    "numpy",
+)
+
+# `import backend.main` takes about 0.7 s under -X importtime, most of it
+# FastAPI and SQLAlchemy themselves; pulling one of the deferred packages back
+# in costs 0.5 s or more. The best of a few runs is compared, so a busy
+# machine does not fail the test. Slower machines can raise the budget with
+# STARTUP_IMPORT_BUDGET_MS.
+IMPORT_BUDGET_MS = int(os.getenv("STARTUP_IMPORT_BUDGET_MS", "900"))
+IMPORT_BUDGET_RUNS = 3
+
+def _import_profile(cwd):
+    """Imports backend.main in a fresh interpreter with -X importtime; returns {module: cumulative_us}."""
+    env = {k: v for k, v in os.environ.items() if k != "GOOGLE_API_KEY"}
+    env.update(PYTHONPATH=PROJECT_ROOT, SECRET_KEY="test-secret")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.main"],
+        cwd=cwd, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    profile = {}
+    for line in completed.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line.split("|")
+            if cumulative.strip().isdigit():
+                profile[module.strip()] = int(cumulative)
+    return profile
+
+# --- Fixtures ---
+
+@pytest.fixture(scope="module")
+def startup_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp("startup")
+
+@pytest.fixture(scope="module")
+def profile(startup_dir):
+    return _import_profile(startup_dir)
+
+# --- Test Cases ---
+
+def test_the_app_imports_without_credentials_or_heavy_packages(profile, startup_dir):
+    loaded = sorted(m for m in profile if any(m == p or m.startswith(p + ".") for p in DEFERRED_PACKAGES))
+    slowest = sorted(profile.items(), key=lambda item: -item[1])[:10]
+    assert not loaded, f"Imported at startup: {loaded}; slowest imports (us): {slowest}"
+    # Tables are created and migrated in the lifespan, not on import.
+    assert not (startup_dir / "code_intel.db").exists()
+
+def test_the_app_imports_within_the_startup_budget(profile, startup_dir):
+    runs = [profile] + [_import_profile(startup_dir) for _ in range(IMPORT_BUDGET_RUNS - 1)]
+    profile = min(runs, key=lambda run: run["backend.main"])
+    elapsed_ms = profile["backend.main"] / 1000
+    print(f"import backend.main: {elapsed_ms:.0f} ms, best of {len(runs)} (budget {IMPORT_BUDGET_MS} ms)")
+
+    slowest = sorted(profile.items(), key=lambda item: -item[1])[:10]
+    assert elapsed_ms <= IMPORT_BUDGET_MS, (
+        f"import backend.main took {elapsed_ms:.0f} ms, over the {IMPORT_BUDGET_MS} ms budget; "
+        f"slowest imports (us): {slowest}"
+    )
+
+def test_graphs_and_models_are_built_once_on_first_use(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    from backend import graph_incremental2, graph_query
+
+    assert graph_query.query_app is graph_query.get_query_app()
+    assert graph_query.rag_chain is graph_query.get_rag_chain()
+    assert graph_incremental2.streaming_ingestion_app is graph_incremental2.get_ingestion_app("streaming")
@@ -0,0 +1,131 @@
+# tests/test_streaming_ingestion.py
+
+import asyncio
+import gc
+import json
+import os
+import time
+
+import pytest
+
+# The summarizer builds its LLM client at import time; no calls are made here.
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+
+from backend.nodes import streaming_ingest_node, summarize_changes_node
+from backend.nodes.streaming_ingest_node import streaming_ingestion_node
+
+# --- Fakes ---
+
+class FakeVectorStore:
+    """Records writes, taking `write_delay` seconds per call like an embedder."""
+
+    def __init__(self, write_delay=0.0):
+        self.write_delay = write_delay
+        self.ids = set()
+        self.write_times = []
+        self.batch_sizes = []
+
+    def delete_summaries(self, ids):
+        self.ids -= set(ids)
+
+    def add_documents(self, documents, ids):
+        time.sleep(self.write_delay)
+        self.ids |= set(ids)
+        self.batch_sizes.append(len(ids))
+        self.write_times.append(time.monotonic())
+
+# --- Fixtures ---
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """A repository of small modules, with project_data/ under a temporary cwd."""
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "repo"
+    source.mkdir()
+    for i in range(12):
+        (source / f"mod{i}.py").write_text(f"def func{i}():\n    return {i}\n")
+    (source / "bank.py").write_text("class Account:\n    def withdraw(self):\n        return 1\n")
+    return source
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Replaces the LLM with a fixed-latency fake and records when calls finish."""
+    finished = []
+
+    async def summarize(code, delay=0.05):
+        await asyncio.sleep(delay)
+        finished.append(time.monotonic())
+        return f"Summary of {code.splitlines()[0]}"
+
+    monkeypatch.setattr(summarize_changes_node, "summarize_code_with_llm", summarize)
+    return finished
+
+def _run(state, store, monkeypatch):
+    monkeypatch.setattr(streaming_ingest_node, "get_vector_store", lambda project_id: store)
+    return asyncio.run(streaming_ingestion_node(state))
+
+# --- Test Cases ---
+
+def test_streaming_matches_the_staged_outputs(repo, fake_llm, monkeypatch):
+    store = FakeVectorStore()
+
+    result = _run({"project_id": 1, "directory": str(repo)}, store, monkeypatch)
+
+    assert result["ingestion_status"] == "success"
+    assert result["files_scanned"] == 13 and result["summaries_generated"] == 13
+    assert f"{repo / 'bank.py'}::Account" in store.ids
+    with open("project_data/1/summaries_db.json") as f:
+        summary_db = json.load(f)
+    assert len(summary_db["functions"]) == 12 and len(summary_db["classes"]) == 1
+    with open("project_data/1/code_hashes.json") as f:
+        assert len(json.load(f)) == 13
+    with open("project_data/1/symbol_index.json") as f:
+        assert json.load(f)["root"] == str(repo)
+
+    # An incremental run only summarizes what changed and drops removed items.
+    (repo / "mod0.py").write_text("def func0():\n    return 'changed'\n")
+    (repo / "mod1.py").unlink()
+    second = _run({"project_id": 1, "directory": str(repo)}, store, monkeypatch)
+
+    assert second["summaries_generated"] == 1 and second["changes_detected"] == 2
+    assert f"{repo / 'mod1.py'}::func1" not in store.ids
+    with open("project_data/1/summaries_db.json") as f:
+        assert f"{repo / 'mod1.py'}::func1" not in json.load(f)["functions"]
+
+def test_stages_overlap_instead_of_running_back_to_back(repo, fake_llm, monkeypatch):
+    monkeypatch.setattr(streaming_ingest_node, "STREAM_SUMMARY_WORKERS", 2)
+    monkeypatch.setattr(streaming_ingest_node, "STREAM_QUEUE_SIZE", 2)
+    monkeypatch.setattr(streaming_ingest_node, "STREAM_WRITE_BATCH_SIZE", 2)
+    # A first ingestion: the backend is chosen up front, so nothing is held back.
+    store = FakeVectorStore(write_delay=0.05)
+
+    # Objects left by earlier tests would make full collections part of the timing.
+    gc.collect()
+    gc.freeze()
+    try:
+        started = time.monotonic()
+        result = _run({"project_id": 1, "directory": str(repo)}, store, monkeypatch)
+        elapsed = time.monotonic() - started
+    finally:
+        gc.unfreeze()
+
+    assert result["ingestion_status"] == "success" and result["summaries_generated"] == 13
+    # Vectors were written while summaries were still being generated...
+    assert store.write_times[0] < fake_llm[-1]
+    assert max(store.batch_sizes) <= 2
+    with open("project_data/1/vector_backend") as f:
+        assert f.read() in ("flat", "chroma")
+    # ...so the run takes about as long as the LLM stage, not LLM + writes.
+    llm_time, write_time = 13 * 0.05 / 2, len(store.write_times) * 0.05
+    assert elapsed < llm_time + write_time
+
+def test_a_failing_stage_reports_an_error(repo, fake_llm, monkeypatch):
+    class BrokenStore(FakeVectorStore):
+        def add_documents(self, documents, ids):
+            raise RuntimeError("embedder down")
+
+    result = _run({"project_id": 1, "directory": str(repo)}, BrokenStore(), monkeypatch)
+
+    assert result["ingestion_status"] == "error" and "embedder down" in result["error_message"]
+    # Hashes are not saved, so the next run retries everything.
+    assert not os.path.exists("project_data/1/code_hashes.json")
@@ -0,0 +1,110 @@
+# tests/test_symbol_index.py
+
+import json
+import os
+import time
+
+import pytest
+
+from backend.query.symbol_index import (
+    SymbolIndex,
+    build_symbol_entries,
+    save_symbol_index,
+    load_symbol_index,
+)
+
+# --- Fixtures ---
+
+@pytest.fixture
+def sample_hashes():
+    """A code_hashes.json-shaped dict with one function and one class."""
+    return {
+        "/repo/bank/account.py": {
+            "functions": {"open_account": "h1"},
+            "classes": {
+                "Account": {
+                    "source_hash": "h2",
+                    "methods": {"withdraw": "h3", "deposit": "h4"},
+                }
+            },
+        },
+        "/repo/bank/utils.py": {
+            "functions": {"format_amount": "h5"},
+            "classes": {},
+        },
+    }
+
+@pytest.fixture
+def project_dir(tmp_path, monkeypatch):
+    """Runs the test from a temporary cwd so project_data/ is isolated."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+# --- Test Cases ---
+
+def test_build_symbol_entries_uses_qualified_names(sample_hashes):
+    entries = dict(build_symbol_entries(sample_hashes))
+
+    assert entries["/repo/bank/account.py::open_account"] == "function"
+    assert entries["/repo/bank/account.py::Account"] == "class"
+    assert entries["/repo/bank/account.py::Account::withdraw"] == "method"
+    assert len(entries) == 5
+
+def test_prefix_search_matches_name_local_and_qualified_keys(sample_hashes):
+    index = SymbolIndex(build_symbol_entries(sample_hashes))
+
+    by_name = index.search_prefix("with")
+    assert [r["qualified_name"] for r in by_name] == ["/repo/bank/account.py::Account::withdraw"]
+    assert by_name[0]["class_name"] == "Account"
+
+    by_local = index.search_prefix("account::d")
+    assert [r["name"] for r in by_local] == ["deposit"]
+
+    by_path = index.search_prefix("/repo/bank/utils")
+    assert [r["name"] for r in by_path] == ["format_amount"]
+
+def test_prefix_search_deduplicates_and_respects_limit(sample_hashes):
+    index = SymbolIndex(build_symbol_entries(sample_hashes))
+
+    # "account" matches the class by name and by local key, and both methods.
+    results = index.search_prefix("account", limit=10)
+    assert len(results) == len({r["qualified_name"] for r in results})
+    assert len(index.search_prefix("account", limit=1)) == 1
+
+def test_fuzzy_search_ranks_tighter_matches_first(sample_hashes):
+    index = SymbolIndex(build_symbol_entries(sample_hashes))
+
+    results = index.search("wdr", fuzzy=True)
+    assert results[0]["name"] == "withdraw"
+    assert index.search("wdr", fuzzy=False) == []
+
+def test_index_round_trips_through_project_data(project_dir, sample_hashes):
+    save_symbol_index(1, build_symbol_entries(sample_hashes), root="/repo")
+
+    index = load_symbol_index(1)
+    assert index is not None and len(index) == 5
+    assert index.root == "/repo"
+    # A second load hits the in-process cache.
+    assert load_symbol_index(1) is index
+
+def test_index_is_rebuilt_from_existing_code_hashes(project_dir, sample_hashes):
+    os.makedirs("project_data/2")
+    with open("project_data/2/code_hashes.json", "w") as f:
+        json.dump(sample_hashes, f)
+
+    index = load_symbol_index(2)
+    assert index is not None
+    assert os.path.exists("project_data/2/symbol_index.json")
+    assert load_symbol_index(3) is None
+
+def test_prefix_search_is_fast_on_large_projects():
+    """Prefix lookups on a 100k-symbol project should stay sub-millisecond."""
+    entries = [(f"/repo/pkg{i // 100}/mod{i}.py::Class{i}::method_{i}", "method") for i in range(100_000)]
+    index = SymbolIndex(entries)
+
+    start = time.perf_counter()
+    for _ in range(100):
+        index.search_prefix("method_4242", limit=20)
+    per_query = (time.perf_counter() - start) / 100
+
+    assert per_query < 0.001
@@ -0,0 +1,55 @@
+# tests/test_synthetic_repo.py
+
+import filecmp
+import os
+
+from benchmarks.bench_ingestion_pipeline import _parse_and_hash, compare_to_baseline
+from benchmarks.synthetic_repo import edit_repository, generate_repository
+from backend.diffing.code_change_detector import detect_changes
+from backend.parser.scanner import scan_python_files
+
+SHAPE = {"classes": 2, "methods": 3, "functions": 2, "seed": 7}
+
+# --- Test Cases ---
+
+def test_repositories_are_reproducible(tmp_path):
+    first = generate_repository(str(tmp_path / "a"), 150, **SHAPE)
+    second = generate_repository(str(tmp_path / "b"), 150, **SHAPE)
+
+    assert all(filecmp.cmp(a, b, shallow=False) for a, b in zip(first, second))
+    # Modules plus one __init__.py per package; __pycache__ is pruned.
+    scanned = scan_python_files(str(tmp_path / "a"))
+    assert len(scanned) == 152 and not any("__pycache__" in path for path in scanned)
+
+def test_edits_show_up_as_the_expected_changes(tmp_path):
+    root = str(tmp_path)
+    generate_repository(root, 40, **SHAPE)
+    old_hashes, _, _ = _parse_and_hash(scan_python_files(root))
+
+    edits = edit_repository(root, 40, edit_ratio=0.25, **SHAPE)
+    new_hashes, _, _ = _parse_and_hash(scan_python_files(root))
+    changes = detect_changes(old_hashes, new_hashes)
+
+    assert {len(paths) for paths in edits.values()} == {10, 1}
+    assert {change.file_path for change in changes} == {path for paths in edits.values() for path in paths}
+    modified = [change for change in changes if change.file_path in edits["modified"]]
+    # Per edited module: one function body, and the first class gains a method.
+    assert sorted((c.item_type, c.change_type) for c in modified if c.file_path == edits["modified"][0]) == [
+        ("class", "modified"), ("function", "modified"), ("method", "added")
+    ]
+
+def test_only_slowdowns_beyond_the_threshold_are_regressions():
+    baseline = [
+        {"files": 1000, "stage": "parse", "seconds": 1.0},
+        {"files": 1000, "stage": "diff", "seconds": 0.001},
+    ]
+    results = [
+        {"files": 1000, "stage": "parse", "seconds": 1.3},
+        {"files": 1000, "stage": "diff", "seconds": 0.008},  # under the noise floor
+        {"files": 5000, "stage": "parse", "seconds": 9.0},   # not in the baseline
+    ]
+
+    compared = compare_to_baseline(results, baseline, threshold=0.25, min_seconds=0.01)
+
+    assert [(row["stage"], row["regressed"]) for row in compared] == [("parse", True), ("diff", False)]
+    assert not compare_to_baseline(results, baseline, threshold=0.5, min_seconds=0.01)[0]["regressed"]
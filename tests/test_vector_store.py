@@ -0,0 +1,62 @@
+# tests/test_vector_store.py
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+chromadb = pytest.importorskip("chromadb")
+from chromadb.api.types import EmbeddingFunction
+
+from backend.vectorstore import embeddings, store as store_module
+from backend.vectorstore.store import VectorStore
+
+# --- Fakes ---
+
+class KeywordEmbedding(EmbeddingFunction):
+    """One dimension per keyword, recording every batch it embeds."""
+
+    KEYWORDS = ["account", "withdraw", "format"]
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, input):
+        self.calls.append(list(input))
+        return [np.array([float(word in text.lower()) for word in self.KEYWORDS] + [0.1], dtype=np.float32)
+                for text in input]
+
+    @staticmethod
+    def name():
+        return "keyword-test"
+
+    def get_config(self):
+        return {}
+
+    @staticmethod
+    def build_from_config(config):
+        return KeywordEmbedding()
+
+# --- Test Cases ---
+
+def test_search_many_embeds_once_and_answers_each_query_in_order(tmp_path, monkeypatch):
+    embedding = KeywordEmbedding()
+    monkeypatch.setattr(store_module, "CHROMA_DB_PATH", str(tmp_path / "chroma"))
+    monkeypatch.setattr(embeddings, "_embedding_function", embedding)
+    store = VectorStore(project_id=1)
+    store.add_documents(
+        [
+            Document(page_content="Bank account.", metadata={"name": "Account", "type": "class"}),
+            Document(page_content="Withdraws money.", metadata={"name": "withdraw", "type": "method"}),
+            Document(page_content="Formats amounts.", metadata={"name": "fmt", "type": "function"}),
+        ],
+        ids=["/r/bank.py::Account", "/r/bank.py::Account::withdraw", "/r/util.py::fmt"],
+    )
+    embedding.calls.clear()
+
+    results = store.search_many(["How do I format it?", "Can I withdraw?"], top_k=1, include_embeddings=True)
+
+    assert embedding.calls == [["How do I format it?", "Can I withdraw?"]]
+    assert [r[0]["metadata"]["name"] for r in results] == ["fmt", "withdraw"]
+    assert len(results[0][0]["embedding"]) == 4
+    assert store.search_many([]) == []
+    assert store.search_many(["Can I withdraw?"], where={"type": "class"}, top_k=3)[0][0]["metadata"]["name"] == "Account"
@@ -0,0 +1,89 @@
+# tests/test_warmup.py
+
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.db import crud
+from backend.db.database import Base
+from backend.jobs.warmup import WarmupManager
+
+# --- Fixtures ---
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    """History for projects 1-3 (3 queried last); only 2 and 3 were ingested."""
+    monkeypatch.chdir(tmp_path)
+    for project_id in (2, 3):
+        os.makedirs(f"project_data/{project_id}")
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for project_id, day in [(1, 1), (2, 2), (3, 3), (1, 4), (3, 5)]:
+            connection.execute(text(
+                "INSERT INTO query_history (question, answer, timestamp, user_id, project_id) "
+                "VALUES ('q', 'a', :ts, 1, :project)"
+            ), {"ts": f"2025-01-0{day} 12:00:00", "project": project_id})
+    return sessionmaker(bind=engine)
+
+class RecordingWarmup(WarmupManager):
+    """Records the steps it runs instead of loading models; the embedder can be made to fail."""
+
+    def __init__(self, *args, embedder_error=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.warmed = []
+        self.embedder_error = embedder_error
+
+    def _warm_embedding_model(self):
+        if self.embedder_error:
+            raise RuntimeError(self.embedder_error)
+        self.warmed.append("embedding_model")
+
+    def _warm_query_graph(self):
+        self.warmed.append("query_graph")
+
+    def _warm_project(self, project_id):
+        self.warmed.append(project_id)
+
+# --- Test Cases ---
+
+def test_recently_queried_projects_come_first(session_factory):
+    db = session_factory()
+    assert crud.get_recently_queried_project_ids(db, limit=2) == [3, 1]
+    db.close()
+
+def test_warmup_opens_the_hottest_ingested_projects(session_factory):
+    warmup = RecordingWarmup(session_factory, enabled=True, project_count=2)
+    assert warmup.report()["ready"] is False
+
+    asyncio.run(warmup.run())
+
+    # Project 1 is among the two hottest but was never ingested.
+    assert warmup.warmed == ["embedding_model", "query_graph", 3]
+    report = warmup.report()
+    assert report["status"] == "ready" and report["ready"] is True
+    assert [step["name"] for step in report["steps"]] == ["embedding_model", "query_graph", "recent_projects", "project_3"]
+
+def test_a_failing_step_does_not_block_readiness(session_factory):
+    warmup = RecordingWarmup(session_factory, enabled=True, project_count=5, embedder_error="no torch")
+
+    asyncio.run(warmup.run())
+
+    assert warmup.ready and warmup.warmed == ["query_graph", 3, 2]
+    failed = [step for step in warmup.report()["steps"] if step["status"] == "failed"]
+    assert failed == [{"name": "embedding_model", "status": "failed", "error": "no torch", "seconds": failed[0]["seconds"]}]
+
+def test_disabled_warmup_is_ready_at_once(session_factory):
+    warmup = RecordingWarmup(session_factory, enabled=False)
+    warmup_started = asyncio.run(_start_and_yield(warmup))
+
+    assert warmup.ready and not warmup_started and warmup.warmed == []
+
+async def _start_and_yield(warmup):
+    warmup.start()
+    await asyncio.sleep(0)
+    return warmup._task is not None
@@ -0,0 +1,140 @@
+# tests/test_watch_mode.py
+
+import asyncio
+import json
+import os
+import shutil
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from backend.db.migrations import add_missing_columns
+from backend.jobs import watcher as watcher_module
+from backend.jobs.watcher import ProjectWatcher, SourceChangeFilter, WatchManager
+from backend.nodes.change_detection_node import change_detection_node
+from watchfiles import Change
+
+# --- Fixtures ---
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """A small repository, with project_data/ isolated under a temporary cwd."""
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "repo"
+    (source / "pkg").mkdir(parents=True)
+    (source / "a.py").write_text("def first():\n    return 1\n")
+    (source / "pkg" / "b.py").write_text("def second():\n    return 2\n")
+    (source / "pkg" / "c.py").write_text("def third():\n    return 3\n")
+    return source
+
+def _stored_hashes():
+    with open("project_data/1/code_hashes.json") as f:
+        return json.load(f)
+
+def _run(state):
+    return asyncio.run(change_detection_node(state))
+
+# --- Test Cases ---
+
+def test_changed_paths_rehash_only_those_files(repo, monkeypatch):
+    _run({"project_id": 1, "directory": str(repo)})
+
+    (repo / "a.py").write_text("def first():\n    return 100\n")
+    # An unreported edit must not be picked up: only the given paths are read.
+    (repo / "pkg" / "b.py").write_text("def second():\n    return 200\n")
+
+    result = _run({"project_id": 1, "directory": str(repo), "changed_paths": [str(repo / "a.py")]})
+
+    assert result["files_scanned"] == 1
+    assert [(c.item_name, c.change_type) for c in result["changes"]] == [("first", "modified")]
+    assert set(_stored_hashes()) == {str(repo / "a.py"), str(repo / "pkg" / "b.py"), str(repo / "pkg" / "c.py")}
+
+def test_a_removed_directory_drops_all_of_its_files(repo):
+    _run({"project_id": 1, "directory": str(repo)})
+
+    shutil.rmtree(repo / "pkg")
+    result = _run({"project_id": 1, "directory": str(repo), "changed_paths": [str(repo / "pkg")]})
+
+    assert sorted((c.item_name, c.change_type) for c in result["changes"]) == [("second", "removed"), ("third", "removed")]
+    assert set(_stored_hashes()) == {str(repo / "a.py")}
+
+def test_filter_keeps_scanned_sources_and_directories(repo):
+    watch_filter = SourceChangeFilter(str(repo))
+
+    assert watch_filter(Change.modified, str(repo / "a.py"))
+    assert watch_filter(Change.added, str(repo / "pkg"))
+    assert watch_filter(Change.deleted, str(repo / "old_pkg"))
+    assert not watch_filter(Change.modified, str(repo / "README.md"))
+    assert not watch_filter(Change.added, str(repo / "venv" / "lib.py"))
+    assert not watch_filter(Change.added, str(repo / ".hidden" / "x.py"))
+
+def test_watcher_submits_debounced_batches_of_changed_paths(repo):
+    class RecordingManager:
+        def __init__(self):
+            self.submitted = []
+            self.received = asyncio.Event()
+
+        def submit(self, project_id, user_id, directory, changed_paths=None):
+            self.submitted.append(changed_paths)
+            self.received.set()
+            return type("Job", (), {"id": f"job-{len(self.submitted)}"})(), True
+
+    async def scenario():
+        manager = RecordingManager()
+        watcher = ProjectWatcher(1, 1, str(repo), manager, debounce_ms=300)
+        watcher.start()
+        await asyncio.sleep(0.3)  # let the OS watch be registered
+        (repo / "a.py").write_text("def first():\n    return 5\n")
+        (repo / "pkg" / "d.py").write_text("def fourth():\n    return 4\n")
+        (repo / "notes.txt").write_text("ignored")
+        await asyncio.wait_for(manager.received.wait(), timeout=10)
+        await asyncio.sleep(0.5)
+        await watcher.stop()
+        return manager.submitted, watcher.describe()
+
+    submitted, described = asyncio.run(scenario())
+
+    changed = set().union(*submitted)
+    assert changed == {str(repo / "a.py"), str(repo / "pkg" / "d.py")}
+    assert described["batches"] == len(submitted) and described["last_job_id"]
+
+def test_a_failed_watch_is_unregistered_and_listed_with_its_error(repo, monkeypatch):
+    class NoopManager:
+        def submit(self, project_id, user_id, directory, changed_paths=None):
+            return type("Job", (), {"id": "job-1"})(), True
+
+    async def broken_awatch(*args, **kwargs):
+        raise OSError("inotify watch limit reached")
+        yield
+
+    monkeypatch.setattr(watcher_module, "awatch", broken_awatch)
+
+    async def scenario():
+        manager = WatchManager(NoopManager())
+        watcher = await manager.start(1, 1, str(repo))
+        await asyncio.gather(watcher._task, return_exceptions=True)
+        await asyncio.sleep(0)
+        listed = manager.list()
+        return manager.get(1), listed, await manager.stop(1), manager.list()
+
+    current, listed, stopped, after_stop = asyncio.run(scenario())
+
+    assert current is None
+    assert [(w["project_id"], w["status"], w["error"]) for w in listed] == [
+        (1, "failed", "OSError: inotify watch limit reached")
+    ]
+    assert stopped and after_stop == []
+
+def test_missing_nullable_columns_are_added(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE ingestion_jobs (id VARCHAR PRIMARY KEY, project_id INTEGER NOT NULL, "
+            "user_id INTEGER NOT NULL, directory TEXT NOT NULL, status VARCHAR NOT NULL, progress JSON NOT NULL, "
+            "cancel_requested BOOLEAN NOT NULL, current_node VARCHAR, error TEXT, created_at DATETIME, "
+            "started_at DATETIME, finished_at DATETIME)"
+        ))
+
+    assert add_missing_columns(engine) == 2
+    assert {"changed_paths", "archive_path"} <= {c["name"] for c in inspect(engine).get_columns("ingestion_jobs")}
+    assert add_missing_columns(engine) == 0